@@ -0,0 +1,51 @@
+"""
+Analysis Cache - structured match analyses shared by every user
+An analysis depends on the two teams, their validated samples and the
+stored bookmaker prices it is compared with, so it is keyed by both team
+ids, the newest fixture id of each sample and the odds state (fixture id
+and last price update). When either team plays again or a price moves
+the key changes and the older entry for the pairing is dropped. A short
+TTL picks up the inputs that move without either (model refits).
+"""
+import logging
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+ANALYSIS_CACHE_TTL = 900            # Seconds an analysis is served (odds/model changes)
+ANALYSIS_CACHE_SIZE = 500           # Entries kept, least recently used evicted first
+
+OddsState = Optional[Tuple[int, datetime]]
+CacheKey = Tuple[int, int, int, int, OddsState]
+
+
+def analysis_key(team_a_id: int, team_b_id: int, newest_a: int, newest_b: int, odds_state: OddsState = None) -> CacheKey:
+    return (team_a_id, team_b_id, newest_a, newest_b, odds_state)
+
+
+class AnalysisCache(TTLCache):
+    def __init__(self, ttl: int = ANALYSIS_CACHE_TTL, size: int = ANALYSIS_CACHE_SIZE):
+        super().__init__(ttl, size)
+        # (team_a_id, team_b_id) -> key of its current entry
+        self._pairings: Dict[Tuple[int, int], CacheKey] = {}
+
+    def set(self, key: CacheKey, analysis: Dict):
+        """Store an analysis, replacing the pairing's entry for older samples"""
+        previous = self._pairings.get(key[:2])
+        if previous and previous != key:
+            self._drop(previous)
+            logger.info(f"[ANALYSIS CACHE] {key[0]} x {key[1]} played again or prices moved, entry replaced")
+        self._pairings[key[:2]] = key
+        super().set(key, analysis)
+
+    def _drop(self, key: CacheKey):
+        super()._drop(key)
+        if self._pairings.get(key[:2]) == key:
+            del self._pairings[key[:2]]
+
+    def clear(self):
+        super().clear()
+        self._pairings.clear()
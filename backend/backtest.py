@@ -0,0 +1,289 @@
+"""
+Backtest Engine - replay the picks rules over the stored match history
+For every stored match, each team's pre-kickoff form window (its previous
+N stored matches, as PicksEngine uses its last 10) is computed with
+grouped cumulative sums in NumPy. Features are then reduced to fine
+(0.01-point) confidence histograms per market, so any (threshold,
+ALTA cut, MÉDIA cut) grid point is answered with a few cumulative-sum
+lookups - thousands of matches x hundreds of combinations run in
+milliseconds. Large grids can be split across a process pool.
+
+The replay covers the raw form-average rules only. Live picks go through
+the fitted model's probabilities when one exists and otherwise move the
+goal-market thresholds by the league baseline; neither is replayed here,
+and every report says so in its "decision_path".
+"""
+import itertools
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+WINDOW = 10          # Form window (matches per team), as in PicksEngine
+MIN_GAMES = 5        # PicksEngine drops fixtures with fewer games per team
+BIN_SCALE = 100      # Confidence bins of 0.01 points: integer thresholds compare exactly
+BINS = 100 * BIN_SCALE + 1
+POOL_MIN_GRID = 5000 # Grids smaller than this are not worth a process pool
+
+# Stated in every report: what the replay does and does not reproduce
+DECISION_PATH = {
+    "replayed": "raw form averages vs fixed thresholds",
+    "not_replayed": [
+        "model probabilities (live picks use them when a fitted model exists)",
+        "league baseline threshold adjustments (live picks without a model)",
+    ],
+}
+
+# Per-point columns returned for the whole grid
+GRID_COLUMNS = ["picks", "hit_rate", "avg_confidence", "calibration_gap",
+                "alta_picks", "alta_hit_rate", "media_picks", "media_hit_rate",
+                "baixa_picks", "baixa_hit_rate"]
+
+# Current PicksEngine rules: market -> (feature, direction, threshold, ALTA cut, MÉDIA cut)
+CURRENT_RULES = {
+    "Over 2.5": ("over_2_5", "over", 50, 70, 55),
+    "Under 2.5": ("over_2_5", "under", 45, 70, 55),
+    "Over 1.5": ("over_1_5", "over", 70, 80, 70),
+    "BTTS Sim": ("btts", "over", 55, 70, 55),
+    "BTTS Não": ("btts", "under", 40, 70, 55),
+}
+
+DEFAULT_GRID = {
+    "threshold": list(range(30, 91)),
+    "alta": list(range(55, 91, 5)),
+    "media": list(range(45, 76, 5)),
+}
+
+
+def prekickoff_features(matches: List[Dict], window: int = WINDOW, min_games: int = MIN_GAMES) -> Dict[str, np.ndarray]:
+    """Per-match combined form rates (0-100) from each team's previous matches
+
+    Only matches played before kickoff are used. Returns the feature and
+    outcome arrays for matches where both teams have at least `min_games`.
+    """
+    n = len(matches)
+    if n == 0:
+        return {"n": 0}
+
+    order = np.argsort(np.array([m["date"] for m in matches], dtype="datetime64[s]"), kind="stable")
+    home = np.array([matches[i]["home_team_id"] for i in order])
+    away = np.array([matches[i]["away_team_id"] for i in order])
+    hg = np.array([matches[i]["home_goals"] for i in order])
+    ag = np.array([matches[i]["away_goals"] for i in order])
+    total = hg + ag
+    outcomes = {
+        "over_1_5": (total > 1).astype(np.int64),
+        "over_2_5": (total > 2).astype(np.int64),
+        "btts": ((hg > 0) & (ag > 0)).astype(np.int64),
+    }
+
+    # Long table: one row per (team, match), grouped by team in date order
+    teams = np.concatenate([home, away])
+    match_idx = np.concatenate([np.arange(n), np.arange(n)])
+    rows = np.lexsort((match_idx, teams))
+    teams_sorted = teams[rows]
+    position = np.arange(2 * n)
+    is_start = np.ones(2 * n, dtype=bool)
+    is_start[1:] = teams_sorted[1:] != teams_sorted[:-1]
+    group_start = np.maximum.accumulate(np.where(is_start, position, 0))
+
+    # Previous `window` rows of the same team (current match excluded)
+    window_start = np.maximum(group_start, position - window)
+    games = position - window_start
+
+    rates = {}
+    for name, outcome in outcomes.items():
+        values = np.concatenate([outcome, outcome])[rows]
+        cumsum = np.concatenate([[0], np.cumsum(values)])
+        with np.errstate(invalid="ignore", divide="ignore"):
+            rate = (cumsum[position] - cumsum[window_start]) / games * 100
+        per_row = np.empty(2 * n)
+        per_row[rows] = rate
+        rates[name] = per_row
+
+    per_row_games = np.empty(2 * n, dtype=np.int64)
+    per_row_games[rows] = games
+    valid = (per_row_games[:n] >= min_games) & (per_row_games[n:] >= min_games)
+
+    features = {"n": int(valid.sum())}
+    for name in outcomes:
+        features[name] = ((rates[name][:n] + rates[name][n:]) / 2)[valid]
+        features[f"{name}_outcome"] = outcomes[name][valid]
+    return features
+
+
+def market_histograms(features: Dict[str, np.ndarray]) -> Dict[str, Dict[str, np.ndarray]]:
+    """Pick counts and hits per confidence bin, for each market
+
+    Confidence is the rate for "over" markets and 100 - rate for "under"
+    markets, so every rule becomes "pick when confidence >= threshold".
+    """
+    histograms = {}
+    for market, (feature, direction, *_rest) in CURRENT_RULES.items():
+        if features["n"] == 0:
+            histograms[market] = {"count": np.zeros(BINS), "hits": np.zeros(BINS), "conf_sum": np.zeros(BINS)}
+            continue
+        value = features[feature]
+        outcome = features[f"{feature}_outcome"]
+        if direction == "under":
+            value = 100 - value
+            outcome = 1 - outcome
+        # Confidence is capped at 99 like the picks engine
+        confidence = np.minimum(value, 99)
+        bins = np.clip(np.rint(value * BIN_SCALE).astype(np.int64), 0, BINS - 1)
+        histograms[market] = {
+            "count": np.bincount(bins, minlength=BINS).astype(float),
+            "hits": np.bincount(bins, weights=outcome, minlength=BINS),
+            "conf_sum": np.bincount(bins, weights=confidence, minlength=BINS),
+        }
+    return histograms
+
+
+def evaluate_grid(histogram: Dict[str, np.ndarray], grid: np.ndarray) -> Dict[str, np.ndarray]:
+    """Hit rate, calibration and level stats for an array of (threshold, alta, media) rows
+
+    Grid values are bin indices (confidence * BIN_SCALE).
+    """
+    # Suffix sums: S[x] = sum over bins >= x
+    suffix = {key: np.concatenate([np.cumsum(values[::-1])[::-1], [0.0]]) for key, values in histogram.items()}
+
+    threshold = grid[:, 0].astype(np.int64)
+    alta = np.maximum(grid[:, 1].astype(np.int64), threshold)
+    media = np.clip(grid[:, 2].astype(np.int64), threshold, alta)
+
+    def between(key, low, high):
+        return suffix[key][np.clip(low, 0, BINS)] - suffix[key][np.clip(high, 0, BINS)]
+
+    picks = suffix["count"][threshold]
+    hits = suffix["hits"][threshold]
+    conf_sum = suffix["conf_sum"][threshold]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        hit_rate = np.where(picks > 0, hits / picks * 100, np.nan)
+        avg_conf = np.where(picks > 0, conf_sum / picks, np.nan)
+
+        result = {
+            "picks": picks,
+            "hit_rate": hit_rate,
+            "avg_confidence": avg_conf,
+            "calibration_gap": avg_conf - hit_rate,
+        }
+        for level, low, high in [("alta", alta, np.full_like(alta, BINS)), ("media", media, alta), ("baixa", threshold, media)]:
+            count = between("count", low, high)
+            result[f"{level}_picks"] = count
+            result[f"{level}_hit_rate"] = np.where(count > 0, between("hits", low, high) / count * 100, np.nan)
+    return result
+
+
+def _evaluate_chunk(args):
+    histogram, chunk = args
+    return evaluate_grid(histogram, chunk)
+
+
+def calibration_curve(histogram: Dict[str, np.ndarray], width: int = 10) -> List[Dict]:
+    """Predicted confidence vs realized hit rate in `width`-point buckets"""
+    curve = []
+    for low in range(0, 100, width):
+        span = slice(low * BIN_SCALE, BINS if low + width >= 100 else (low + width) * BIN_SCALE)
+        count = histogram["count"][span].sum()
+        if count == 0:
+            continue
+        curve.append({
+            "bucket": f"{low}-{low + width}",
+            "picks": int(count),
+            "avg_confidence": round(float(histogram["conf_sum"][span].sum() / count), 1),
+            "hit_rate": round(float(histogram["hits"][span].sum() / count * 100), 1),
+        })
+    return curve
+
+
+def _round(value) -> Optional[float]:
+    return None if np.isnan(value) else round(float(value), 1)
+
+
+def _column(name: str, values: np.ndarray) -> List:
+    """JSON-ready grid column (counts as ints, NaN -> None)"""
+    if name.endswith("picks"):
+        return values.astype(np.int64).tolist()
+    return [_round(value) for value in values]
+
+
+def _summarize(result: Dict[str, np.ndarray], i: int, point) -> Dict:
+    return {
+        "threshold": int(point[0]),
+        "alta": int(point[1]),
+        "media": int(point[2]),
+        "picks": int(result["picks"][i]),
+        "hit_rate": _round(result["hit_rate"][i]),
+        "calibration_gap": _round(result["calibration_gap"][i]),
+        "alta_hit_rate": _round(result["alta_hit_rate"][i]),
+        "media_hit_rate": _round(result["media_hit_rate"][i]),
+        "baixa_hit_rate": _round(result["baixa_hit_rate"][i]),
+    }
+
+
+def run_backtest(matches: List[Dict], grid: Dict[str, List[int]] = None, window: int = WINDOW,
+                 min_games: int = MIN_GAMES, min_picks: int = 30, workers: int = 1, top: int = 5) -> Dict:
+    """Replay the picks rules over `matches` for every grid point
+
+    Grid thresholds are on the confidence scale ("pick when confidence >=
+    threshold"; for under markets confidence is 100 - rate). Returns the
+    grid points once and, per market, the current rule's results, the
+    calibration curve, the best grid points by hit rate (among those with
+    `min_picks`) and every grid point's results as columns aligned with
+    the points.
+    """
+    grid = grid or DEFAULT_GRID
+    features = prekickoff_features(matches, window, min_games)
+    histograms = market_histograms(features)
+
+    points = np.array(list(itertools.product(grid["threshold"], grid["alta"], grid["media"])), dtype=np.int64)
+    points = points[points[:, 1] >= points[:, 2]]  # ALTA cut above MÉDIA cut
+    scaled = points * BIN_SCALE
+
+    use_pool = workers > 1 and len(points) >= POOL_MIN_GRID
+    report = {
+        "matches": len(matches),
+        "evaluated_matches": features["n"],
+        "grid_points": int(len(points)),
+        "workers": workers if use_pool else 1,
+        "decision_path": DECISION_PATH,
+        "grid": {"columns": ["threshold", "alta", "media"], "points": points.tolist()},
+        "markets": {},
+    }
+
+    if use_pool:
+        chunks = np.array_split(scaled, workers)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            tasks = [(histograms[market], chunk) for market in CURRENT_RULES for chunk in chunks]
+            outputs = list(pool.map(_evaluate_chunk, tasks))
+        evaluated = {}
+        for i, market in enumerate(CURRENT_RULES):
+            parts = outputs[i * workers:(i + 1) * workers]
+            evaluated[market] = {key: np.concatenate([part[key] for part in parts]) for key in parts[0]}
+    else:
+        evaluated = {market: evaluate_grid(histograms[market], scaled) for market in CURRENT_RULES}
+
+    for market, (feature, direction, threshold, alta, media) in CURRENT_RULES.items():
+        # Under rules pick when rate < threshold, i.e. confidence > 100 - threshold
+        if direction == "under":
+            current_point = ((100 - threshold) * BIN_SCALE + 1, alta * BIN_SCALE, media * BIN_SCALE)
+        else:
+            current_point = (threshold * BIN_SCALE, alta * BIN_SCALE, media * BIN_SCALE)
+        current = evaluate_grid(histograms[market], np.array([current_point]))
+        result = evaluated[market]
+
+        eligible = np.where(result["picks"] >= min_picks, np.nan_to_num(result["hit_rate"], nan=-1), -1)
+        best = [i for i in np.argsort(-eligible, kind="stable")[:top] if eligible[i] >= 0]
+
+        report["markets"][market] = {
+            "current": {**_summarize(current, 0, (100 - threshold if direction == "under" else threshold, alta, media)),
+                        "rule": f"{feature} {'<' if direction == 'under' else '>='} {threshold}%"},
+            "best": [_summarize(result, i, points[i]) for i in best],
+            "calibration": calibration_curve(histograms[market]),
+            "grid": {column: _column(column, result[column]) for column in GRID_COLUMNS},
+        }
+
+    return report
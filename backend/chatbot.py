@@ -1,13 +1,42 @@
-from typing import Dict, List, Optional, Tuple
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple, Union
 import asyncio
 import re
 from datetime import datetime
 from football_api import FootballAPI
+from fixture_stats import FixtureStatsStore
+from match_history import match_history
+from model_engine import score_model
+from ratings import rating_engine
+from league_baselines import league_baselines
+from odds_store import odds_store
+from analysis_cache import AnalysisCache, analysis_key
+from query_cache import QueryCache, normalize_query
+from conversation_context import ConversationContext
 from models import User, Subscription
 
+BATCH_CONCURRENCY = 4  # Concurrent API calls while resolving/fetching a batch of matches
+
+# Words a follow-up may carry besides markets/odds ("e o over 3.5?", "e com odd 2.10?")
+FOLLOW_UP_WORDS = {
+    "e", "o", "a", "os", "as", "com", "pra", "para", "de", "da", "do", "no", "na", "se",
+    "odd", "odds", "agora", "entao", "então", "mas", "que", "tal", "tambem", "também",
+    "mesmo", "jogo", "esse", "nesse", "and", "what", "about", "how", "with", "the", "at",
+}
+
 class ChatBot:
     def __init__(self):
         self.api = FootballAPI()
+        self.stats_store = FixtureStatsStore(self.api)
+        self.history = match_history
+        self.model = score_model
+        self.ratings = rating_engine
+        self.baselines = league_baselines
+        self.odds = odds_store
+        # Shared by every user of this instance
+        self.analysis_cache = AnalysisCache()
+        self.query_cache = QueryCache()
+        # Per user: the last analysed match, for follow-up questions
+        self.conversations = ConversationContext()
         
         # Market patterns for intelligent parsing
         self.market_patterns = {
@@ -36,8 +65,17 @@ class ChatBot:
         'elite': 100
     }
     
-    async def process_message(self, user_input: str, user: User) -> str:
-        """Process user message with intelligent interpretation"""
+    async def _emit(self, progress: Optional[Callable[[str, Dict], Awaitable[None]]], event: str, data: Dict):
+        """Report a finished stage to a streaming caller (no-op otherwise)"""
+        if progress:
+            await progress(event, data)
+    
+    async def process_message(self, user_input: str, user: User, progress: Callable[[str, Dict], Awaitable[None]] = None) -> str:
+        """Process user message with intelligent interpretation
+        
+        progress (optional) is awaited with (event, data) as each stage of a
+        match analysis finishes: parsed, teams, resolved, form, stats, markets.
+        """
         try:
             original_input = user_input.strip()
             
@@ -54,16 +92,43 @@ class ChatBot:
                 return self._format_help()
             
             # ═══════════════════════════════════════════════════════════════
-            # 2. PARSE INPUT - Extract teams, markets, and odds
+            # 2. FRONT DOOR - a known query goes straight to the analysis
+            # ═══════════════════════════════════════════════════════════════
+            query_key = normalize_query(original_input)
+            known = self.query_cache.get(query_key)
+            if known:
+                await self._emit(progress, "parsed", {"text": known["teams_text"], "markets": known["markets"], "odds": known["odds"]})
+                await self._emit(progress, "teams", {"teams": [team["name"] for team in known["teams"]]})
+                return await self._analyze_match({
+                    "intent": "match",
+                    "team_a": known["teams"][0],
+                    "team_b": known["teams"][1],
+                    "n": 10,
+                    "split_mode": "A_HOME_B_AWAY",
+                    "markets": known["markets"],
+                    "odds": known["odds"]
+                }, user, progress)
+            
+            # ═══════════════════════════════════════════════════════════════
+            # 3. FOLLOW-UP - new markets/odds for the user's last match
+            # ═══════════════════════════════════════════════════════════════
+            follow_up = self._parse_follow_up(original_input)
+            context = self.conversations.get(user.id) if follow_up else None
+            if context:
+                return await self._answer_follow_up(context, follow_up, user, progress)
+            
+            # ═══════════════════════════════════════════════════════════════
+            # 4. PARSE INPUT - Extract teams, markets, and odds
             # ═══════════════════════════════════════════════════════════════
             parsed = self._intelligent_parse(original_input)
             
             teams_text = parsed.get("teams_text", "")
             markets = parsed.get("markets", [])
             odds = parsed.get("odds", [])
+            await self._emit(progress, "parsed", {"text": teams_text, "markets": markets, "odds": odds})
             
             # ═══════════════════════════════════════════════════════════════
-            # 3. IDENTIFY TEAMS - Try multiple methods
+            # 5. IDENTIFY TEAMS - Try multiple methods
             # ═══════════════════════════════════════════════════════════════
             teams = []
             ambiguous = False
@@ -96,9 +161,11 @@ class ChatBot:
                     teams = extracted
             
             # ═══════════════════════════════════════════════════════════════
-            # 4. HANDLE DIFFERENT SCENARIOS
+            # 6. HANDLE DIFFERENT SCENARIOS
             # ═══════════════════════════════════════════════════════════════
             
+            await self._emit(progress, "teams", {"teams": teams[:2]})
+            
             # Standard match analysis (with or without markets/odds)
             if len(teams) >= 2:
                 parsed = {
@@ -110,7 +177,7 @@ class ChatBot:
                     "markets": markets,
                     "odds": odds
                 }
-                return await self._analyze_match(parsed, user)
+                return await self._analyze_match(parsed, user, progress, query_key, teams_text)
             
             # Single team analysis
             elif len(teams) >= 1:
@@ -124,7 +191,7 @@ class ChatBot:
                 return await self._analyze_team(parsed, user)
             
             # ═══════════════════════════════════════════════════════════════
-            # 5. FRIENDLY FALLBACK - Never show cold error
+            # 7. FRIENDLY FALLBACK - Never show cold error
             # ═══════════════════════════════════════════════════════════════
             return self._format_friendly_fallback(original_input)
                 
@@ -441,54 +508,450 @@ class ChatBot:
         lines.append("└─────────────────────────────────────────────────────────┘")
         return "\n".join(lines)
     
-    async def _analyze_match(self, parsed: Dict, user: User) -> str:
-        """Analyze match between two teams with strict data validation"""
+    async def _analyze_match(self, parsed: Dict, user: User, progress: Callable[[str, Dict], Awaitable[None]] = None, query_key: str = None, teams_text: str = "") -> str:
+        """Analyze match between two teams with strict data validation
+        
+        With a query_key, the parsed query and its resolved teams are
+        remembered by the front-door cache.
+        """
         team_a_name = parsed["team_a"]
         team_b_name = parsed["team_b"]
+        
+        analysis = await self.match_analysis(team_a_name, team_b_name, progress)
+        if analysis.get("error") == "team_not_found":
+            return self._format_friendly_fallback(f"{team_a_name} vs {team_b_name}")
+        if query_key:
+            self.query_cache.set(query_key, {
+                "teams_text": teams_text,
+                "markets": parsed.get("markets", []),
+                "odds": parsed.get("odds", []),
+                "teams": [analysis["home"], analysis["away"]]
+            })
+        if analysis.get("error") == "insufficient_data":
+            return self._format_data_error(analysis["home"]["name"], analysis["away"]["name"], analysis["errors"]["home"], analysis["errors"]["away"])
+        
+        self.conversations.set(user.id, analysis, parsed.get("markets", []), parsed.get("odds", []))
+        return await self._render_match_analysis(analysis, parsed.get("markets", []), parsed.get("odds", []), progress)
+    
+    async def _render_match_analysis(self, analysis: Dict, markets: List[str], odds: List[str], progress: Callable[[str, Dict], Awaitable[None]] = None) -> str:
+        sections = self._match_analysis_sections(analysis, markets, odds)
+        await self._emit(progress, "markets", {"text": "\n".join(dict(sections)["markets"])})
+        return "\n".join(line for _, section in sections for line in section)
+    
+    def _parse_follow_up(self, text: str) -> Optional[Dict]:
+        """Markets/odds of a message that names no teams (None otherwise)"""
+        parsed = self._intelligent_parse(re.sub(r"[?!¿¡]", " ", text))
+        if not parsed["markets"] and not parsed["odds"]:
+            return None
+        words = re.findall(r"[^\W\d_]+", parsed["teams_text"])
+        if any(word not in FOLLOW_UP_WORDS for word in words):
+            return None
+        return {"markets": parsed["markets"], "odds": list(dict.fromkeys(parsed["odds"]))}
+    
+    async def _answer_follow_up(self, context: Dict, follow_up: Dict, user: User, progress: Callable[[str, Dict], Awaitable[None]] = None) -> str:
+        """Last match re-rendered for new markets/odds - no resolution or fetching
+        
+        New markets replace the previous ones along with their odds; an odd
+        alone re-prices the markets already asked about.
+        """
+        analysis = context["analysis"]
+        markets = follow_up["markets"] or context["markets"]
+        odds = follow_up["odds"]
+        self.conversations.set(user.id, analysis, markets, odds)
+        
+        await self._emit(progress, "parsed", {"text": "", "markets": markets, "odds": odds})
+        await self._emit(progress, "teams", {"teams": [analysis["home"]["name"], analysis["away"]["name"]]})
+        return await self._render_match_analysis(analysis, markets, odds, progress)
+    
+    async def match_analysis(self, team_a_name: Union[str, Dict], team_b_name: Union[str, Dict], progress: Callable[[str, Dict], Awaitable[None]] = None) -> Dict:
+        """Structured match analysis (stats, probabilities, picks) from verified data
+        
+        Plain JSON, fully derived from the two teams' validated samples and
+        the local model state - the chat text is rendered from it. Teams are
+        names, or already resolved {"id", "name"} dicts. Returns
+        {"error": "team_not_found"} or {"error": "insufficient_data"} when
+        it can't be built.
+        """
+        return (await self.match_analyses([(team_a_name, team_b_name)], progress))[0]
+    
+    async def match_analyses(self, matchups: List[Tuple[Union[str, Dict], Union[str, Dict]]], progress: Callable[[str, Dict], Awaitable[None]] = None) -> List[Dict]:
+        """Structured analyses of several matches (same order as matchups)
+        
+        Every distinct team is resolved and fetched once, concurrently, and
+        the statistics of all samples are ingested together - a slip costs
+        one fixtures request per team, not two per match.
+        """
         REQUIRED_GAMES = 10  # FIXED: Always 10 games per team
-        markets = parsed.get("markets", [])
-        odds = parsed.get("odds", [])
+        semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+        
+        async def limited(coro):
+            async with semaphore:
+                return await coro
         
         # ═══════════════════════════════════════════════════════════════
-        # STEP 1: RESOLVE TEAMS
+        # STEP 1: RESOLVE TEAMS (each distinct name once)
         # ═══════════════════════════════════════════════════════════════
-        team_a = await self.api.resolve_team(team_a_name)
-        if not team_a:
-            return self._format_friendly_fallback(f"{team_a_name} vs {team_b_name}")
+        names = {}
+        for pair in matchups:
+            for name in pair:
+                if isinstance(name, str):
+                    names.setdefault(name.strip().lower(), name)
+        found = await asyncio.gather(*(limited(self.api.resolve_team(name)) for name in names.values()))
+        teams = {key: {"id": team["id"], "name": team["name"]} for key, team in zip(names, found) if team}
+        
+        def team_for(entry):
+            if isinstance(entry, dict):
+                return {"id": entry["id"], "name": entry["name"]}
+            return teams.get(entry.strip().lower())
+        
+        results: List[Optional[Dict]] = [None] * len(matchups)
+        pairs = {}
+        for i, (team_a_name, team_b_name) in enumerate(matchups):
+            team_a, team_b = team_for(team_a_name), team_for(team_b_name)
+            if not team_a or not team_b:
+                results[i] = {"error": "team_not_found", "team": team_b_name if team_a else team_a_name}
+                continue
+            pairs[i] = (team_a, team_b)
+            await self._emit(progress, "resolved", {"team_a": team_a, "team_b": team_b})
         
-        team_b = await self.api.resolve_team(team_b_name, context_fixtures=[])
-        if not team_b:
-            return self._format_friendly_fallback(f"{team_a_name} vs {team_b_name}")
+        # Latest stored bookmaker prices of each pairing (no API call) - part of the cache key
+        market_odds = {i: self._find_match_odds(team_a, team_b) for i, (team_a, team_b) in pairs.items()}
+        
+        # ═══════════════════════════════════════════════════════════════
+        # STEP 2: ANALYSIS CACHE (teams whose history is cached need no fetch)
+        # ═══════════════════════════════════════════════════════════════
+        looked_up = set()
+        for i, (team_a, team_b) in list(pairs.items()):
+            history_a = self.api.cached_team_fixtures(team_a["id"], REQUIRED_GAMES * 3)
+            history_b = self.api.cached_team_fixtures(team_b["id"], REQUIRED_GAMES * 3)
+            if not history_a or not history_b:
+                continue
+            validated_a = self._validate_fixtures(history_a, team_a["id"], REQUIRED_GAMES)
+            validated_b = self._validate_fixtures(history_b, team_b["id"], REQUIRED_GAMES)
+            if not validated_a["valid"] or not validated_b["valid"]:
+                continue
+            looked_up.add(i)
+            cached = self.analysis_cache.get(
+                self._analysis_key(team_a, team_b, validated_a["fixtures"], validated_b["fixtures"], market_odds[i])
+            )
+            if cached:
+                await self._emit_sample_sections(progress, cached)
+                results[i] = cached
+                del pairs[i]
         
         # ═══════════════════════════════════════════════════════════════
-        # STEP 2: FETCH FIXTURES (get extra for filtering)
+        # STEP 3: FETCH FIXTURES (get extra for filtering, each team once)
         # ═══════════════════════════════════════════════════════════════
-        fixtures_a_raw = await self.api.get_team_fixtures(team_a["id"], REQUIRED_GAMES * 3)
-        fixtures_b_raw = await self.api.get_team_fixtures(team_b["id"], REQUIRED_GAMES * 3)
+        team_ids = list(dict.fromkeys(team["id"] for pair in pairs.values() for team in pair))
+        fetched = await asyncio.gather(*(limited(self.api.get_team_fixtures(team_id, REQUIRED_GAMES * 3)) for team_id in team_ids))
+        fixtures_raw = dict(zip(team_ids, fetched))
+        
+        # Keep finished matches in the local history (feeds the score model)
+        self.history.ingest([fixture for team_id in team_ids for fixture in fixtures_raw[team_id]])
         
         # ═══════════════════════════════════════════════════════════════
-        # STEP 3: VALIDATE AND FILTER FIXTURES
+        # STEP 4: VALIDATE AND FILTER FIXTURES
         # ═══════════════════════════════════════════════════════════════
-        validated_a = self._validate_fixtures(fixtures_a_raw, team_a["id"], REQUIRED_GAMES)
-        validated_b = self._validate_fixtures(fixtures_b_raw, team_b["id"], REQUIRED_GAMES)
+        validated = {team_id: self._validate_fixtures(fixtures_raw[team_id], team_id, REQUIRED_GAMES) for team_id in team_ids}
         
-        # Check if we have enough valid data
-        if not validated_a["valid"] or not validated_b["valid"]:
-            return self._format_data_error(team_a["name"], team_b["name"], validated_a, validated_b)
+        # Goal stats of each team's sample, computed once (streamed grid and analysis)
+        team_stats = {}
         
-        filtered_a = validated_a["fixtures"]
-        filtered_b = validated_b["fixtures"]
+        def stats_for(team):
+            if team["id"] not in team_stats:
+                team_stats[team["id"]] = self._calculate_team_stats(validated[team["id"]]["fixtures"], team["id"])
+            return team_stats[team["id"]]
+        
+        samples = {}
+        for i, (team_a, team_b) in pairs.items():
+            validated_a, validated_b = validated[team_a["id"]], validated[team_b["id"]]
+            
+            # Check if we have enough valid data
+            if not validated_a["valid"] or not validated_b["valid"]:
+                results[i] = {
+                    "error": "insufficient_data",
+                    "home": team_a,
+                    "away": team_b,
+                    "errors": {"home": validated_a["errors"], "away": validated_b["errors"]}
+                }
+                continue
+            
+            filtered_a = validated_a["fixtures"]
+            filtered_b = validated_b["fixtures"]
+            
+            # Form and the stats grid only need the fixtures - stream them before the slower steps
+            if progress:
+                form_text = self._format_form_section(
+                    team_a, team_b,
+                    self._get_form_string(filtered_a[:5], team_a["id"]),
+                    self._get_form_string(filtered_b[:5], team_b["id"])
+                )
+                await self._emit(progress, "form", {"text": "\n".join(form_text)})
+                league_hint = self._infer_common_league(filtered_a, filtered_b)
+                stats_text = self._format_stats_section(
+                    team_a, team_b,
+                    stats_for(team_a),
+                    stats_for(team_b),
+                    self.ratings.match_probabilities(team_a["id"], team_b["id"]),
+                    self.baselines.get(league_hint)
+                )
+                await self._emit(progress, "stats", {"text": "\n".join(stats_text)})
+            
+            # Same teams, same newest games, same prices: the analysis is already known
+            if i not in looked_up:
+                cached = self.analysis_cache.get(self._analysis_key(team_a, team_b, filtered_a, filtered_b, market_odds[i]))
+                if cached:
+                    results[i] = cached
+                    continue
+            samples[i] = (filtered_a, filtered_b)
         
         # ═══════════════════════════════════════════════════════════════
-        # STEP 4: GENERATE ANALYSIS WITH VERIFIED DATA
+        # STEP 5: CORNERS / CARDS (stored statistics - only new fixtures are fetched)
         # ═══════════════════════════════════════════════════════════════
-        return self._generate_match_analysis(
-            team_a, team_b, 
-            filtered_a, filtered_b, 
-            "LAST_10",  # Always last 10 games
-            markets, odds,
-            validated_a["date_range"], validated_b["date_range"]
+        sample_fixtures = {}
+        for filtered_a, filtered_b in samples.values():
+            for fixture in filtered_a + filtered_b:
+                sample_fixtures.setdefault(fixture.get("fixture", {}).get("id"), fixture)
+        try:
+            statistics = await self.stats_store.ingest(list(sample_fixtures.values())) if sample_fixtures else {}
+        except Exception as e:
+            import logging
+            logging.getLogger(__name__).warning(f"[STATS] Fixture statistics unavailable, corners/cards skipped: {str(e)}")
+            statistics = {}
+        
+        for i, (filtered_a, filtered_b) in samples.items():
+            team_a, team_b = pairs[i]
+            
+            # ═══════════════════════════════════════════════════════════════
+            # STEP 6: SCORE MODEL (Dixon-Coles, only when the league is covered locally)
+            # ═══════════════════════════════════════════════════════════════
+            league_id = self._infer_common_league(filtered_a, filtered_b)
+            model = self.model.price_match(league_id, team_a["id"], team_b["id"]) if league_id else None
+            ratings = self.ratings.match_probabilities(team_a["id"], team_b["id"])
+            baseline = self.baselines.get(league_id)
+            
+            # ═══════════════════════════════════════════════════════════════
+            # STEP 7: BUILD ANALYSIS WITH VERIFIED DATA
+            # ═══════════════════════════════════════════════════════════════
+            results[i] = self._build_match_analysis(
+                team_a, team_b,
+                filtered_a, filtered_b,
+                stats_for(team_a), stats_for(team_b),
+                validated[team_a["id"]]["date_range"], validated[team_b["id"]]["date_range"],
+                self._calculate_advanced_stats(filtered_a, statistics),
+                self._calculate_advanced_stats(filtered_b, statistics),
+                league_id, model, ratings, baseline, market_odds[i]
+            )
+            self.analysis_cache.set(self._analysis_key(team_a, team_b, filtered_a, filtered_b, market_odds[i]), results[i])
+        
+        return results
+    
+    def _find_match_odds(self, team_a: Dict, team_b: Dict) -> Optional[Dict]:
+        """Latest stored bookmaker prices for the next meeting (None when unavailable)"""
+        try:
+            return self.odds.find_match_odds(team_a["id"], team_b["id"])
+        except Exception as e:
+            return None
+    
+    def _analysis_key(self, team_a: Dict, team_b: Dict, fixtures_a: List[Dict], fixtures_b: List[Dict], market_odds: Dict = None):
+        """Cache key: both teams, the newest fixture of each validated sample and the odds state"""
+        odds_state = (market_odds.get("fixture_id"), market_odds.get("updated_at")) if market_odds else None
+        return analysis_key(
+            team_a["id"], team_b["id"],
+            fixtures_a[0].get("fixture", {}).get("id"), fixtures_b[0].get("fixture", {}).get("id"),
+            odds_state
+        )
+    
+    async def _emit_sample_sections(self, progress: Callable[[str, Dict], Awaitable[None]], analysis: Dict):
+        """Form and stats blocks of a cached analysis, as the fetched path streams them"""
+        if not progress:
+            return
+        team_a, team_b = analysis["home"], analysis["away"]
+        form_text = self._format_form_section(team_a, team_b, analysis["form"]["home"], analysis["form"]["away"])
+        await self._emit(progress, "form", {"text": "\n".join(form_text)})
+        stats_text = self._format_stats_section(
+            team_a, team_b, analysis["stats"]["home"], analysis["stats"]["away"], analysis["ratings"], analysis["baseline"]
         )
+        await self._emit(progress, "stats", {"text": "\n".join(stats_text)})
+    
+    def accumulator(self, analyses: List[Dict]) -> Dict:
+        """Combined (multiple) probability of the best pick of each analysis
+        
+        Legs are treated as independent, so the combined probability is the
+        product of the leg probabilities. The bookmaker odd of the multiple
+        is given when every leg has a stored price.
+        """
+        legs = []
+        for i, analysis in enumerate(analyses):
+            if analysis.get("error") or not analysis.get("picks"):
+                continue
+            best = analysis["picks"][0]
+            prices = {value["market"]: value["odd"] for value in (analysis["market_odds"] or {}).get("values", [])}
+            legs.append({
+                "match": i,
+                "home": analysis["home"]["name"],
+                "away": analysis["away"]["name"],
+                "market": best["market"],
+                "label": best["label"],
+                "probability": best["probability"],
+                "odd": prices.get(best["market"]),
+            })
+        
+        if not legs:
+            return {"legs": [], "probability": None, "fair_odd": None, "odd": None, "edge": None, "complete": False}
+        
+        probability = 1.0
+        for leg in legs:
+            probability *= leg["probability"] / 100
+        
+        odd = None
+        if all(leg["odd"] for leg in legs):
+            odd = 1.0
+            for leg in legs:
+                odd *= leg["odd"]
+        
+        return {
+            "legs": legs,
+            "probability": round(probability * 100, 2),
+            "fair_odd": round(1 / probability, 2),
+            "odd": round(odd, 2) if odd else None,
+            "edge": round((probability * odd - 1) * 100, 1) if odd else None,
+            "complete": len(legs) == len(analyses),
+        }
+    
+    def _parse_slip(self, text: str) -> List[Tuple[str, str]]:
+        """Matchups of a pasted betting slip (one per line, comma or semicolon)"""
+        matchups = []
+        for piece in re.split(r"[\n,;]+", text):
+            if not piece.strip():
+                continue
+            parsed = self._intelligent_parse(piece)
+            teams = self._extract_teams_from_text(parsed.get("teams_text") or piece)
+            if len(teams) >= 2:
+                matchups.append((teams[0], teams[1]))
+        return matchups
+    
+    def _build_match_analysis(self, team_a: Dict, team_b: Dict, fixtures_a: List[Dict], fixtures_b: List[Dict], stats_a: Dict, stats_b: Dict, date_range_a: Dict, date_range_b: Dict, advanced_a: Tuple[Dict, Dict], advanced_b: Tuple[Dict, Dict], league_id: int = None, model: Dict = None, ratings: Dict = None, baseline: Dict = None, market_odds: Dict = None) -> Dict:
+        """Structured analysis from the validated samples, their stats and the pricing inputs"""
+        corners_a, cards_a = advanced_a
+        corners_b, cards_b = advanced_b
+        
+        averages = {
+            "over_2_5": (stats_a['over_2_5'] + stats_b['over_2_5']) / 2,
+            "over_1_5": (stats_a['over_1_5'] + stats_b['over_1_5']) / 2,
+            "btts": (stats_a['btts'] + stats_b['btts']) / 2,
+            "avg_total_goals": (stats_a['avg_total_goals'] + stats_b['avg_total_goals']) / 2,
+        }
+        # Half-time markets (only when both samples carry score.halftime)
+        has_ht = stats_a.get("ht_sample", 0) > 0 and stats_b.get("ht_sample", 0) > 0
+        if has_ht:
+            for key in ["ht_over_0_5", "ht_over_1_5", "goals_both_halves"]:
+                averages[key] = (stats_a[key] + stats_b[key]) / 2
+        
+        # Score model replaces the simple averages when available
+        if model:
+            probabilities = {
+                "source": "model",
+                "over_1_5": model["over_1_5"],
+                "over_2_5": model["over_2_5"],
+                "btts": model["btts"],
+                "home_scores": model["home_scores"],
+                "away_scores": model["away_scores"],
+            }
+        else:
+            probabilities = {
+                "source": "form",
+                "over_1_5": averages["over_1_5"],
+                "over_2_5": averages["over_2_5"],
+                "btts": averages["btts"],
+                "home_scores": 100 - stats_a.get("failed_to_score_rate", 0),
+                "away_scores": 100 - stats_b.get("failed_to_score_rate", 0),
+            }
+        probabilities["under_2_5"] = 100 - probabilities["over_2_5"]
+        probabilities["btts_no"] = 100 - probabilities["btts"]
+        
+        # Picks by probability (capped at 99%)
+        bets = [
+            ("over_1_5", "Over 1.5 Gols", probabilities["over_1_5"]),
+            ("over_2_5", "Over 2.5 Gols", probabilities["over_2_5"]),
+            ("under_2_5", "Under 2.5 Gols", probabilities["under_2_5"]),
+            ("btts", "Ambos Marcam", probabilities["btts"]),
+            ("btts_no", "Ambos Não Marcam", probabilities["btts_no"]),
+            ("home_scores", f"{team_a['name']} Marca", probabilities["home_scores"]),
+            ("away_scores", f"{team_b['name']} Marca", probabilities["away_scores"]),
+        ]
+        if has_ht:
+            bets.append(("ht_over_0_5", "HT Over 0.5", averages["ht_over_0_5"]))
+            bets.append(("goals_both_halves", "Gol nos 2 Tempos", averages["goals_both_halves"]))
+        picks = []
+        for market, label, probability in bets:
+            prob = self._cap_probability(probability)
+            conf = "ALTA" if prob >= 65 else "MÉDIA" if prob >= 50 else "BAIXA"
+            picks.append({"market": market, "label": label, "probability": prob, "confidence": conf})
+        picks.sort(key=lambda pick: pick["probability"], reverse=True)
+        
+        # Stored bookmaker prices compared with our probabilities
+        market_value = None
+        if market_odds and market_odds.get("odds"):
+            values = []
+            for label, key, market_prob in [
+                ("Over 1.5", "over_1_5", probabilities["over_1_5"]),
+                ("Over 2.5", "over_2_5", probabilities["over_2_5"]),
+                ("Under 2.5", "under_2_5", probabilities["under_2_5"]),
+                ("BTTS Sim", "btts", probabilities["btts"]),
+                ("BTTS Não", "btts_no", probabilities["btts_no"]),
+            ]:
+                odd_value = market_odds["odds"].get(key)
+                if not odd_value:
+                    continue
+                values.append({
+                    "market": key,
+                    "label": label,
+                    "odd": odd_value,
+                    "implied_probability": 100 / odd_value,
+                    "probability": market_prob,
+                    "edge": (market_prob / 100 * odd_value - 1) * 100,
+                })
+            market_value = {
+                "fixture_id": market_odds.get("fixture_id"),
+                "kickoff": market_odds.get("kickoff"),
+                "updated_at": market_odds.get("updated_at"),
+                "values": values,
+            }
+        
+        return {
+            "home": team_a,
+            "away": team_b,
+            "league_id": league_id,
+            "sample": {
+                "games": len(fixtures_a),
+                "home": {"fixtures": [f.get("fixture", {}).get("id") for f in fixtures_a], "date_range": date_range_a},
+                "away": {"fixtures": [f.get("fixture", {}).get("id") for f in fixtures_b], "date_range": date_range_b},
+            },
+            "form": {
+                "home": self._get_form_string(fixtures_a[:5], team_a["id"]),
+                "away": self._get_form_string(fixtures_b[:5], team_b["id"]),
+            },
+            "stats": {"home": stats_a, "away": stats_b, "average": averages},
+            "corners": {"home": corners_a, "away": corners_b},
+            "cards": {"home": cards_a, "away": cards_b},
+            "model": model,
+            "ratings": ratings,
+            "baseline": baseline,
+            "probabilities": probabilities,
+            "picks": picks,
+            "market_odds": market_value,
+            "insights": self._generate_market_insights(stats_a, stats_b, team_a['name'], team_b['name'], ratings, baseline),
+        }
+    
+    def _infer_common_league(self, fixtures_a: List[Dict], fixtures_b: List[Dict]) -> Optional[int]:
+        """Most recent league (by team A's fixtures) that both teams played in"""
+        leagues_b = {f.get("league", {}).get("id") for f in fixtures_b}
+        for fixture in fixtures_a:
+            league_id = fixture.get("league", {}).get("id")
+            if league_id and league_id in leagues_b:
+                return league_id
+        return None
     
     def _validate_fixtures(self, fixtures: List[Dict], team_id: int, required: int) -> Dict:
         """Validate fixtures - ensure data quality before analysis
@@ -634,7 +1097,7 @@ class ChatBot:
         
         return result
     
-    def _format_data_error(self, team_a: str, team_b: str, val_a: Dict, val_b: Dict) -> str:
+    def _format_data_error(self, team_a: str, team_b: str, errors_a: List[str], errors_b: List[str]) -> str:
         """Format error message when data validation fails"""
         lines = []
         lines.append("⚠️ Dados Insuficientes")
@@ -643,10 +1106,10 @@ class ChatBot:
         lines.append(f"Não foi possível obter dados suficientes para análise.")
         lines.append("")
         
-        if val_a["errors"]:
-            lines.append(f"  {team_a}: {', '.join(val_a['errors'])}")
-        if val_b["errors"]:
-            lines.append(f"  {team_b}: {', '.join(val_b['errors'])}")
+        if errors_a:
+            lines.append(f"  {team_a}: {', '.join(errors_a)}")
+        if errors_b:
+            lines.append(f"  {team_b}: {', '.join(errors_b)}")
         
         lines.append("")
         lines.append("💡 Tente novamente em alguns minutos ou verifique os nomes dos times.")
@@ -667,6 +1130,7 @@ class ChatBot:
         
         # Get fixtures
         fixtures = await self.api.get_team_fixtures(team["id"], n * 2)
+        self.history.ingest(fixtures)
         
         # Filter by venue
         filtered = self._filter_fixtures_by_venue(fixtures, team["id"], home_away)
@@ -690,18 +1154,23 @@ class ChatBot:
         
         return filtered
     
-    def _generate_match_analysis(self, team_a: Dict, team_b: Dict, fixtures_a: List[Dict], fixtures_b: List[Dict], split_mode: str, markets: List[str] = None, odds: List[str] = None, date_range_a: Dict = None, date_range_b: Dict = None) -> str:
-        """Generate premium match analysis - Bloomberg/TradingView style"""
+    def _match_analysis_sections(self, analysis: Dict, markets: List[str] = None, odds: List[str] = None) -> List[Tuple[str, List[str]]]:
+        """Premium match analysis (Bloomberg/TradingView style) as ordered blocks: header, form, stats, markets
+        
+        Thin text layer over match_analysis(); markets/odds are the ones the
+        user typed.
+        """
         from datetime import datetime
         
         markets = markets or []
         odds = odds or []
-        date_range_a = date_range_a or {}
-        date_range_b = date_range_b or {}
-        
-        # Calculate statistics
-        stats_a = self._calculate_team_stats(fixtures_a, team_a["id"])
-        stats_b = self._calculate_team_stats(fixtures_b, team_b["id"])
+        team_a, team_b = analysis["home"], analysis["away"]
+        sample = analysis["sample"]
+        date_range_a = sample["home"]["date_range"] or {}
+        date_range_b = sample["away"]["date_range"] or {}
+        stats_a, stats_b = analysis["stats"]["home"], analysis["stats"]["away"]
+        model = analysis["model"]
+        probabilities = analysis["probabilities"]
         
         # Build premium output
         lines = []
@@ -718,7 +1187,7 @@ class ChatBot:
         # HEADER - Casual, humano e elegante
         # ═══════════════════════════════════════════════════════════════
         lines.append(f"⚽ {team_a['name']} vs {team_b['name']}")
-        lines.append(f"📊 Baseado nos últimos {len(fixtures_a)} jogos de cada equipe")
+        lines.append(f"📊 Baseado nos últimos {sample['games']} jogos de cada equipe")
         
         # Show user's markets and odds if provided
         if markets or odds:
@@ -731,35 +1200,46 @@ class ChatBot:
         lines.append("")
         
         # ═══════════════════════════════════════════════════════════════
-        # FORM SECTION - Use first 5 (most recent) since list is sorted newest first
+        # FORM SECTION / STATISTICS GRID (streamed ahead of the rest)
         # ═══════════════════════════════════════════════════════════════
-        form_a = self._get_form_string(fixtures_a[:5], team_a['id'])
-        form_b = self._get_form_string(fixtures_b[:5], team_b['id'])
+        form = self._format_form_section(team_a, team_b, analysis["form"]["home"], analysis["form"]["away"])
+        stats = self._format_stats_section(team_a, team_b, stats_a, stats_b, analysis["ratings"], analysis["baseline"])
+        header, lines = lines, []
         
-        lines.append("📈 Forma Recente")
-        lines.append("─────────────────────────────────────────────────────────")
-        lines.append(f"  {team_a['name'][:15]:<15}  {form_a}")
-        lines.append(f"  {team_b['name'][:15]:<15}  {form_b}")
-        lines.append("")
+        # ═══════════════════════════════════════════════════════════════
+        # CORNERS / CARDS (match totals from stored fixture statistics)
+        # ═══════════════════════════════════════════════════════════════
+        corners_a, corners_b = analysis["corners"]["home"], analysis["corners"]["away"]
+        cards_a, cards_b = analysis["cards"]["home"], analysis["cards"]["away"]
+        if corners_a["sample"] and corners_b["sample"]:
+            lines.append("🚩 Escanteios e Cartões")
+            lines.append("─────────────────────────────────────────────────────────")
+            lines.append(f"  {'Mercado':<14} {team_a['name'][:10]:<12} {team_b['name'][:10]:<12} {'Média':<10}")
+            lines.append(f"  {'─'*50}")
+            lines.append(f"  {'Escanteios':<14} {corners_a['avg']:>6.1f}       {corners_b['avg']:>6.1f}       {(corners_a['avg']+corners_b['avg'])/2:>6.1f}")
+            for key, label in [("over_8_5", "Esc. +8.5"), ("over_9_5", "Esc. +9.5"), ("over_10_5", "Esc. +10.5")]:
+                lines.append(f"  {label:<14} {corners_a[key]:>6.0f}%      {corners_b[key]:>6.0f}%      {(corners_a[key]+corners_b[key])/2:>6.0f}%")
+            if cards_a["sample"] and cards_b["sample"]:
+                lines.append(f"  {'Cartões':<14} {cards_a['avg']:>6.1f}       {cards_b['avg']:>6.1f}       {(cards_a['avg']+cards_b['avg'])/2:>6.1f}")
+                for key, label in [("over_3_5", "Cart. +3.5"), ("over_4_5", "Cart. +4.5")]:
+                    lines.append(f"  {label:<14} {cards_a[key]:>6.0f}%      {cards_b[key]:>6.0f}%      {(cards_a[key]+cards_b[key])/2:>6.0f}%")
+            lines.append("")
         
         # ═══════════════════════════════════════════════════════════════
-        # STATISTICS GRID
+        # SCORE MODEL (Dixon-Coles) - replaces simple averages when available
         # ═══════════════════════════════════════════════════════════════
-        avg_over_2_5 = (stats_a['over_2_5'] + stats_b['over_2_5']) / 2
-        avg_over_1_5 = (stats_a['over_1_5'] + stats_b['over_1_5']) / 2
-        avg_btts = (stats_a['btts'] + stats_b['btts']) / 2
+        if model:
+            lines.append("🧮 Modelo de Placar (Dixon-Coles)")
+            lines.append("─────────────────────────────────────────────────────────")
+            lines.append(f"  1 X 2          {model['home_win']:>5.0f}%  {model['draw']:>5.0f}%  {model['away_win']:>5.0f}%")
+            lines.append(f"  Gols esperados {model['expected_goals_home']:>5.1f}  x  {model['expected_goals_away']:.1f}")
+            scores = "  ".join(f"{cs['score']} ({cs['probability']:.0f}%)" for cs in model["correct_scores"][:3])
+            lines.append(f"  Placares       {scores}")
+            lines.append("")
         
-        lines.append("📊 Estatísticas")
-        lines.append("─────────────────────────────────────────────────────────")
-        lines.append(f"  {'Mercado':<14} {team_a['name'][:10]:<12} {team_b['name'][:10]:<12} {'Média':<10}")
-        lines.append(f"  {'─'*50}")
-        lines.append(f"  {'Over 2.5':<14} {stats_a['over_2_5']:>6.0f}%      {stats_b['over_2_5']:>6.0f}%      {avg_over_2_5:>6.0f}%")
-        lines.append(f"  {'Over 1.5':<14} {stats_a['over_1_5']:>6.0f}%      {stats_b['over_1_5']:>6.0f}%      {avg_over_1_5:>6.0f}%")
-        lines.append(f"  {'BTTS':<14} {stats_a['btts']:>6.0f}%      {stats_b['btts']:>6.0f}%      {avg_btts:>6.0f}%")
-        lines.append(f"  {'Média Gols':<14} {stats_a['avg_total_goals']:>6.1f}       {stats_b['avg_total_goals']:>6.1f}       {(stats_a['avg_total_goals']+stats_b['avg_total_goals'])/2:>6.1f}")
-        lines.append(f"  {'Vitórias':<14} {stats_a['win_rate']:>6.0f}%      {stats_b['win_rate']:>6.0f}%")
-        lines.append(f"  {'Clean Sheet':<14} {stats_a['clean_sheet_rate']:>6.0f}%      {stats_b['clean_sheet_rate']:>6.0f}%")
-        lines.append("")
+        prob_over_1_5 = probabilities["over_1_5"]
+        prob_over_2_5 = probabilities["over_2_5"]
+        prob_btts = probabilities["btts"]
         
         # ═══════════════════════════════════════════════════════════════
         # BEST BETS - PROBABILITY BARS
@@ -767,27 +1247,14 @@ class ChatBot:
         lines.append("🎯 Apostas Recomendadas")
         lines.append("─────────────────────────────────────────────────────────")
         
-        # Calculate probabilities (capped at 99%)
-        team_a_scores = self._cap_probability(100 - stats_a.get("failed_to_score_rate", 0))
-        team_b_scores = self._cap_probability(100 - stats_b.get("failed_to_score_rate", 0))
-        
-        bets = [
-            ("Over 1.5 Gols", self._cap_probability(avg_over_1_5)),
-            ("Over 2.5 Gols", self._cap_probability(avg_over_2_5)),
-            ("Under 2.5 Gols", self._cap_probability(100 - avg_over_2_5)),
-            ("Ambos Marcam", self._cap_probability(avg_btts)),
-            ("Ambos Não Marcam", self._cap_probability(100 - avg_btts)),
-            (f"{team_a['name'][:12]} Marca", team_a_scores),
-            (f"{team_b['name'][:12]} Marca", team_b_scores),
-        ]
-        
-        # Sort by probability
-        bets.sort(key=lambda x: x[1], reverse=True)
-        
-        for bet_name, prob in bets[:7]:
-            bar = self._create_probability_bar(prob)
-            conf = "ALTA" if prob >= 65 else "MÉDIA" if prob >= 50 else "BAIXA"
-            lines.append(f"  {bet_name:<22} {prob:>5.0f}%  {bar}  [{conf}]")
+        short_labels = {
+            "home_scores": f"{team_a['name'][:12]} Marca",
+            "away_scores": f"{team_b['name'][:12]} Marca",
+        }
+        for pick in analysis["picks"][:7]:
+            bet_name = short_labels.get(pick["market"], pick["label"])
+            bar = self._create_probability_bar(pick["probability"])
+            lines.append(f"  {bet_name:<22} {pick['probability']:>5.0f}%  {bar}  [{pick['confidence']}]")
         
         lines.append("")
         
@@ -808,16 +1275,16 @@ class ChatBot:
                     for market in markets:
                         market_lower = market.lower()
                         if "over 2.5" in market_lower:
-                            market_prob = avg_over_2_5
+                            market_prob = prob_over_2_5
                         elif "over 1.5" in market_lower:
-                            market_prob = avg_over_1_5
+                            market_prob = prob_over_1_5
                         elif "under 2.5" in market_lower:
-                            market_prob = 100 - avg_over_2_5
+                            market_prob = 100 - prob_over_2_5
                         elif "ambos marcam" in market_lower or "btts" in market_lower:
                             if "não" in market_lower or "no" in market_lower:
-                                market_prob = 100 - avg_btts
+                                market_prob = 100 - prob_btts
                             else:
-                                market_prob = avg_btts
+                                market_prob = prob_btts
                     
                     if market_prob:
                         fair_odds = 100 / market_prob if market_prob > 0 else 1
@@ -843,6 +1310,17 @@ class ChatBot:
                     pass
             
             lines.append("")
+        elif analysis["market_odds"]:
+            # No odd typed: compare with the stored bookmaker prices
+            lines.append("💰 Odds de Mercado")
+            lines.append("─────────────────────────────────────────────────────────")
+            
+            for value in analysis["market_odds"]["values"]:
+                edge = value["edge"]
+                flag = "✅" if edge >= 5 else "⚠️" if edge > -5 else "❌"
+                lines.append(f"  {flag} {value['label']:<10} @{value['odd']:<6.2f} Prob. implícita: {value['implied_probability']:>3.0f}% | Nossa: {value['probability']:>3.0f}% | Edge: {edge:+.1f}%")
+            
+            lines.append("")
         
         # ═══════════════════════════════════════════════════════════════
         # AI INSIGHT BOX
@@ -850,8 +1328,7 @@ class ChatBot:
         lines.append("💡 Insight de Mercado")
         lines.append("─────────────────────────────────────────────────────────")
         
-        insights = self._generate_market_insights(stats_a, stats_b, team_a['name'], team_b['name'])
-        for insight in insights[:2]:
+        for insight in analysis["insights"][:2]:
             lines.append(f"  {insight}")
         
         lines.append("")
@@ -864,7 +1341,52 @@ class ChatBot:
         lines.append(f"  BetFaro | {timestamp}")
         lines.append("─────────────────────────────────────────────────────────")
         
-        return "\n".join(lines)
+        return [("header", header), ("form", form), ("stats", stats), ("markets", lines)]
+    
+    def _format_form_section(self, team_a: Dict, team_b: Dict, form_a: str, form_b: str) -> List[str]:
+        """Recent form block (form strings of the 5 most recent games)"""
+        lines = []
+        
+        lines.append("📈 Forma Recente")
+        lines.append("─────────────────────────────────────────────────────────")
+        lines.append(f"  {team_a['name'][:15]:<15}  {form_a}")
+        lines.append(f"  {team_b['name'][:15]:<15}  {form_b}")
+        lines.append("")
+        return lines
+    
+    def _format_stats_section(self, team_a: Dict, team_b: Dict, stats_a: Dict, stats_b: Dict, ratings: Dict = None, baseline: Dict = None) -> List[str]:
+        """Statistics grid block"""
+        lines = []
+        avg_over_2_5 = (stats_a['over_2_5'] + stats_b['over_2_5']) / 2
+        avg_over_1_5 = (stats_a['over_1_5'] + stats_b['over_1_5']) / 2
+        avg_btts = (stats_a['btts'] + stats_b['btts']) / 2
+        
+        lines.append("📊 Estatísticas")
+        lines.append("─────────────────────────────────────────────────────────")
+        lines.append(f"  {'Mercado':<14} {team_a['name'][:10]:<12} {team_b['name'][:10]:<12} {'Média':<10}")
+        lines.append(f"  {'─'*50}")
+        lines.append(f"  {'Over 2.5':<14} {stats_a['over_2_5']:>6.0f}%      {stats_b['over_2_5']:>6.0f}%      {avg_over_2_5:>6.0f}%")
+        lines.append(f"  {'Over 1.5':<14} {stats_a['over_1_5']:>6.0f}%      {stats_b['over_1_5']:>6.0f}%      {avg_over_1_5:>6.0f}%")
+        lines.append(f"  {'BTTS':<14} {stats_a['btts']:>6.0f}%      {stats_b['btts']:>6.0f}%      {avg_btts:>6.0f}%")
+        lines.append(f"  {'Média Gols':<14} {stats_a['avg_total_goals']:>6.1f}       {stats_b['avg_total_goals']:>6.1f}       {(stats_a['avg_total_goals']+stats_b['avg_total_goals'])/2:>6.1f}")
+        lines.append(f"  {'Vitórias':<14} {stats_a['win_rate']:>6.0f}%      {stats_b['win_rate']:>6.0f}%")
+        lines.append(f"  {'Clean Sheet':<14} {stats_a['clean_sheet_rate']:>6.0f}%      {stats_b['clean_sheet_rate']:>6.0f}%")
+        if ratings:
+            lines.append(f"  {'Rating Elo':<14} {ratings['rating_home']:>6.0f}       {ratings['rating_away']:>6.0f}")
+        if baseline:
+            lines.append(f"  {'Base da Liga':<14} Over 2.5 {baseline['over_2_5_rate']:.0f}% · BTTS {baseline['btts_rate']:.0f}% · {baseline['avg_goals']:.1f} gols/jogo")
+        
+        # Half-time markets (only when both samples carry score.halftime)
+        has_ht = stats_a.get("ht_sample", 0) > 0 and stats_b.get("ht_sample", 0) > 0
+        if has_ht:
+            avg_ht_over_0_5 = (stats_a['ht_over_0_5'] + stats_b['ht_over_0_5']) / 2
+            avg_ht_over_1_5 = (stats_a['ht_over_1_5'] + stats_b['ht_over_1_5']) / 2
+            avg_both_halves = (stats_a['goals_both_halves'] + stats_b['goals_both_halves']) / 2
+            lines.append(f"  {'HT Over 0.5':<14} {stats_a['ht_over_0_5']:>6.0f}%      {stats_b['ht_over_0_5']:>6.0f}%      {avg_ht_over_0_5:>6.0f}%")
+            lines.append(f"  {'HT Over 1.5':<14} {stats_a['ht_over_1_5']:>6.0f}%      {stats_b['ht_over_1_5']:>6.0f}%      {avg_ht_over_1_5:>6.0f}%")
+            lines.append(f"  {'Gol 2 Tempos':<14} {stats_a['goals_both_halves']:>6.0f}%      {stats_b['goals_both_halves']:>6.0f}%      {avg_both_halves:>6.0f}%")
+        lines.append("")
+        return lines
     
     def _cap_probability(self, prob: float) -> float:
         """Cap probability at 99% maximum - never show 100%"""
@@ -881,24 +1403,47 @@ class ChatBot:
         empty = 10 - filled
         return "[" + "=" * filled + " " * empty + "]"
     
-    def _generate_market_insights(self, stats_a: Dict, stats_b: Dict, name_a: str, name_b: str) -> List[str]:
-        """Generate market insights in PT-BR"""
+    def _generate_market_insights(self, stats_a: Dict, stats_b: Dict, name_a: str, name_b: str, ratings: Dict = None, baseline: Dict = None) -> List[str]:
+        """Generate market insights in PT-BR
+        
+        With Elo ratings, good form only counts as "ótima fase" when the
+        ratings agree (recent wins against weak opponents don't). With a
+        league baseline, goal trends must also stand out from the league.
+        """
         insights = []
         
         avg_over_2_5 = (stats_a.get("over_2_5", 0) + stats_b.get("over_2_5", 0)) / 2
         avg_btts = (stats_a.get("btts", 0) + stats_b.get("btts", 0)) / 2
         
-        if avg_over_2_5 >= 60:
+        over_high, over_low = 60, 40
+        btts_high, btts_low = 60, 35
+        if baseline:
+            over_high = max(over_high, baseline["over_2_5_rate"] + 10)
+            over_low = min(over_low, baseline["over_2_5_rate"] - 10)
+            btts_high = max(btts_high, baseline["btts_rate"] + 10)
+            btts_low = min(btts_low, baseline["btts_rate"] - 10)
+        
+        if avg_over_2_5 >= over_high:
             insights.append("Padrão de muitos gols detectado. Over 2.5 com valor positivo.")
-        elif avg_over_2_5 <= 40:
+        elif avg_over_2_5 <= over_low:
             insights.append("Tendência de poucos gols. Under 2.5 apresenta boas odds.")
         
-        if avg_btts >= 60:
+        if avg_btts >= btts_high:
             insights.append("Ambos os times marcam com frequência. BTTS Sim recomendado.")
-        elif avg_btts <= 35:
+        elif avg_btts <= btts_low:
             insights.append("Tendência de clean sheet. Considere BTTS Não.")
         
-        if stats_a.get("win_rate", 0) >= 60 and stats_b.get("win_rate", 0) <= 40:
+        if ratings:
+            favours_a = ratings["home_win"] - ratings["away_win"]
+            if stats_a.get("win_rate", 0) >= 60 and favours_a >= 15:
+                insights.append(f"{name_a} em ótima fase. Vitória do mandante com valor.")
+            elif stats_b.get("win_rate", 0) >= 60 and favours_a <= -15:
+                insights.append(f"{name_b} em boa forma. Vitória do visitante pode ter valor.")
+            elif stats_a.get("win_rate", 0) >= 60 and favours_a < 0:
+                insights.append(f"{name_a} vem vencendo, mas {name_b} tem rating superior. Cuidado com o favoritismo.")
+            elif stats_b.get("win_rate", 0) >= 60 and favours_a > 0:
+                insights.append(f"{name_b} vem vencendo, mas {name_a} tem rating superior. Cuidado com o favoritismo.")
+        elif stats_a.get("win_rate", 0) >= 60 and stats_b.get("win_rate", 0) <= 40:
             insights.append(f"{name_a} em ótima fase. Vitória do mandante com valor.")
         elif stats_b.get("win_rate", 0) >= 60 and stats_a.get("win_rate", 0) <= 40:
             insights.append(f"{name_b} em boa forma. Vitória do visitante pode ter valor.")
@@ -1093,12 +1638,26 @@ class ChatBot:
             "avg_goals_for": 0,
             "avg_goals_against": 0,
             "avg_total_goals": 0,
+            # Half-time / second-half markets (from score.halftime)
+            "ht_sample": 0,
+            "ht_over_0_5": 0,
+            "ht_over_1_5": 0,
+            "sh_over_0_5": 0,
+            "sh_over_1_5": 0,
+            "goals_both_halves": 0,
+            "ht_win_rate": 0,
+            "ht_draw_rate": 0,
+            "ht_loss_rate": 0,
+            "htft": {},
         }
         
         total_goals_for = 0
         total_goals_against = 0
         wins = draws = losses = 0
         clean_sheets = failed_to_score = 0
+        ht_sample = 0
+        ht_wins = ht_draws = ht_losses = 0
+        htft_counts = {}
         
         for fixture in fixtures:
             teams = fixture.get("teams", {})
@@ -1144,6 +1703,44 @@ class ChatBot:
                 clean_sheets += 1
             if goals_for == 0:
                 failed_to_score += 1
+            
+            # Half-time score ships with every fixture payload (score.halftime),
+            # so HT / 2nd-half markets come from the same pass at no extra cost
+            halftime = (fixture.get("score") or {}).get("halftime") or {}
+            ht_home = halftime.get("home")
+            ht_away = halftime.get("away")
+            if ht_home is None or ht_away is None:
+                continue
+            
+            ht_sample += 1
+            ht_goals = ht_home + ht_away
+            sh_goals = total_goals - ht_goals
+            
+            if ht_goals > 0: stats["ht_over_0_5"] += 1
+            if ht_goals > 1: stats["ht_over_1_5"] += 1
+            if sh_goals > 0: stats["sh_over_0_5"] += 1
+            if sh_goals > 1: stats["sh_over_1_5"] += 1
+            if ht_goals > 0 and sh_goals > 0:
+                stats["goals_both_halves"] += 1
+            
+            if home_team.get("id") == team_id:
+                ht_for, ht_against = ht_home, ht_away
+            else:
+                ht_for, ht_against = ht_away, ht_home
+            
+            if ht_for > ht_against:
+                ht_wins += 1
+                ht_result = "W"
+            elif ht_for == ht_against:
+                ht_draws += 1
+                ht_result = "D"
+            else:
+                ht_losses += 1
+                ht_result = "L"
+            
+            ft_result = "W" if goals_for > goals_against else "D" if goals_for == goals_against else "L"
+            htft_key = f"{ht_result}/{ft_result}"
+            htft_counts[htft_key] = htft_counts.get(htft_key, 0) + 1
         
         # Calculate percentages and averages
         total = len(fixtures)
@@ -1161,41 +1758,74 @@ class ChatBot:
         stats["avg_goals_against"] = total_goals_against / total
         stats["avg_total_goals"] = (total_goals_for + total_goals_against) / total
         
+        # HT percentages use only fixtures that carried a half-time score
+        stats["ht_sample"] = ht_sample
+        if ht_sample:
+            for key in ["ht_over_0_5", "ht_over_1_5", "sh_over_0_5", "sh_over_1_5", "goals_both_halves"]:
+                stats[key] = (stats[key] / ht_sample) * 100
+            stats["ht_win_rate"] = (ht_wins / ht_sample) * 100
+            stats["ht_draw_rate"] = (ht_draws / ht_sample) * 100
+            stats["ht_loss_rate"] = (ht_losses / ht_sample) * 100
+            stats["htft"] = {k: (v / ht_sample) * 100 for k, v in htft_counts.items()}
+        
         return stats
     
     def _calculate_ht_stats(self, fixtures: List[Dict], team_id: int) -> Dict:
-        """Calculate half-time statistics"""
+        """Calculate half-time statistics from score.halftime"""
+        HT_KEYS = [
+            "ht_sample", "ht_over_0_5", "ht_over_1_5", "sh_over_0_5", "sh_over_1_5",
+            "goals_both_halves", "ht_win_rate", "ht_draw_rate", "ht_loss_rate", "htft"
+        ]
         if not fixtures:
-            return {"ht_over_0_5": 0, "ht_over_1_5": 0}
+            return {"ht_sample": 0, "ht_over_0_5": 0, "ht_over_1_5": 0}
+        
+        stats = self._calculate_team_stats(fixtures, team_id)
+        return {key: stats[key] for key in HT_KEYS}
+    
+    def _calculate_advanced_stats(self, fixtures: List[Dict], statistics: Dict[int, Dict] = None) -> Tuple[Dict, Dict]:
+        """Calculate corners and cards statistics (match totals) from stored fixture statistics"""
+        corners = {"sample": 0, "avg": 0, "over_8_5": 0, "over_9_5": 0, "over_10_5": 0}
+        cards = {"sample": 0, "avg": 0, "over_3_5": 0, "over_4_5": 0}
         
-        ht_over_0_5 = 0
-        ht_over_1_5 = 0
+        if not statistics:
+            return corners, cards
         
+        total_corners = total_cards = 0
         for fixture in fixtures:
-            # Note: API-Football doesn't provide HT goals in basic fixtures
-            # This is a placeholder - would need /fixtures/statistics endpoint
-            # For now, estimate based on typical distribution
-            ft_goals = fixture.get("goals", {}).get("home", 0) + fixture.get("goals", {}).get("away", 0)
+            row = statistics.get(fixture.get("fixture", {}).get("id"))
+            if not row:
+                continue
             
-            # Rough estimation: ~60% of FT goals come in HT
-            ht_goals_estimated = max(0, ft_goals - 1)
+            if row["home_corners"] is not None and row["away_corners"] is not None:
+                match_corners = row["home_corners"] + row["away_corners"]
+                corners["sample"] += 1
+                total_corners += match_corners
+                if match_corners > 8: corners["over_8_5"] += 1
+                if match_corners > 9: corners["over_9_5"] += 1
+                if match_corners > 10: corners["over_10_5"] += 1
             
-            if ht_goals_estimated > 0: ht_over_0_5 += 1
-            if ht_goals_estimated > 1: ht_over_1_5 += 1
+            if row["home_yellow_cards"] is not None and row["away_yellow_cards"] is not None:
+                match_cards = (
+                    row["home_yellow_cards"] + row["away_yellow_cards"] +
+                    (row["home_red_cards"] or 0) + (row["away_red_cards"] or 0)
+                )
+                cards["sample"] += 1
+                total_cards += match_cards
+                if match_cards > 3: cards["over_3_5"] += 1
+                if match_cards > 4: cards["over_4_5"] += 1
+        
+        if corners["sample"]:
+            n = corners["sample"]
+            corners["avg"] = total_corners / n
+            for key in ["over_8_5", "over_9_5", "over_10_5"]:
+                corners[key] = (corners[key] / n) * 100
+        
+        if cards["sample"]:
+            n = cards["sample"]
+            cards["avg"] = total_cards / n
+            for key in ["over_3_5", "over_4_5"]:
+                cards[key] = (cards[key] / n) * 100
         
-        total = len(fixtures)
-        return {
-            "ht_over_0_5": (ht_over_0_5 / total) * 100,
-            "ht_over_1_5": (ht_over_1_5 / total) * 100
-        }
-    
-    def _calculate_advanced_stats(self, fixtures: List[Dict]) -> Tuple[Dict, Dict]:
-        """Calculate corners and cards statistics"""
-        corners = {"sample": 0, "avg": 0, "over_8_5": 0, "over_9_5": 0, "over_10_5": 0}
-        cards = {"sample": 0, "avg": 0, "over_3_5": 0, "over_4_5": 0}
-        
-        # Note: This would require /fixtures/statistics endpoint
-        # For now, return empty stats
         return corners, cards
     
     def _get_form_string(self, fixtures: List[Dict], team_id: int) -> str:
@@ -1281,8 +1911,11 @@ class ChatBot:
         
         return trends
     
-    def _check_analysis_limit(self, user: User) -> bool:
-        """Check if user has remaining analyses for today based on their plan"""
+    def _check_analysis_limit(self, user: User, consume: bool = True) -> bool:
+        """Check if user has remaining analyses for today based on their plan
+        
+        consume=False only checks, without counting an analysis.
+        """
         from datetime import date
         
         try:
@@ -1313,7 +1946,8 @@ class ChatBot:
                 return False
             
             # Increment usage
-            self._usage_cache[cache_key] = current_usage + 1
+            if consume:
+                self._usage_cache[cache_key] = current_usage + 1
             return True
         except Exception as e:
             # If any error, allow the request (fail open)
@@ -0,0 +1,36 @@
+"""
+Conversation Context - each user's last analysed match, for follow-ups
+"e o over 3.5?" or "e com odd 2.10?" right after "Arsenal x Chelsea" has
+no teams to parse. The last full analysis a user received is kept for a
+short time with the markets/odds it was asked with, so a follow-up that
+only changes markets or odds is rendered from it - no parsing of teams,
+no resolution, no fetching.
+"""
+import logging
+from typing import Dict, List, Optional
+
+from ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+CONVERSATION_TTL = 600              # Seconds a follow-up still refers to the last match
+CONVERSATION_SIZE = 2000            # Users kept, least recently active evicted first
+
+
+class ConversationContext(TTLCache):
+    def __init__(self, ttl: int = CONVERSATION_TTL, size: int = CONVERSATION_SIZE):
+        super().__init__(ttl, size)
+
+    def get(self, user_id: int) -> Optional[Dict]:
+        """Last match of a user: {"analysis", "markets", "odds"} (None when missing or expired)"""
+        return super().get(user_id)
+
+    def set(self, user_id: int, analysis: Dict, markets: List[str], odds: List[str]):
+        """Remember the match a user was just answered about"""
+        super().set(user_id, {"analysis": analysis, "markets": markets, "odds": odds})
+
+    def clear(self, user_id: int = None):
+        if user_id is None:
+            super().clear()
+        else:
+            self.pop(user_id)
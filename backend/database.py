@@ -1,5 +1,5 @@
 from sqlmodel import create_engine, SQLModel, Session
-from models import User, Subscription, ChatMessage, AuditLog
+from models import User, Subscription, ChatMessage, AuditLog, FixtureStatistics, StoredFixture, TeamRating, LeagueBaseline, PicksSnapshot, GenerationLock, IdempotencyKey, SettledPick, PickHitRate, OddsPrice, OddsMovement, OddsPage
 import os
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./BetFaro.db")
@@ -0,0 +1,166 @@
+"""
+Fixture Statistics Store - corners and cards for finished matches
+Statistics of a finished match never change, so each fixture id is fetched
+from /fixtures/statistics only once (under a concurrency limit) and kept
+in the database for good. After warmup, a new analysis costs about one
+statistics call per team per new match.
+"""
+import asyncio
+import logging
+from typing import Dict, List, Optional
+from sqlmodel import Session, select
+
+from models import FixtureStatistics
+
+logger = logging.getLogger(__name__)
+
+FINISHED_STATUSES = ["FT", "AET", "PEN"]
+
+# API-Football statistic types we keep in dedicated columns
+STAT_CORNERS = "Corner Kicks"
+STAT_YELLOW = "Yellow Cards"
+STAT_RED = "Red Cards"
+
+
+class FixtureStatsStore:
+    # Max simultaneous /fixtures/statistics requests
+    MAX_CONCURRENCY = 4
+
+    def __init__(self, api=None, engine=None):
+        if api is None:
+            from football_api import FootballAPI
+            api = FootballAPI()
+        if engine is None:
+            from database import engine as default_engine
+            engine = default_engine
+        self.api = api
+        self.engine = engine
+
+        # Stored rows are immutable, so they can be memoized for the process lifetime
+        self._memory: Dict[int, Dict] = {}
+
+    def _row_to_dict(self, row: FixtureStatistics) -> Dict:
+        return {
+            "fixture_id": row.fixture_id,
+            "home_team_id": row.home_team_id,
+            "away_team_id": row.away_team_id,
+            "home_corners": row.home_corners,
+            "away_corners": row.away_corners,
+            "home_yellow_cards": row.home_yellow_cards,
+            "away_yellow_cards": row.away_yellow_cards,
+            "home_red_cards": row.home_red_cards,
+            "away_red_cards": row.away_red_cards,
+        }
+
+    def get_stored(self, fixture_ids: List[int]) -> Dict[int, Dict]:
+        """Return stored statistics for the given fixture ids (missing ids are omitted)"""
+        result = {fid: self._memory[fid] for fid in fixture_ids if fid in self._memory}
+        missing = [fid for fid in fixture_ids if fid not in result]
+        if not missing:
+            return result
+
+        try:
+            with Session(self.engine) as session:
+                rows = session.exec(
+                    select(FixtureStatistics).where(FixtureStatistics.fixture_id.in_(missing))
+                ).all()
+                for row in rows:
+                    data = self._row_to_dict(row)
+                    self._memory[row.fixture_id] = data
+                    result[row.fixture_id] = data
+        except Exception as e:
+            logger.warning(f"[STATS] Could not read stored statistics: {str(e)}")
+
+        return result
+
+    def _parse_statistics(self, fixture: Dict, response: List[Dict]) -> FixtureStatistics:
+        """Convert a /fixtures/statistics response into a storable row"""
+        teams = fixture.get("teams", {})
+        home_id = teams.get("home", {}).get("id")
+        away_id = teams.get("away", {}).get("id")
+
+        by_team = {}
+        for entry in response or []:
+            team_id = entry.get("team", {}).get("id")
+            by_team[team_id] = {
+                s.get("type"): s.get("value") for s in entry.get("statistics", []) if s.get("type")
+            }
+
+        def _count(team_id: Optional[int], stat_type: str) -> Optional[int]:
+            values = by_team.get(team_id)
+            if values is None:
+                return None
+            # API returns null for "zero" on some stats (e.g. Red Cards)
+            try:
+                return int(values.get(stat_type) or 0)
+            except (TypeError, ValueError):
+                return None
+
+        return FixtureStatistics(
+            fixture_id=fixture.get("fixture", {}).get("id"),
+            home_team_id=home_id,
+            away_team_id=away_id,
+            home_corners=_count(home_id, STAT_CORNERS),
+            away_corners=_count(away_id, STAT_CORNERS),
+            home_yellow_cards=_count(home_id, STAT_YELLOW),
+            away_yellow_cards=_count(away_id, STAT_YELLOW),
+            home_red_cards=_count(home_id, STAT_RED),
+            away_red_cards=_count(away_id, STAT_RED),
+            data={str(k): v for k, v in by_team.items()},
+        )
+
+    async def ingest(self, fixtures: List[Dict]) -> Dict[int, Dict]:
+        """Ensure statistics are stored for the given finished fixtures
+
+        Only never-seen fixture ids are fetched. Fixtures with no statistics
+        coverage are stored too (with empty counts) so they aren't retried.
+        Returns {fixture_id: stats} for every finished fixture available.
+        """
+        finished = {}
+        for f in fixtures:
+            fixture_data = f.get("fixture", {})
+            fid = fixture_data.get("id")
+            if fid and fixture_data.get("status", {}).get("short", "") in FINISHED_STATUSES:
+                finished[fid] = f
+
+        if not finished:
+            return {}
+
+        stored = self.get_stored(list(finished.keys()))
+        to_fetch = [f for fid, f in finished.items() if fid not in stored]
+        if not to_fetch:
+            return stored
+
+        logger.info(f"[STATS] Fetching statistics for {len(to_fetch)} new fixtures ({len(stored)} cached)")
+        semaphore = asyncio.Semaphore(self.MAX_CONCURRENCY)
+
+        async def _fetch(fixture: Dict):
+            async with semaphore:
+                response = await self.api.get_fixture_statistics(fixture["fixture"]["id"])
+                return self._parse_statistics(fixture, response)
+
+        results = await asyncio.gather(*[_fetch(f) for f in to_fetch], return_exceptions=True)
+
+        new_rows = []
+        for result in results:
+            if isinstance(result, Exception):
+                # Transient failure - leave it unseen so the next analysis retries
+                logger.warning(f"[STATS] Statistics request failed: {str(result)}")
+                continue
+            new_rows.append(result)
+
+        if new_rows:
+            try:
+                with Session(self.engine) as session:
+                    for row in new_rows:
+                        session.merge(row)
+                    session.commit()
+            except Exception as e:
+                logger.warning(f"[STATS] Could not persist statistics: {str(e)}")
+
+        for row in new_rows:
+            data = self._row_to_dict(row)
+            self._memory[row.fixture_id] = data
+            stored[row.fixture_id] = data
+
+        return stored
@@ -381,17 +381,19 @@ class FootballAPI:
         if cache_key not in self.cache:
             return False
         timestamp = self.cache[cache_key].get("timestamp")
-        return datetime.utcnow().timestamp() - timestamp < self.CACHE_TTL
+        ttl = self.cache[cache_key].get("ttl") or self.CACHE_TTL
+        return datetime.utcnow().timestamp() - timestamp < ttl
     
     def _get_cache(self, cache_key: str) -> Optional[any]:
         if self._is_cache_valid(cache_key):
             return self.cache[cache_key]["data"]
         return None
     
-    def _set_cache(self, cache_key: str, data: any):
+    def _set_cache(self, cache_key: str, data: any, ttl: int = None):
         self.cache[cache_key] = {
             "data": data,
-            "timestamp": datetime.utcnow().timestamp()
+            "timestamp": datetime.utcnow().timestamp(),
+            "ttl": ttl
         }
     
     def _normalize_text(self, text: str) -> str:
@@ -471,8 +473,8 @@ Se não conseguir identificar:
             logger.error(f"LLM translation error: {str(e)}")
             return {"teams": [], "mode": "match", "ambiguous": False}
     
-    async def _make_request(self, endpoint: str, params: Dict = None, max_retries: int = 2) -> Dict:
-        """Make HTTP request with timeout and retry"""
+    async def _make_request(self, endpoint: str, params: Dict = None, max_retries: int = 2, raw: bool = False) -> Dict:
+        """Make HTTP request with timeout and retry (raw=True returns the whole body, e.g. for paging)"""
         if not self.api_key:
             logger.error("APISPORTS_KEY not configured!")
             raise Exception("API key not configured. Please set APISPORTS_KEY in .env")
@@ -494,7 +496,7 @@ Se não conseguir identificar:
                         logger.error(f"API Error: {data['errors']}")
                         raise Exception(f"API Error: {data['errors']}")
                     
-                    return data.get("response", [])
+                    return data if raw else data.get("response", [])
                     
             except httpx.TimeoutException:
                 logger.warning(f"Timeout on attempt {attempt + 1} for {endpoint}")
@@ -565,11 +567,25 @@ Se não conseguir identificar:
         logger.warning(f"[SEARCH] No results for any variation of '{query}'")
         return []
     
-    async def get_team_fixtures(self, team_id: int, last: int = 10) -> List[Dict]:
-        """Get team fixtures with scores"""
+    def has_team_fixtures(self, team_id: int, last: int = 10) -> bool:
+        """Whether get_team_fixtures would be served from the cache"""
+        return self._is_cache_valid(f"fixtures_{team_id}_{last}")
+
+    def cached_team_fixtures(self, team_id: int, last: int = 10) -> Optional[List[Dict]]:
+        """What get_team_fixtures would serve from the cache (None when it would fetch)"""
+        return self._get_cache(f"fixtures_{team_id}_{last}")
+
+    async def get_team_fixtures(self, team_id: int, last: int = 10, cache_ttl: int = None) -> List[Dict]:
+        """Get team fixtures with scores
+        
+        cache_ttl keeps the result (fetched or already cached) longer than
+        the default TTL - a team's history can't change before it plays.
+        """
         cache_key = f"fixtures_{team_id}_{last}"
         cached = self._get_cache(cache_key)
         if cached:
+            if cache_ttl:
+                self._set_cache(cache_key, cached, cache_ttl)
             return cached
         
         try:
@@ -582,13 +598,28 @@ Se não conseguir identificar:
                 if fixture.get("goals") and fixture["goals"].get("home") is not None and fixture["goals"].get("away") is not None:
                     scored_fixtures.append(fixture)
             
-            self._set_cache(cache_key, scored_fixtures)
+            self._set_cache(cache_key, scored_fixtures, cache_ttl)
             return scored_fixtures
             
         except Exception as e:
             logger.error(f"Error getting fixtures: {str(e)}")
             return []
-    
+
+    async def get_fixture_statistics(self, fixture_id: int) -> List[Dict]:
+        """Get match statistics (corners, cards, shots...) for one fixture - one entry per team"""
+        return await self._make_request("fixtures/statistics", {"fixture": fixture_id})
+
+    async def get_fixtures_by_ids(self, fixture_ids: List[int]) -> List[Dict]:
+        """Get several fixtures in one request (API limit: 20 ids)"""
+        return await self._make_request("fixtures", {"ids": "-".join(str(fid) for fid in fixture_ids[:20])})
+
+    async def get_odds_page(self, date_str: str, page: int = 1, bookmaker: int = None) -> Dict:
+        """Get one page of pre-match odds for every fixture of a date (body with "paging")"""
+        params = {"date": date_str, "page": page}
+        if bookmaker:
+            params["bookmaker"] = bookmaker
+        return await self._make_request("odds", params, raw=True)
+
     async def resolve_team(self, team_name: str, context_fixtures: List[Dict] = None) -> Optional[Dict]:
         """Resolve team name to team info with fuzzy matching and context awareness"""
         original_name = team_name
@@ -0,0 +1,212 @@
+"""
+Idempotency Store - retried requests replay the first response
+Clients on flaky connections retry a request they never got the answer
+to. With an Idempotency-Key header the first response is kept for a short
+time and a retry with the same key gets it back without running the
+request again (no second analysis, no duplicate messages, no second
+charge on the daily limit). A request that fails keeps nothing, so its
+retry runs again.
+
+Keys live in the database, so a retry routed to another worker is
+replayed too. The first request claims its key with a row (the way the
+picks generation lock is taken); a retry that arrives while it is still
+running awaits it - directly on the same worker, by polling the row on
+another. A claim whose worker died expires after IDEMPOTENCY_LEASE and
+is taken over.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from sqlalchemy import delete, func, update
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, select
+
+from models import IdempotencyKey
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_TTL = 600               # Seconds a response is replayed for its key
+IDEMPOTENCY_LEASE = 300             # Seconds a running first request holds its key
+IDEMPOTENCY_POLL_INTERVAL = 0.5     # Seconds between checks of another worker's claim
+IDEMPOTENCY_PURGE_INTERVAL = 300    # Seconds between deletions of expired keys
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+
+
+class IdempotencyConflict(Exception):
+    """Same key reused for a different request"""
+
+
+def request_fingerprint(payload: Any) -> str:
+    """Hash of what a request asks for (a key must always ask the same)"""
+    body = json.dumps(payload, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(body.encode()).hexdigest()
+
+
+class IdempotencyStore:
+    def __init__(self, engine=None, ttl: int = IDEMPOTENCY_TTL, lease: int = IDEMPOTENCY_LEASE):
+        if engine is None:
+            from database import engine as default_engine
+            engine = default_engine
+        self.engine = engine
+        self.ttl = ttl
+        self.lease = lease
+
+        # Identifies this worker as the owner of its claims
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+        # (scope, key) -> future of a first request running on this worker
+        self._running: Dict[Tuple[str, str], asyncio.Future] = {}
+        self._purged_at: Optional[datetime] = None
+        self.replays = 0
+
+    def _claim(self, scope: str, key: str, fingerprint: str) -> Tuple[bool, Optional[IdempotencyKey]]:
+        """(claimed, row) - claimed is True when this request must run"""
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=self.lease)
+        try:
+            with Session(self.engine) as session:
+                session.add(IdempotencyKey(scope=scope, key=key, fingerprint=fingerprint, owner=self.owner, expires_at=expires_at))
+                session.commit()
+                return True, None
+        except IntegrityError:
+            pass
+
+        # Key row exists: take it over only if expired (or its worker died)
+        with Session(self.engine) as session:
+            result = session.exec(
+                update(IdempotencyKey)
+                .where(IdempotencyKey.scope == scope)
+                .where(IdempotencyKey.key == key)
+                .where(IdempotencyKey.expires_at < now)
+                .values(fingerprint=fingerprint, owner=self.owner, response=None, completed_at=None, expires_at=expires_at)
+            )
+            session.commit()
+            if result.rowcount == 1:
+                return True, None
+            row = session.exec(
+                select(IdempotencyKey).where(IdempotencyKey.scope == scope).where(IdempotencyKey.key == key)
+            ).first()
+            return False, row
+
+    def _complete(self, scope: str, key: str, response: Any):
+        now = datetime.utcnow()
+        # JSON round-trip so datetimes and other values are stored as plain JSON
+        payload = json.loads(json.dumps(response, default=str))
+        with Session(self.engine) as session:
+            session.exec(
+                update(IdempotencyKey)
+                .where(IdempotencyKey.scope == scope)
+                .where(IdempotencyKey.key == key)
+                .where(IdempotencyKey.owner == self.owner)
+                .values(response=payload, completed_at=now, expires_at=now + timedelta(seconds=self.ttl))
+            )
+            session.commit()
+
+    def _release(self, scope: str, key: str):
+        """Forget a claim whose request failed (its retry runs again)"""
+        try:
+            with Session(self.engine) as session:
+                session.exec(
+                    delete(IdempotencyKey)
+                    .where(IdempotencyKey.scope == scope)
+                    .where(IdempotencyKey.key == key)
+                    .where(IdempotencyKey.owner == self.owner)
+                    .where(IdempotencyKey.completed_at.is_(None))
+                )
+                session.commit()
+        except Exception as e:
+            logger.warning(f"[IDEMPOTENCY] Could not release key {key[:16]}: {str(e)}")
+
+    def _purge(self):
+        """Delete expired keys (at most every IDEMPOTENCY_PURGE_INTERVAL)"""
+        now = datetime.utcnow()
+        if self._purged_at and (now - self._purged_at).total_seconds() < IDEMPOTENCY_PURGE_INTERVAL:
+            return
+        self._purged_at = now
+        try:
+            with Session(self.engine) as session:
+                session.exec(delete(IdempotencyKey).where(IdempotencyKey.expires_at < now))
+                session.commit()
+        except Exception as e:
+            logger.warning(f"[IDEMPOTENCY] Could not purge expired keys: {str(e)}")
+
+    async def run(self, scope: str, key: str, fingerprint: str, produce: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """(response, replayed) - produce() runs only for the first request of a key
+
+        Raises IdempotencyConflict when the key was used for a different
+        request; errors of produce() reach the waiters on this worker and
+        forget the key.
+        """
+        entry_key = (scope, key)
+        self._purge()
+        while True:
+            claimed, row = self._claim(scope, key, fingerprint)
+            if claimed:
+                break
+            if row is None:
+                continue  # Released between the insert and the read - claim again
+            if row.fingerprint != fingerprint:
+                raise IdempotencyConflict(key)
+            if row.completed_at is not None:
+                self.replays += 1
+                logger.info(f"[IDEMPOTENCY] {scope} replay for key {key[:16]}")
+                return row.response, True
+
+            future = self._running.get(entry_key)
+            if future is None:
+                # Running on another worker: wait for its row to complete or go away
+                await asyncio.sleep(IDEMPOTENCY_POLL_INTERVAL)
+                continue
+            try:
+                # shield: a retry that disconnects must not cancel the first request
+                response = await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if future.cancelled() and not asyncio.current_task().cancelling():
+                    continue  # The first request was cancelled - this one runs it
+                raise
+            self.replays += 1
+            logger.info(f"[IDEMPOTENCY] {scope} replay for key {key[:16]}")
+            return response, True
+
+        future = asyncio.get_running_loop().create_future()
+        self._running[entry_key] = future
+        try:
+            response = await produce()
+        except BaseException as e:
+            self._release(scope, key)
+            if isinstance(e, asyncio.CancelledError):
+                future.cancel()
+            elif not future.done():
+                future.set_exception(e)
+                # Retrieved here so a key nobody waited on doesn't log it
+                future.exception()
+            raise
+        finally:
+            if self._running.get(entry_key) is future:
+                del self._running[entry_key]
+        try:
+            self._complete(scope, key, response)
+        except Exception as e:
+            # The response stands; only its replay is lost
+            logger.warning(f"[IDEMPOTENCY] Could not store response for key {key[:16]}: {str(e)}")
+            self._release(scope, key)
+        future.set_result(response)
+        return response, False
+
+    def clear(self):
+        with Session(self.engine) as session:
+            session.exec(delete(IdempotencyKey))
+            session.commit()
+
+    def __len__(self) -> int:
+        with Session(self.engine) as session:
+            return session.exec(select(func.count()).select_from(IdempotencyKey)).one()
+
+
+idempotency_store = IdempotencyStore()
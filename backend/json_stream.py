@@ -0,0 +1,125 @@
+"""
+JSON Stream - incremental decoding of large API payloads
+Decodes the items of one top-level array field (e.g. API-Sports'
+"response") as chunks arrive, so callers can filter each item and drop
+it immediately instead of materializing the whole document. The fields
+sent before the array (API-Sports' "errors") are kept and can be read.
+"""
+import json
+from typing import Any, List
+
+WHITESPACE = " \t\n\r"
+HEAD_LIMIT = 65536  # Characters kept from before the array
+
+
+class ArrayItemDecoder:
+    """Feed text chunks, get back the fully received items of `key`'s array"""
+
+    def __init__(self, key: str = "response"):
+        self._marker = f'"{key}"'
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._head = ""
+        self._state = "seek"  # seek -> items -> done
+
+    @property
+    def done(self) -> bool:
+        return self._state == "done"
+
+    def feed(self, chunk: str) -> List[Any]:
+        """Add a chunk of text and return the items completed by it"""
+        if self._state == "done":
+            return []
+        self._buffer += chunk
+        items = []
+
+        if self._state == "seek" and not self._seek():
+            return items
+
+        pos = 0
+        buffer = self._buffer
+        while True:
+            while pos < len(buffer) and buffer[pos] in WHITESPACE + ",":
+                pos += 1
+            if pos >= len(buffer):
+                break
+            if buffer[pos] == "]":
+                self._state = "done"
+                pos += 1
+                break
+            try:
+                item, pos = self._decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                # Item not fully received yet
+                break
+            items.append(item)
+
+        self._buffer = "" if self._state == "done" else buffer[pos:]
+        return items
+
+    def _skip(self, buffer: str, end: int):
+        """Drop buffer[:end], keeping it as head text"""
+        if len(self._head) < HEAD_LIMIT:
+            self._head += buffer[:end][:HEAD_LIMIT - len(self._head)]
+        self._buffer = buffer[end:]
+
+    def _seek(self) -> bool:
+        """Skip ahead to the first item of the array (False if more data is needed)"""
+        buffer = self._buffer
+        start = 0
+        while True:
+            idx = buffer.find(self._marker, start)
+            if idx == -1:
+                # Keep a tail in case the marker is split across chunks
+                self._skip(buffer, max(len(buffer) - len(self._marker), 0))
+                return False
+            pos = idx + len(self._marker)
+            while pos < len(buffer) and buffer[pos] in WHITESPACE:
+                pos += 1
+            if pos >= len(buffer):
+                self._skip(buffer, idx)
+                return False
+            if buffer[pos] != ":":
+                # The key text appeared as a value, keep looking
+                start = pos
+                continue
+            pos += 1
+            while pos < len(buffer) and buffer[pos] in WHITESPACE:
+                pos += 1
+            if pos >= len(buffer):
+                self._skip(buffer, idx)
+                return False
+            if buffer[pos] != "[":
+                start = pos
+                continue
+            self._skip(buffer, idx)
+            self._buffer = buffer[pos + 1:]
+            self._state = "items"
+            return True
+
+    def head_value(self, key: str) -> Any:
+        """Value of a field sent before the array (None when absent or cut off)"""
+        marker = f'"{key}"'
+        start = 0
+        while True:
+            idx = self._head.find(marker, start)
+            if idx == -1:
+                return None
+            pos = idx + len(marker)
+            while pos < len(self._head) and self._head[pos] in WHITESPACE:
+                pos += 1
+            start = pos
+            if pos >= len(self._head) or self._head[pos] != ":":
+                continue
+            pos += 1
+            while pos < len(self._head) and self._head[pos] in WHITESPACE:
+                pos += 1
+            try:
+                return self._decoder.raw_decode(self._head, pos)[0]
+            except json.JSONDecodeError:
+                continue
+
+    def close(self):
+        """Check the array was fully received"""
+        if self._state != "done":
+            raise ValueError("Truncated JSON payload: array not closed")
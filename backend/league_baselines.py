@@ -0,0 +1,162 @@
+"""
+League Baselines - per league/season base rates
+Running totals (goals, over/BTTS counts, results) are kept per league and
+season and updated incrementally as finished fixtures land in the local
+match history. Picks and chat read them from an in-memory lookup to judge
+team rates against what is normal for that league.
+"""
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, select
+
+from match_history import match_history
+from models import LeagueBaseline
+
+logger = logging.getLogger(__name__)
+
+MIN_MATCHES = 20   # Below this a league/season baseline is too noisy to use
+CACHE_TTL = 300    # Reload totals written by other workers every 5 minutes
+
+COUNTERS = ["matches", "home_goals", "away_goals", "over_1_5", "over_2_5", "btts", "home_wins", "draws", "away_wins"]
+
+
+def _counts(fixture: Dict) -> Dict[str, int]:
+    """Counter increments contributed by one finished fixture"""
+    home_goals = fixture["home_goals"]
+    away_goals = fixture["away_goals"]
+    total = home_goals + away_goals
+    return {
+        "matches": 1,
+        "home_goals": home_goals,
+        "away_goals": away_goals,
+        "over_1_5": int(total > 1),
+        "over_2_5": int(total > 2),
+        "btts": int(home_goals > 0 and away_goals > 0),
+        "home_wins": int(home_goals > away_goals),
+        "draws": int(home_goals == away_goals),
+        "away_wins": int(home_goals < away_goals),
+    }
+
+
+def _rates(totals: Dict[str, int]) -> Dict:
+    """Base rates (%) and averages from running totals"""
+    matches = totals["matches"]
+    return {
+        "matches": matches,
+        "avg_goals": round((totals["home_goals"] + totals["away_goals"]) / matches, 2),
+        "avg_home_goals": round(totals["home_goals"] / matches, 2),
+        "avg_away_goals": round(totals["away_goals"] / matches, 2),
+        "over_1_5_rate": round(totals["over_1_5"] / matches * 100, 1),
+        "over_2_5_rate": round(totals["over_2_5"] / matches * 100, 1),
+        "btts_rate": round(totals["btts"] / matches * 100, 1),
+        "home_win_rate": round(totals["home_wins"] / matches * 100, 1),
+        "draw_rate": round(totals["draws"] / matches * 100, 1),
+        "away_win_rate": round(totals["away_wins"] / matches * 100, 1),
+        # Home win rate minus away win rate (percentage points)
+        "home_advantage": round((totals["home_wins"] - totals["away_wins"]) / matches * 100, 1),
+    }
+
+
+class LeagueBaselines:
+    def __init__(self, engine=None):
+        if engine is None:
+            from database import engine as default_engine
+            engine = default_engine
+        self.engine = engine
+
+        # (league_id, season) -> running totals (read cache)
+        self._totals: Dict[Tuple[int, int], Dict[str, int]] = {}
+        self._loaded_at = 0.0
+
+    def update(self, fixtures: List[Dict]):
+        """Add newly stored finished fixtures to the running totals
+
+        Only the league/season rows touched by the batch are read and
+        written - aggregates are never recomputed from scratch.
+        """
+        increments: Dict[Tuple[int, int], Dict[str, int]] = {}
+        for f in fixtures:
+            if not f.get("league_id"):
+                continue
+            key = (f["league_id"], f.get("season") or 0)
+            acc = increments.setdefault(key, dict.fromkeys(COUNTERS, 0))
+            for name, value in _counts(f).items():
+                acc[name] += value
+
+        if not increments:
+            return
+
+        for league_id, season in increments:
+            try:
+                with Session(self.engine) as session:
+                    if session.get(LeagueBaseline, (league_id, season)) is None:
+                        session.add(LeagueBaseline(league_id=league_id, season=season))
+                        session.commit()
+            except IntegrityError:
+                pass  # Created by another worker meanwhile
+
+        # Increments in the database, so concurrent workers' batches add up
+        with Session(self.engine) as session:
+            now = datetime.utcnow()
+            for (league_id, season), acc in increments.items():
+                session.exec(
+                    update(LeagueBaseline)
+                    .where(LeagueBaseline.league_id == league_id)
+                    .where(LeagueBaseline.season == season)
+                    .values(updated_at=now, **{name: getattr(LeagueBaseline, name) + value for name, value in acc.items()})
+                )
+            session.commit()
+
+            for league_id, season in increments:
+                row = session.get(LeagueBaseline, (league_id, season))
+                self._totals[(league_id, season)] = {name: getattr(row, name) for name in COUNTERS}
+
+        logger.info(f"[BASELINES] Applied {len(fixtures)} fixtures to {len(increments)} league/seasons")
+
+    def _refresh(self):
+        """Reload all totals if the read cache is stale"""
+        now = datetime.utcnow().timestamp()
+        if now - self._loaded_at < CACHE_TTL:
+            return
+        try:
+            with Session(self.engine) as session:
+                rows = session.exec(select(LeagueBaseline)).all()
+                self._totals = {
+                    (row.league_id, row.season): {name: getattr(row, name) for name in COUNTERS}
+                    for row in rows
+                }
+            self._loaded_at = now
+        except Exception as e:
+            logger.warning(f"[BASELINES] Could not load baselines: {str(e)}")
+
+    def get(self, league_id: int, season: int = None) -> Optional[Dict]:
+        """Base rates of a league (None if there is not enough data)
+
+        Uses the requested season when it has enough matches, otherwise
+        the league's seasons pooled together.
+        """
+        if not league_id:
+            return None
+        self._refresh()
+
+        if season is not None:
+            totals = self._totals.get((league_id, season))
+            if totals and totals["matches"] >= MIN_MATCHES:
+                return {"league_id": league_id, "season": season, **_rates(totals)}
+
+        pooled = dict.fromkeys(COUNTERS, 0)
+        for (lid, _), totals in self._totals.items():
+            if lid == league_id:
+                for name in COUNTERS:
+                    pooled[name] += totals[name]
+        if pooled["matches"] < MIN_MATCHES:
+            return None
+        return {"league_id": league_id, "season": None, **_rates(pooled)}
+
+
+# Singleton instance - baselines follow the local match history
+league_baselines = LeagueBaselines()
+match_history.subscribe(league_baselines.update)
@@ -1,21 +1,36 @@
 from fastapi import FastAPI, Depends, HTTPException, status, Header
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from fastapi.security import HTTPBearer
 from sqlmodel import Session, select
 from datetime import datetime, timedelta
 import os
+import asyncio
+import hashlib
+import json
 import logging
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
 load_dotenv(dotenv_path="../.env")
 
-from database import create_db_and_tables, get_session
+from database import create_db_and_tables, get_session, engine
 from models import User, Subscription, ChatMessage, AuditLog
-from schemas import UserCreate, UserLogin, UserResponse, Token, ChatMessageRequest, ChatResponse, AdminGrantRequest, AdminRevokeRequest, SubscriptionResponse
+from schemas import UserCreate, UserLogin, UserResponse, Token, ChatMessageRequest, ChatResponse, BatchAnalysisRequest, AdminGrantRequest, AdminRevokeRequest, SubscriptionResponse
 from auth import get_current_user, get_admin_user, verify_password, get_password_hash, create_access_token, ACCESS_TOKEN_EXPIRE_MINUTES
 from chatbot import ChatBot
 from picks_engine import picks_engine
+from picks_store import picks_store
+from picks_feed import picks_feed, PICKS_FEED_KEEPALIVE
+from settlement import pick_settlement, SETTLEMENT_LOCK_TTL
+from match_history import match_history
+from backtest import run_backtest
+from ratings import rating_engine
+from scanner import odds_scanner
+from odds_store import odds_store
+from warmup import AnalysisWarmup
+from idempotency import idempotency_store, request_fingerprint, IdempotencyConflict, IDEMPOTENCY_KEY_MAX_LENGTH
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -31,11 +46,28 @@ app.add_middleware(
     allow_origins=ALLOWED_ORIGINS,
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS", "PATCH"],
-    allow_headers=["Authorization", "Content-Type", "X-Internal-Key", "X-Admin-Key"],
+    allow_headers=["Authorization", "Content-Type", "X-Internal-Key", "X-Admin-Key", "Idempotency-Key"],
+    expose_headers=["Idempotent-Replayed"],
 )
 
 # Initialize chatbot
 chatbot = ChatBot()
+analysis_warmup = AnalysisWarmup(chatbot)
+
+# Shown instead of a generic error when a chat analysis fails
+CHAT_ERROR_RESPONSE = (
+    "⚠️ A API está instável agora. Tente novamente em alguns segundos.\n\n"
+    "Se o problema persistir, verifique:\n"
+    "  • Se os nomes dos times estão corretos\n"
+    "  • Use o formato: Time A x Time B\n\n"
+    "💡 Exemplos: Arsenal x Chelsea, Benfica vs Porto"
+)
+
+PICKS_ERROR_DETAIL = "Não consegui atualizar os picks agora. Tente novamente em instantes."
+ANALYSIS_ERROR_DETAIL = "Não consegui gerar a análise agora. Tente novamente em instantes."
+ANALYSIS_LIMIT_DETAIL = "Você atingiu o limite diário de análises do seu plano. Faça upgrade para continuar analisando."
+BATCH_MAX_MATCHES = 10  # Matchups per batch analysis request
+IDEMPOTENCY_CONFLICT_DETAIL = "Esta Idempotency-Key já foi usada em outra requisição."
 
 # Environment variables
 ADMIN_API_KEY = os.getenv("ADMIN_API_KEY")
@@ -46,6 +78,13 @@ ELITE_URL = os.getenv("ELITE_URL")
 @app.on_event("startup")
 async def startup_event():
     create_db_and_tables()
+    if os.getenv("SETTLEMENT_ENABLED", "true").lower() == "true":
+        asyncio.create_task(pick_settlement.run_periodically())
+    if os.getenv("ODDS_REFRESH_ENABLED", "true").lower() == "true":
+        asyncio.create_task(odds_store.run_periodically())
+    asyncio.create_task(picks_feed.run_periodically())
+    if os.getenv("WARMUP_ENABLED", "true").lower() == "true":
+        asyncio.create_task(analysis_warmup.run_periodically())
 
 # Utility functions
 def check_admin_api_key(x_admin_key: str = Header(None)):
@@ -186,36 +225,69 @@ async def get_subscription_status(current_user: User = Depends(get_current_user)
         "status": subscription.status
     }
 
+# Idempotency-Key support (chat, picks)
+def check_idempotency_key(idempotency_key: str = None):
+    """Reject malformed Idempotency-Key headers"""
+    if idempotency_key is not None and not 0 < len(idempotency_key) <= IDEMPOTENCY_KEY_MAX_LENGTH:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Idempotency-Key deve ter entre 1 e {IDEMPOTENCY_KEY_MAX_LENGTH} caracteres."
+        )
+
+async def idempotent(scope: str, idempotency_key: str, payload: dict, produce):
+    """(response, replayed) - with a key, produce() runs once and retries replay it"""
+    if not idempotency_key:
+        return await produce(), False
+    try:
+        return await idempotency_store.run(scope, idempotency_key, request_fingerprint(payload), produce)
+    except IdempotencyConflict:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=IDEMPOTENCY_CONFLICT_DETAIL
+        )
+
 # Chat endpoints
 @app.post("/api/chat", response_model=ChatResponse)
-async def chat(message: ChatMessageRequest, current_user: User = Depends(get_current_user), session: Session = Depends(get_session)):
-    """Process chat message"""
+async def chat(
+    message: ChatMessageRequest,
+    response: Response,
+    idempotency_key: str = Header(None),
+    current_user: User = Depends(get_current_user),
+    session: Session = Depends(get_session)
+):
+    """Process chat message
+    
+    With an Idempotency-Key header, a retry of the same message replays
+    the first response: no new analysis, no duplicate messages and no
+    second charge on the daily limit.
+    """
     # Check subscription
     if not check_user_subscription(current_user):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Active subscription required to use chat"
         )
+    check_idempotency_key(idempotency_key)
     
-    # Save user message
-    user_message = ChatMessage(
-        user_id=current_user.id,
-        role="user",
-        content=message.content,
-        extra_data=None,
-        created_at=datetime.utcnow()
-    )
-    session.add(user_message)
-    
-    # Process message
-    try:
-        response = await chatbot.process_message(message.content, current_user)
+    async def process() -> dict:
+        # Save user message
+        user_message = ChatMessage(
+            user_id=current_user.id,
+            role="user",
+            content=message.content,
+            extra_data=None,
+            created_at=datetime.utcnow()
+        )
+        session.add(user_message)
+        
+        # Process message
+        reply = await chatbot.process_message(message.content, current_user)
         
         # Save bot response
         bot_message = ChatMessage(
             user_id=current_user.id,
             role="assistant",
-            content=response,
+            content=reply,
             extra_data=None,
             created_at=datetime.utcnow()
         )
@@ -223,29 +295,240 @@ async def chat(message: ChatMessageRequest, current_user: User = Depends(get_cur
         session.commit()
         
         logger.info(f"Chat processed for user {current_user.email}")
+        return {"response": reply, "timestamp": datetime.utcnow()}
+    
+    try:
+        result, replayed = await idempotent(f"chat:{current_user.id}", idempotency_key, {"content": message.content}, process)
+        if replayed:
+            response.headers["Idempotent-Replayed"] = "true"
+        return ChatResponse(**result)
         
-        return ChatResponse(
-            response=response,
-            timestamp=datetime.utcnow()
-        )
-        
+    except HTTPException:
+        raise
     except Exception as e:
         import traceback
         error_trace = traceback.format_exc()
         logger.error(f"Chat processing error: {str(e)}\n{error_trace}")
         
         # Return friendly error message instead of generic error
-        error_response = "⚠️ A API está instável agora. Tente novamente em alguns segundos.\n\n"
-        error_response += "Se o problema persistir, verifique:\n"
-        error_response += "  • Se os nomes dos times estão corretos\n"
-        error_response += "  • Use o formato: Time A x Time B\n\n"
-        error_response += "💡 Exemplos: Arsenal x Chelsea, Benfica vs Porto"
-        
         return ChatResponse(
-            response=error_response,
+            response=CHAT_ERROR_RESPONSE,
             timestamp=datetime.utcnow()
         )
 
+def sse_event(event: str, data: dict) -> str:
+    """Format one server-sent event"""
+    return f"event: {event}\ndata: {json.dumps(data, default=str, ensure_ascii=False)}\n\n"
+
+# Producers whose client disconnected, referenced until they finish
+detached_producers: set = set()
+
+async def stream_from(produce):
+    """Yield what `produce(emit)` emits, as it emits it
+    
+    produce runs as a task. If the client disconnects only the sending
+    stops: the task finishes in the background, so an analysis already
+    charged to the daily limit is still saved (and replayed to a retry).
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+    listening = True
+    
+    async def emit(item):
+        if listening:
+            await queue.put(item)
+    
+    async def run():
+        try:
+            await produce(emit)
+        finally:
+            await queue.put(None)
+    
+    task = asyncio.create_task(run())
+    try:
+        while True:
+            item = await queue.get()
+            if item is None:
+                break
+            yield item
+    finally:
+        listening = False
+        if not task.done():
+            detached_producers.add(task)
+            task.add_done_callback(detached_producers.discard)
+
+@app.post("/api/chat/stream")
+async def chat_stream(message: ChatMessageRequest, idempotency_key: str = Header(None), current_user: User = Depends(get_current_user)):
+    """Process chat message, streaming each analysis stage as server-sent events
+    
+    Events: parsed, teams, resolved, form, stats, markets (as each stage
+    finishes), then done with the full response - persisted like /api/chat -
+    or error. A retry with the same Idempotency-Key (shared with /api/chat)
+    gets only the done event of the first response.
+    """
+    if not check_user_subscription(current_user):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Active subscription required to use chat"
+        )
+    check_idempotency_key(idempotency_key)
+    
+    user_created_at = datetime.utcnow()
+    
+    async def analyze(emit):
+        async def progress(event: str, data: dict):
+            await emit(sse_event(event, data))
+        
+        async def process() -> dict:
+            response = await chatbot.process_message(message.content, current_user, progress)
+            
+            # Persist both messages, as /api/chat does
+            with Session(engine) as session:
+                session.add(ChatMessage(user_id=current_user.id, role="user", content=message.content, extra_data=None, created_at=user_created_at))
+                session.add(ChatMessage(user_id=current_user.id, role="assistant", content=response, extra_data=None, created_at=datetime.utcnow()))
+                session.commit()
+            logger.info(f"Chat streamed for user {current_user.email}")
+            return {"response": response, "timestamp": datetime.utcnow()}
+        
+        try:
+            result, _ = await idempotent(f"chat:{current_user.id}", idempotency_key, {"content": message.content}, process)
+            await emit(sse_event("done", result))
+        except HTTPException as e:
+            await emit(sse_event("error", {"response": e.detail, "timestamp": datetime.utcnow()}))
+        except Exception as e:
+            logger.error(f"Chat streaming error: {str(e)}")
+            await emit(sse_event("error", {"response": CHAT_ERROR_RESPONSE, "timestamp": datetime.utcnow()}))
+    
+    return StreamingResponse(
+        stream_from(analyze),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def analysis_etag(analysis: dict) -> str:
+    """Strong ETag of a structured analysis
+    
+    The analysis is fully derived from the two teams' fixture samples (their
+    ids are part of it) and the local model state, so the tag only changes
+    when a new fixture, a model refit or a new price changes the content.
+    """
+    body = json.dumps(jsonable_encoder(analysis), sort_keys=True, ensure_ascii=False)
+    return f'"{hashlib.sha256(body.encode()).hexdigest()[:32]}"'
+
+def etag_matches(etag: str, if_none_match: str = None) -> bool:
+    """If-None-Match check (weak comparison, as RFC 9110 asks for GET)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return etag in [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+
+@app.get("/api/analysis/match")
+async def get_match_analysis(
+    home: str,
+    away: str,
+    if_none_match: str = Header(None),
+    current_user: User = Depends(get_current_user)
+):
+    """Structured match analysis (stats, probabilities, picks) as JSON
+    
+    Carries a strong ETag; a request whose If-None-Match still matches gets
+    304 Not Modified and doesn't count against the daily analysis limit.
+    """
+    if not check_user_subscription(current_user):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Active subscription required to use chat"
+        )
+    if not chatbot._check_analysis_limit(current_user, consume=False):
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=ANALYSIS_LIMIT_DETAIL
+        )
+    
+    try:
+        analysis = await chatbot.match_analysis(home, away)
+    except Exception as e:
+        logger.error(f"Match analysis error: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=ANALYSIS_ERROR_DETAIL
+        )
+    
+    if analysis.get("error") == "team_not_found":
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Time '{analysis['team']}' não encontrado. Verifique a digitação."
+        )
+    if analysis.get("error") == "insufficient_data":
+        problems = [
+            f"{analysis[side]['name']}: {', '.join(errors)}"
+            for side, errors in analysis["errors"].items() if errors
+        ]
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Dados insuficientes para análise. {'; '.join(problems)}"
+        )
+    
+    etag = analysis_etag(analysis)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(etag, if_none_match):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    chatbot._check_analysis_limit(current_user)
+    return JSONResponse(jsonable_encoder(analysis), headers=headers)
+
+@app.post("/api/analysis/batch")
+async def batch_match_analysis(request: BatchAnalysisRequest, current_user: User = Depends(get_current_user)):
+    """Structured analyses of several matches at once, plus the accumulator
+    
+    Matches come from `matches` and/or a pasted `slip`. Teams shared by
+    several matches are resolved and fetched once. Each analysis returned
+    counts against the daily limit; those past it come back as errors.
+    """
+    if not check_user_subscription(current_user):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Active subscription required to use chat"
+        )
+    
+    matchups = [(match.home, match.away) for match in request.matches]
+    if request.slip:
+        matchups += chatbot._parse_slip(request.slip)
+    if not matchups:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Nenhum jogo encontrado. Envie os jogos no formato 'Time A x Time B'."
+        )
+    if len(matchups) > BATCH_MAX_MATCHES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Máximo de {BATCH_MAX_MATCHES} jogos por análise múltipla."
+        )
+    if not chatbot._check_analysis_limit(current_user, consume=False):
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=ANALYSIS_LIMIT_DETAIL
+        )
+    
+    try:
+        analyses = await chatbot.match_analyses(matchups)
+    except Exception as e:
+        logger.error(f"Batch analysis error: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=ANALYSIS_ERROR_DETAIL
+        )
+    
+    for i, analysis in enumerate(analyses):
+        if not analysis.get("error") and not chatbot._check_analysis_limit(current_user):
+            analyses[i] = {"error": "limit_reached", "home": analysis["home"], "away": analysis["away"]}
+    
+    return jsonable_encoder({
+        "matches": [{"home": home, "away": away} for home, away in matchups],
+        "analyses": analyses,
+        "accumulator": chatbot.accumulator(analyses),
+    })
+
 @app.get("/api/chat/history")
 async def get_chat_history(current_user: User = Depends(get_current_user), session: Session = Depends(get_session), limit: int = 50):
     """Get chat history"""
@@ -300,7 +583,7 @@ async def get_plans():
                 "price": "R$100/mês", 
                 "features": [
                     "Todos os recursos Pro",
-                    "Scanner de odds (em breve)",
+                    "Scanner de odds",
                     "Análises premium",
                     "Suporte prioritário"
                 ],
@@ -632,15 +915,8 @@ async def update_user_subscription(
     }
 
 # Picks endpoints (Elite only)
-@app.get("/api/picks")
-async def get_picks(
-    range: str = "both",
-    refresh: bool = False,
-    current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session)
-):
-    """Get daily picks - Elite only feature"""
-    # Check subscription
+def require_elite(current_user: User, session: Session, detail: str):
+    """Raise 403 unless the user has an active Elite subscription"""
     subscription = session.exec(
         select(Subscription).where(
             Subscription.user_id == current_user.id,
@@ -659,22 +935,90 @@ async def get_picks(
     if subscription.plan.lower() != "elite":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
-            detail="Picks Diários é exclusivo do plano Elite. Faça upgrade para receber as melhores oportunidades automaticamente."
+            detail=detail
         )
+
+async def load_picks(range: str, refresh: bool, days: int = None, on_result=None) -> dict:
+    """Daily or window picks (on_result streams each analyzed fixture)"""
+    if range == "window":
+        return await picks_engine.get_window_picks(days=days, force_refresh=refresh, on_result=on_result)
+    return await picks_engine.get_daily_picks(range_type=range, force_refresh=refresh, on_result=on_result)
+
+def stream_picks(range: str, refresh: bool, days: int = None) -> StreamingResponse:
+    """Picks as NDJSON
+    
+    One {"type": "pick"} line per fixture as soon as its analysis finishes
+    (all at once when served from cache), then a closing {"type": "meta"}
+    line with the final ranking (fixture ids, best first) and the meta.
+    """
+    def line(data: dict) -> str:
+        return json.dumps(data, default=str, ensure_ascii=False) + "\n"
+    
+    async def generate(emit):
+        streamed = set()
+        
+        async def on_result(result: dict):
+            streamed.add(result.get("fixture_id"))
+            await emit(line({"type": "pick", "data": result}))
+        
+        try:
+            result = await load_picks(range, refresh, days, on_result)
+            for pick in result.get("picks", []):
+                if pick.get("fixture_id") not in streamed:
+                    await emit(line({"type": "pick", "data": pick}))
+            closing = {key: value for key, value in result.items() if key != "picks"}
+            await emit(line({
+                "type": "meta",
+                "ranking": [pick.get("fixture_id") for pick in result.get("picks", [])],
+                **closing
+            }))
+        except Exception as e:
+            logger.error(f"Error streaming picks: {str(e)}")
+            await emit(line({"type": "error", "detail": PICKS_ERROR_DETAIL}))
+    
+    return StreamingResponse(stream_from(generate), media_type="application/x-ndjson", headers={"X-Accel-Buffering": "no"})
+
+@app.get("/api/picks")
+async def get_picks(
+    range: str = "both",
+    refresh: bool = False,
+    days: int = None,
+    stream: bool = False,
+    idempotency_key: str = Header(None),
+    current_user: User = Depends(get_current_user),
+    session: Session = Depends(get_session)
+):
+    """Get daily picks - Elite only feature (stream=true for NDJSON)
+    
+    A retried refresh with the same Idempotency-Key replays the first result.
+    """
+    require_elite(
+        current_user, session,
+        "Picks Diários é exclusivo do plano Elite. Faça upgrade para receber as melhores oportunidades automaticamente."
+    )
+    check_idempotency_key(idempotency_key)
     
     # Validate range parameter
-    if range not in ["today", "tomorrow", "both"]:
+    if range not in ["today", "tomorrow", "both", "window"]:
         range = "both"
     
+    if stream:
+        return stream_picks(range, refresh, days)
+    
     try:
-        result = await picks_engine.get_daily_picks(range_type=range, force_refresh=refresh)
+        request = {"range": range, "refresh": refresh, "days": days}
+        result, replayed = await idempotent(f"picks:{current_user.id}", idempotency_key, request, lambda: load_picks(range, refresh, days))
+        if replayed:
+            return JSONResponse(jsonable_encoder(result), headers={"Idempotent-Replayed": "true"})
         logger.info(f"Picks generated for user {current_user.email}: {len(result.get('picks', []))} picks")
         return result
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error generating picks: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Não consegui atualizar os picks agora. Tente novamente em instantes."
+            detail=PICKS_ERROR_DETAIL
         )
 
 # Internal picks endpoint (for Next.js API - no auth required, auth handled by Next.js)
@@ -682,9 +1026,15 @@ async def get_picks(
 async def get_picks_internal(
     range: str = "both",
     refresh: bool = False,
-    x_internal_key: str = Header(None)
+    days: int = None,
+    stream: bool = False,
+    x_internal_key: str = Header(None),
+    idempotency_key: str = Header(None)
 ):
-    """Internal endpoint for picks - called by Next.js API after auth verification"""
+    """Internal endpoint for picks - called by Next.js API after auth verification
+    
+    Next.js scopes the forwarded Idempotency-Key to the user.
+    """
     # Simple internal key check
     internal_key = os.getenv("INTERNAL_API_KEY", "betfaro_internal_2024")
     if x_internal_key != internal_key:
@@ -692,22 +1042,224 @@ async def get_picks_internal(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid internal key"
         )
+    check_idempotency_key(idempotency_key)
     
     # Validate range parameter
-    if range not in ["today", "tomorrow", "both"]:
+    if range not in ["today", "tomorrow", "both", "window"]:
         range = "both"
     
+    if stream:
+        return stream_picks(range, refresh, days)
+    
     try:
-        result = await picks_engine.get_daily_picks(range_type=range, force_refresh=refresh)
+        request = {"range": range, "refresh": refresh, "days": days}
+        result, replayed = await idempotent("picks:internal", idempotency_key, request, lambda: load_picks(range, refresh, days))
+        if replayed:
+            return JSONResponse(jsonable_encoder(result), headers={"Idempotent-Replayed": "true"})
         logger.info(f"Internal picks generated: {len(result.get('picks', []))} picks")
         return result
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error generating picks: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Não consegui atualizar os picks agora. Tente novamente em instantes."
+            detail=PICKS_ERROR_DETAIL
         )
 
+async def picks_updates():
+    """Server-sent picks snapshot notifications for one client
+    
+    Starts with a versions event (latest version of every range), then one
+    snapshot event per newly published version, with keepalive comments
+    in between.
+    """
+    queue = picks_feed.subscribe()
+    try:
+        yield sse_event("versions", {"versions": picks_feed.versions()})
+        while True:
+            try:
+                message = await asyncio.wait_for(queue.get(), timeout=PICKS_FEED_KEEPALIVE)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            yield sse_event("snapshot", message)
+    finally:
+        picks_feed.unsubscribe(queue)
+
+@app.get("/api/picks/updates")
+async def get_picks_updates(
+    current_user: User = Depends(get_current_user),
+    session: Session = Depends(get_session)
+):
+    """Subscribe to new picks snapshots (server-sent events) - Elite only"""
+    require_elite(
+        current_user, session,
+        "Picks Diários é exclusivo do plano Elite. Faça upgrade para receber as melhores oportunidades automaticamente."
+    )
+    return StreamingResponse(picks_updates(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.get("/api/internal/picks/updates")
+async def get_picks_updates_internal(x_internal_key: str = Header(None)):
+    """Internal picks notifications stream - called by Next.js API after auth verification"""
+    internal_key = os.getenv("INTERNAL_API_KEY", "betfaro_internal_2024")
+    if x_internal_key != internal_key:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid internal key"
+        )
+    return StreamingResponse(picks_updates(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+# Published picks history (admin)
+@app.get("/api/admin/picks/snapshots")
+async def list_picks_snapshots(
+    range: str = None,
+    limit: int = 20,
+    _: bool = Depends(check_admin_api_key)
+):
+    """List published picks snapshots, newest first"""
+    snapshots = picks_store.history(range_type=range, limit=min(limit, 100))
+    return [
+        {
+            "id": snapshot.id,
+            "range": snapshot.range_type,
+            "version": snapshot.version,
+            "generated_at": snapshot.generated_at,
+            "picks_count": snapshot.picks_count,
+            "inputs_fingerprint": snapshot.inputs_fingerprint,
+            "payload": snapshot.payload
+        }
+        for snapshot in snapshots
+    ]
+
+# Pick settlement (admin)
+@app.post("/api/admin/picks/settle")
+async def settle_picks(_: bool = Depends(check_admin_api_key)):
+    """Grade published picks whose fixtures are over"""
+    if not picks_store.acquire_lock("settlement", SETTLEMENT_LOCK_TTL):
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Settlement already running")
+    try:
+        return await pick_settlement.settle()
+    finally:
+        picks_store.release_lock("settlement")
+
+@app.get("/api/admin/picks/hit-rates")
+async def get_hit_rates(_: bool = Depends(check_admin_api_key)):
+    """Hit rates of settled picks per market, league and confidence level"""
+    return pick_settlement.hit_rates()
+
+# Backtest of the picks rules over the stored history (admin)
+@app.get("/api/admin/backtest")
+async def backtest_picks_rules(
+    league_id: int = None,
+    days: int = 730,
+    workers: int = 1,
+    _: bool = Depends(check_admin_api_key)
+):
+    """Hit rate and calibration of the picks rules for every threshold grid point"""
+    since = datetime.utcnow() - timedelta(days=days)
+    if league_id:
+        matches = match_history.get_league_matches(league_id, since=since)
+    else:
+        matches = match_history.get_all_matches(since=since)
+    return await asyncio.to_thread(run_backtest, matches, workers=max(1, min(workers, os.cpu_count() or 1)))
+
+# Odds scanner (Elite only)
+@app.get("/api/scanner")
+async def scan_odds(
+    date: str = None,
+    market: str = None,
+    league_id: int = None,
+    min_edge: float = 0.0,
+    min_odd: float = 1.0,
+    max_odd: float = 100.0,
+    min_probability: float = 0.0,
+    limit: int = 50,
+    current_user: User = Depends(get_current_user),
+    session: Session = Depends(get_session)
+):
+    """Ranked value bets (model vs bookmaker) across the day's fixtures - Elite only feature"""
+    require_elite(
+        current_user, session,
+        "O Scanner de odds é exclusivo do plano Elite. Faça upgrade para encontrar as melhores odds do dia."
+    )
+    
+    date = date or datetime.utcnow().strftime("%Y-%m-%d")
+    try:
+        datetime.strptime(date, "%Y-%m-%d")
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="date deve estar no formato AAAA-MM-DD"
+        )
+    
+    try:
+        return await odds_scanner.scan(
+            date, market=market, league_id=league_id, min_edge=min_edge, min_odd=min_odd,
+            max_odd=max_odd, min_probability=min_probability, limit=max(1, min(limit, 200))
+        )
+    except Exception as e:
+        logger.error(f"Error scanning odds: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Não consegui carregar as odds agora. Tente novamente em instantes."
+        )
+
+# Stored bookmaker odds (admin)
+@app.post("/api/admin/odds/refresh")
+async def refresh_odds(
+    date: str = None,
+    force: bool = False,
+    _: bool = Depends(check_admin_api_key)
+):
+    """Fetch the due odds pages of a date (all pages with force=true)"""
+    date = date or datetime.utcnow().strftime("%Y-%m-%d")
+    return await odds_store.refresh_date(date, force=force)
+
+# Pre-warmed analyses (admin)
+@app.post("/api/admin/warmup")
+async def run_warmup(date: str = None, _: bool = Depends(check_admin_api_key)):
+    """Warm the priority fixtures of a date (today and tomorrow by default)"""
+    return await analysis_warmup.warm([date] if date else None)
+
+@app.get("/api/admin/warmup")
+async def get_warmup_report(_: bool = Depends(check_admin_api_key)):
+    """Report of the last warmup run with the chat cache counters"""
+    return {
+        "last_run": analysis_warmup.last_report,
+        "analysis_cache": {"entries": len(chatbot.analysis_cache), "hits": chatbot.analysis_cache.hits, "misses": chatbot.analysis_cache.misses},
+        "query_cache": {"entries": len(chatbot.query_cache), "hits": chatbot.query_cache.hits, "misses": chatbot.query_cache.misses},
+    }
+
+@app.get("/api/admin/odds/{fixture_id}")
+async def get_fixture_odds(fixture_id: int, _: bool = Depends(check_admin_api_key)):
+    """Latest stored prices and recorded price changes of a fixture"""
+    return {
+        "fixture_id": fixture_id,
+        "odds": odds_store.fixture_odds([fixture_id]).get(fixture_id, {}),
+        "movements": odds_store.movements(fixture_id)
+    }
+
+# Team ratings (Elo, updated incrementally from stored results)
+@app.get("/api/ratings")
+async def get_team_ratings(
+    team_ids: str,
+    current_user: User = Depends(get_current_user)
+):
+    """Get current Elo ratings for a comma-separated list of team ids"""
+    try:
+        ids = [int(tid) for tid in team_ids.split(",") if tid.strip()]
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="team_ids deve ser uma lista de ids separados por vírgula"
+        )
+    
+    ratings = rating_engine.get_ratings(ids[:50])
+    return {
+        "ratings": [{"team_id": tid, "rating": round(rating, 1)} for tid, rating in ratings.items()]
+    }
+
 # Health check
 @app.get("/api/health")
 @app.get("/health")
@@ -0,0 +1,233 @@
+"""
+Match History - local store of finished fixtures
+Every finished official fixture we download (chat analyses, picks runs)
+is kept in the database, so models and aggregates can be built from
+local data without extra upstream calls.
+"""
+import logging
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, select
+
+from models import StoredFixture
+
+logger = logging.getLogger(__name__)
+
+FINISHED_STATUSES = ["FT", "AET", "PEN"]
+
+# Same non-official match filters used by the chat and picks pipelines
+FRIENDLY_KEYWORDS = [
+    "friendly", "amistoso", "charity", "beneficente", "test match",
+    "exhibition", "testimonial", "memorial", "trophy friendly",
+    "pre-season", "pre season", "preseason", "club friendly"
+]
+EXCLUDED_TYPES = ["friendly", "club friendly", "international friendly"]
+
+
+class MatchHistory:
+    def __init__(self, engine=None):
+        if engine is None:
+            from database import engine as default_engine
+            engine = default_engine
+        self.engine = engine
+
+        # Bumped on every insert - lets consumers know when to refit/reload
+        self.league_versions: Dict[int, int] = {}
+
+        # Called with the list of newly stored fixtures (incremental consumers)
+        self._subscribers: List[Callable[[List[Dict]], None]] = []
+
+    def subscribe(self, callback: Callable[[List[Dict]], None]):
+        """Register a callback fed with every batch of newly stored fixtures"""
+        self._subscribers.append(callback)
+
+    def _to_row(self, fixture: Dict) -> Optional[StoredFixture]:
+        """Convert an API fixture into a StoredFixture (None if not storable)"""
+        fixture_data = fixture.get("fixture", {})
+        league = fixture.get("league", {})
+        teams = fixture.get("teams", {})
+        goals = fixture.get("goals", {})
+        halftime = (fixture.get("score") or {}).get("halftime") or {}
+
+        fixture_id = fixture_data.get("id")
+        status = fixture_data.get("status", {}).get("short", "")
+        home_id = teams.get("home", {}).get("id")
+        away_id = teams.get("away", {}).get("id")
+
+        if not fixture_id or not home_id or not away_id:
+            return None
+        if status not in FINISHED_STATUSES:
+            return None
+        if goals.get("home") is None or goals.get("away") is None:
+            return None
+
+        league_name = (league.get("name") or "")
+        league_type = (league.get("type") or "")
+        if league_type.lower() in EXCLUDED_TYPES:
+            return None
+        if any(kw in league_name.lower() for kw in FRIENDLY_KEYWORDS):
+            return None
+
+        try:
+            date = datetime.fromisoformat(fixture_data.get("date", "").replace("Z", "+00:00"))
+            if date.tzinfo:
+                date = date.astimezone(timezone.utc).replace(tzinfo=None)
+        except (ValueError, AttributeError):
+            return None
+
+        return StoredFixture(
+            fixture_id=fixture_id,
+            league_id=league.get("id"),
+            season=league.get("season"),
+            league_name=league_name,
+            league_type=league_type,
+            date=date,
+            status=status,
+            home_team_id=home_id,
+            away_team_id=away_id,
+            home_goals=goals["home"],
+            away_goals=goals["away"],
+            ht_home_goals=halftime.get("home"),
+            ht_away_goals=halftime.get("away"),
+        )
+
+    def _row_to_dict(self, row: StoredFixture) -> Dict:
+        return {
+            "fixture_id": row.fixture_id,
+            "league_id": row.league_id,
+            "season": row.season,
+            "date": row.date,
+            "home_team_id": row.home_team_id,
+            "away_team_id": row.away_team_id,
+            "home_goals": row.home_goals,
+            "away_goals": row.away_goals,
+            "ht_home_goals": row.ht_home_goals,
+            "ht_away_goals": row.ht_away_goals,
+        }
+
+    def ingest(self, fixtures: List[Dict]) -> List[Dict]:
+        """Store finished official fixtures not seen before. Returns the new ones (oldest first).
+
+        Subscribers get exactly the rows this call inserted: when another
+        worker stores some of the same fixtures between the existence check
+        and the insert, the batch is retried row by row and the rows it
+        already stored are left out.
+        """
+        candidates = {}
+        for f in fixtures:
+            row = self._to_row(f)
+            if row and row.fixture_id not in candidates:
+                candidates[row.fixture_id] = (row, f)
+
+        if not candidates:
+            return []
+
+        try:
+            with Session(self.engine) as session:
+                existing = set(session.exec(
+                    select(StoredFixture.fixture_id).where(StoredFixture.fixture_id.in_(list(candidates.keys())))
+                ).all())
+                pending = sorted(
+                    (entry for fid, entry in candidates.items() if fid not in existing),
+                    key=lambda entry: entry[0].date
+                )
+                if not pending:
+                    return []
+                new_fixtures = [self._row_to_dict(row) for row, _ in pending]
+                session.add_all([row for row, _ in pending])
+                session.commit()
+        except IntegrityError:
+            new_fixtures = self._insert_each([f for _, f in pending])
+        except Exception as e:
+            logger.warning(f"[HISTORY] Could not store fixtures: {str(e)}")
+            return []
+
+        if not new_fixtures:
+            return []
+
+        for f in new_fixtures:
+            league_id = f["league_id"]
+            self.league_versions[league_id] = self.league_versions.get(league_id, 0) + 1
+
+        logger.info(f"[HISTORY] Stored {len(new_fixtures)} new finished fixtures")
+
+        for callback in self._subscribers:
+            try:
+                callback(new_fixtures)
+            except Exception as e:
+                logger.warning(f"[HISTORY] Subscriber failed: {str(e)}")
+
+        return new_fixtures
+
+    def _insert_each(self, fixtures: List[Dict]) -> List[Dict]:
+        """Insert fixtures one at a time, skipping those another worker stored"""
+        inserted = []
+        for f in fixtures:
+            row = self._to_row(f)
+            data = self._row_to_dict(row)
+            try:
+                with Session(self.engine) as session:
+                    session.add(row)
+                    session.commit()
+            except IntegrityError:
+                continue  # Stored by another worker meanwhile
+            except Exception as e:
+                logger.warning(f"[HISTORY] Could not store fixture {data['fixture_id']}: {str(e)}")
+                continue
+            inserted.append(data)
+        return inserted
+
+    def last_fixture_ids(self, team_ids: List[int]) -> Dict[int, int]:
+        """Most recent stored fixture id per team (teams without matches omitted)"""
+        if not team_ids:
+            return {}
+        try:
+            with Session(self.engine) as session:
+                ids = list(team_ids)
+                rows = session.exec(
+                    select(StoredFixture.fixture_id, StoredFixture.home_team_id, StoredFixture.away_team_id)
+                    .where(StoredFixture.home_team_id.in_(ids) | StoredFixture.away_team_id.in_(ids))
+                    .order_by(StoredFixture.date)
+                ).all()
+        except Exception as e:
+            logger.warning(f"[HISTORY] Could not read last fixtures: {str(e)}")
+            return {}
+
+        wanted = set(team_ids)
+        last = {}
+        for fixture_id, home_id, away_id in rows:
+            for team_id in (home_id, away_id):
+                if team_id in wanted:
+                    last[team_id] = fixture_id
+        return last
+
+    def get_all_matches(self, since: datetime = None) -> List[Dict]:
+        """Get every stored match (oldest first)"""
+        try:
+            with Session(self.engine) as session:
+                query = select(StoredFixture)
+                if since:
+                    query = query.where(StoredFixture.date >= since)
+                rows = session.exec(query.order_by(StoredFixture.date)).all()
+                return [self._row_to_dict(row) for row in rows]
+        except Exception as e:
+            logger.warning(f"[HISTORY] Could not read matches: {str(e)}")
+            return []
+
+    def get_league_matches(self, league_id: int, since: datetime = None) -> List[Dict]:
+        """Get stored matches of a league (oldest first)"""
+        try:
+            with Session(self.engine) as session:
+                query = select(StoredFixture).where(StoredFixture.league_id == league_id)
+                if since:
+                    query = query.where(StoredFixture.date >= since)
+                rows = session.exec(query.order_by(StoredFixture.date)).all()
+                return [self._row_to_dict(row) for row in rows]
+        except Exception as e:
+            logger.warning(f"[HISTORY] Could not read league {league_id}: {str(e)}")
+            return []
+
+
+# Singleton instance
+match_history = MatchHistory()
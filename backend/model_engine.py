@@ -0,0 +1,290 @@
+"""
+Model Engine - Poisson / Dixon-Coles score matrices
+Fits attack/defence strengths per league from the local match history
+(one batched IRLS solve per league) and derives every market (1X2,
+double chance, totals, BTTS, correct score, handicaps) from a full
+score-probability matrix, vectorized over all fixtures being priced.
+"""
+import logging
+import numpy as np
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+MAX_GOALS = 10               # Score matrix covers 0..10 goals per side
+MIN_LEAGUE_MATCHES = 30      # Don't fit a league with fewer stored matches
+MIN_TEAM_MATCHES = 3         # Don't price a team with fewer matches in the fit
+HISTORY_DAYS = 730           # Matches older than this are ignored
+DECAY_HALF_LIFE_DAYS = 180   # Dixon-Coles time weighting
+RIDGE = 1.0                  # Shrinks attack/defence towards the league average
+IRLS_ITERATIONS = 25
+MODEL_TTL = 3600             # Refit at least hourly (other workers may have stored matches)
+RHO_GRID = np.linspace(-0.2, 0.2, 41)
+
+TOTAL_LINES = [0.5, 1.5, 2.5, 3.5, 4.5]
+HANDICAP_LINES = [-2.5, -1.5, -0.5, 0.5, 1.5, 2.5]
+
+
+def _line_key(line: float) -> str:
+    """2.5 -> '2_5' (same naming as the stats dicts: over_2_5)"""
+    return f"{line:.1f}".replace(".", "_")
+
+
+def _build_market_masks() -> Tuple[List[str], np.ndarray]:
+    """Boolean masks over the (home goals, away goals) grid, one per market"""
+    goals = np.arange(MAX_GOALS + 1)
+    home, away = np.meshgrid(goals, goals, indexing="ij")
+    total = home + away
+    diff = home - away
+
+    masks = {
+        "home_win": diff > 0,
+        "draw": diff == 0,
+        "away_win": diff < 0,
+        "dc_1x": diff >= 0,
+        "dc_x2": diff <= 0,
+        "dc_12": diff != 0,
+        "btts": (home > 0) & (away > 0),
+        "btts_no": (home == 0) | (away == 0),
+        "home_scores": home > 0,
+        "away_scores": away > 0,
+        "home_clean_sheet": away == 0,
+        "away_clean_sheet": home == 0,
+    }
+    for line in TOTAL_LINES:
+        masks[f"over_{_line_key(line)}"] = total > line
+        masks[f"under_{_line_key(line)}"] = total < line
+    for line in HANDICAP_LINES:
+        sign = "+" if line > 0 else "-"
+        masks[f"handicap_home_{sign}{abs(line)}"] = diff + line > 0
+        masks[f"handicap_away_{sign}{abs(line)}"] = -diff + line > 0
+
+    names = list(masks.keys())
+    return names, np.stack([masks[n] for n in names]).astype(float)
+
+
+MARKET_NAMES, MARKET_MASKS = _build_market_masks()
+
+# log(k!) for k = 0..MAX_GOALS
+_LOG_FACTORIALS = np.concatenate([[0.0], np.cumsum(np.log(np.arange(1, MAX_GOALS + 1)))])
+
+
+def _dc_tau(home_goals: np.ndarray, away_goals: np.ndarray, lam_home: np.ndarray, lam_away: np.ndarray, rho: np.ndarray) -> np.ndarray:
+    """Dixon-Coles low-score correction factor (broadcasts over rho)"""
+    tau = np.ones(np.broadcast(home_goals, rho).shape)
+    tau = np.where((home_goals == 0) & (away_goals == 0), 1 - lam_home * lam_away * rho, tau)
+    tau = np.where((home_goals == 0) & (away_goals == 1), 1 + lam_home * rho, tau)
+    tau = np.where((home_goals == 1) & (away_goals == 0), 1 + lam_away * rho, tau)
+    tau = np.where((home_goals == 1) & (away_goals == 1), 1 - rho, tau)
+    return tau
+
+
+def score_matrices(lam_home: np.ndarray, lam_away: np.ndarray, rho: np.ndarray) -> np.ndarray:
+    """Score-probability matrices, shape (n_matches, MAX_GOALS+1, MAX_GOALS+1)"""
+    lam_home = np.asarray(lam_home, dtype=float)
+    lam_away = np.asarray(lam_away, dtype=float)
+    rho = np.broadcast_to(np.asarray(rho, dtype=float), lam_home.shape)
+
+    k = np.arange(MAX_GOALS + 1)
+    pmf_home = np.exp(k * np.log(lam_home[:, None]) - lam_home[:, None] - _LOG_FACTORIALS)
+    pmf_away = np.exp(k * np.log(lam_away[:, None]) - lam_away[:, None] - _LOG_FACTORIALS)
+    matrices = pmf_home[:, :, None] * pmf_away[:, None, :]
+
+    # Dixon-Coles correction only touches the four low scores
+    matrices[:, 0, 0] *= 1 - lam_home * lam_away * rho
+    matrices[:, 0, 1] *= 1 + lam_home * rho
+    matrices[:, 1, 0] *= 1 + lam_away * rho
+    matrices[:, 1, 1] *= 1 - rho
+
+    # Renormalize (truncation at MAX_GOALS + correction)
+    matrices = np.clip(matrices, 0, None)
+    return matrices / matrices.sum(axis=(1, 2), keepdims=True)
+
+
+def market_probabilities(matrices: np.ndarray) -> Dict[str, np.ndarray]:
+    """All markets for all matrices in one pass. Values in 0-1, shape (n_matches,)"""
+    probs = np.einsum("mij,kij->mk", matrices, MARKET_MASKS)
+    return {name: probs[:, i] for i, name in enumerate(MARKET_NAMES)}
+
+
+def top_correct_scores(matrix: np.ndarray, n: int = 5) -> List[Dict]:
+    """Most likely correct scores of a single matrix"""
+    flat = matrix.ravel()
+    best = np.argsort(flat)[::-1][:n]
+    size = matrix.shape[1]
+    return [
+        {"score": f"{idx // size}-{idx % size}", "probability": round(float(flat[idx]) * 100, 1)}
+        for idx in best
+    ]
+
+
+class ScoreModel:
+    def __init__(self, history=None):
+        if history is None:
+            from match_history import match_history
+            history = match_history
+        self.history = history
+
+        # league_id -> {"model": fitted params or None, "version", "checked_at"}
+        self._leagues: Dict[int, Dict] = {}
+
+    def fit_league(self, matches: List[Dict], now: datetime = None) -> Optional[Dict]:
+        """Fit attack/defence/home advantage (Poisson GLM via IRLS) and Dixon-Coles rho"""
+        if len(matches) < MIN_LEAGUE_MATCHES:
+            return None
+
+        now = now or datetime.utcnow()
+        home_ids = np.array([m["home_team_id"] for m in matches])
+        away_ids = np.array([m["away_team_id"] for m in matches])
+        home_goals = np.array([m["home_goals"] for m in matches], dtype=float)
+        away_goals = np.array([m["away_goals"] for m in matches], dtype=float)
+        age_days = np.array([(now - m["date"]).total_seconds() / 86400 for m in matches])
+        weights = 0.5 ** (np.clip(age_days, 0, None) / DECAY_HALF_LIFE_DAYS)
+
+        team_ids, team_idx = np.unique(np.concatenate([home_ids, away_ids]), return_inverse=True)
+        n_matches = len(matches)
+        n_teams = len(team_ids)
+        h_idx, a_idx = team_idx[:n_matches], team_idx[n_matches:]
+
+        # Design: [intercept, home_adv, attack (n_teams), defence (n_teams)]
+        # Row 2i = home goals of match i, row 2i+1 = away goals
+        n_params = 2 + 2 * n_teams
+        X = np.zeros((2 * n_matches, n_params))
+        rows = np.arange(n_matches)
+        X[2 * rows, 0] = 1
+        X[2 * rows, 1] = 1
+        X[2 * rows, 2 + h_idx] = 1
+        X[2 * rows, 2 + n_teams + a_idx] = 1
+        X[2 * rows + 1, 0] = 1
+        X[2 * rows + 1, 2 + a_idx] = 1
+        X[2 * rows + 1, 2 + n_teams + h_idx] = 1
+
+        y = np.empty(2 * n_matches)
+        y[0::2] = home_goals
+        y[1::2] = away_goals
+        w = np.repeat(weights, 2)
+
+        penalty = np.full(n_params, RIDGE)
+        penalty[:2] = 0
+
+        beta = np.zeros(n_params)
+        beta[0] = np.log(max(np.average(y, weights=w), 0.1))
+        for _ in range(IRLS_ITERATIONS):
+            eta = X @ beta
+            mu = np.exp(eta)
+            z = eta + (y - mu) / mu
+            W = w * mu
+            XtW = X.T * W
+            new_beta = np.linalg.solve(XtW @ X + np.diag(penalty), XtW @ z)
+            if np.max(np.abs(new_beta - beta)) < 1e-6:
+                beta = new_beta
+                break
+            beta = new_beta
+
+        intercept, home_adv = beta[0], beta[1]
+        attack = beta[2:2 + n_teams]
+        defence = beta[2 + n_teams:]
+
+        lam_home = np.exp(intercept + home_adv + attack[h_idx] + defence[a_idx])
+        lam_away = np.exp(intercept + attack[a_idx] + defence[h_idx])
+
+        # Rho: maximize the weighted low-score likelihood over a grid (all rhos at once)
+        tau = _dc_tau(home_goals[None, :], away_goals[None, :], lam_home[None, :], lam_away[None, :], RHO_GRID[:, None])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            loglik = np.where(tau > 0, np.log(np.where(tau > 0, tau, 1)), -np.inf) @ weights
+        rho = float(RHO_GRID[int(np.argmax(loglik))])
+
+        team_matches = np.bincount(team_idx, minlength=n_teams)
+        return {
+            "teams": {int(t): i for i, t in enumerate(team_ids)},
+            "team_matches": team_matches,
+            "intercept": float(intercept),
+            "home_adv": float(home_adv),
+            "attack": attack,
+            "defence": defence,
+            "rho": rho,
+            "n_matches": n_matches,
+            "fitted_at": now.timestamp(),
+        }
+
+    def get_league_model(self, league_id: int) -> Optional[Dict]:
+        """Get fitted league params, refitting when the history changed or the fit is stale"""
+        version = self.history.league_versions.get(league_id, 0)
+        now = datetime.utcnow()
+
+        entry = self._leagues.get(league_id)
+        if entry and entry["version"] == version and now.timestamp() - entry["checked_at"] < MODEL_TTL:
+            return entry["model"]
+
+        matches = self.history.get_league_matches(league_id, since=now - timedelta(days=HISTORY_DAYS))
+        try:
+            model = self.fit_league(matches, now)
+        except (np.linalg.LinAlgError, FloatingPointError) as e:
+            logger.warning(f"[MODEL] Fit failed for league {league_id}: {str(e)}")
+            model = None
+
+        if model:
+            logger.info(f"[MODEL] League {league_id} fitted on {model['n_matches']} matches (rho={model['rho']:.2f})")
+        self._leagues[league_id] = {"model": model, "version": version, "checked_at": now.timestamp()}
+        return model
+
+    def _rates(self, model: Dict, home_id: int, away_id: int) -> Optional[Tuple[float, float]]:
+        """Expected goals (home, away) for a matchup, None if a team isn't covered"""
+        h = model["teams"].get(home_id)
+        a = model["teams"].get(away_id)
+        if h is None or a is None:
+            return None
+        if model["team_matches"][h] < MIN_TEAM_MATCHES or model["team_matches"][a] < MIN_TEAM_MATCHES:
+            return None
+        lam_home = np.exp(model["intercept"] + model["home_adv"] + model["attack"][h] + model["defence"][a])
+        lam_away = np.exp(model["intercept"] + model["attack"][a] + model["defence"][h])
+        return float(lam_home), float(lam_away)
+
+    def price_fixtures(self, matchups: List[Tuple[int, int, int]]) -> List[Optional[Dict]]:
+        """Price many (league_id, home_id, away_id) matchups in one vectorized pass
+
+        Returns, per matchup, market probabilities in % (same scale as the
+        team stats) plus expected goals and the top correct scores, or None
+        when the league/teams aren't covered by the local history.
+        """
+        results: List[Optional[Dict]] = [None] * len(matchups)
+        priced_idx, lam_home, lam_away, rhos = [], [], [], []
+
+        for i, (league_id, home_id, away_id) in enumerate(matchups):
+            if not league_id:
+                continue
+            model = self.get_league_model(league_id)
+            if not model:
+                continue
+            rates = self._rates(model, home_id, away_id)
+            if not rates:
+                continue
+            priced_idx.append(i)
+            lam_home.append(rates[0])
+            lam_away.append(rates[1])
+            rhos.append(model["rho"])
+
+        if not priced_idx:
+            return results
+
+        matrices = score_matrices(np.array(lam_home), np.array(lam_away), np.array(rhos))
+        probs = market_probabilities(matrices)
+
+        for row, i in enumerate(priced_idx):
+            priced = {name: round(float(values[row]) * 100, 1) for name, values in probs.items()}
+            priced["expected_goals_home"] = round(lam_home[row], 2)
+            priced["expected_goals_away"] = round(lam_away[row], 2)
+            priced["correct_scores"] = top_correct_scores(matrices[row])
+            priced["league_id"] = matchups[i][0]
+            results[i] = priced
+
+        return results
+
+    def price_match(self, league_id: int, home_id: int, away_id: int) -> Optional[Dict]:
+        """Price a single matchup"""
+        return self.price_fixtures([(league_id, home_id, away_id)])[0]
+
+
+# Singleton instance
+score_model = ScoreModel()
@@ -35,3 +35,137 @@ class AuditLog(SQLModel, table=True):
     details: Optional[dict] = Field(default=None, sa_column=Column(JSON))
     ip_address: Optional[str] = Field(default=None)
     created_at: datetime = Field(default_factory=datetime.utcnow)
+
+class FixtureStatistics(SQLModel, table=True):
+    """Per-fixture match statistics (/fixtures/statistics) - immutable once the match ends"""
+    fixture_id: int = Field(primary_key=True)
+    home_team_id: Optional[int] = Field(default=None, index=True)
+    away_team_id: Optional[int] = Field(default=None, index=True)
+    home_corners: Optional[int] = Field(default=None)
+    away_corners: Optional[int] = Field(default=None)
+    home_yellow_cards: Optional[int] = Field(default=None)
+    away_yellow_cards: Optional[int] = Field(default=None)
+    home_red_cards: Optional[int] = Field(default=None)
+    away_red_cards: Optional[int] = Field(default=None)
+    data: Optional[dict] = Field(default=None, sa_column=Column(JSON))  # raw {team_id: {type: value}}
+    fetched_at: datetime = Field(default_factory=datetime.utcnow)
+
+class StoredFixture(SQLModel, table=True):
+    """Finished fixture kept locally - the match history used by models/ratings"""
+    fixture_id: int = Field(primary_key=True)
+    league_id: Optional[int] = Field(default=None, index=True)
+    season: Optional[int] = Field(default=None, index=True)
+    league_name: Optional[str] = Field(default=None)
+    league_type: Optional[str] = Field(default=None)
+    date: datetime = Field(index=True)
+    status: str = Field()
+    home_team_id: int = Field(index=True)
+    away_team_id: int = Field(index=True)
+    home_goals: int = Field()
+    away_goals: int = Field()
+    ht_home_goals: Optional[int] = Field(default=None)
+    ht_away_goals: Optional[int] = Field(default=None)
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+class TeamRating(SQLModel, table=True):
+    """Elo-style team strength, updated incrementally as finished fixtures are stored"""
+    team_id: int = Field(primary_key=True)
+    rating: float = Field(default=1500.0)
+    matches: int = Field(default=0)
+    last_fixture_id: Optional[int] = Field(default=None)
+    last_match_date: Optional[datetime] = Field(default=None)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+class LeagueBaseline(SQLModel, table=True):
+    """Running totals of stored finished fixtures per league and season"""
+    league_id: int = Field(primary_key=True)
+    season: int = Field(primary_key=True)
+    matches: int = Field(default=0)
+    home_goals: int = Field(default=0)
+    away_goals: int = Field(default=0)
+    over_1_5: int = Field(default=0)
+    over_2_5: int = Field(default=0)
+    btts: int = Field(default=0)
+    home_wins: int = Field(default=0)
+    draws: int = Field(default=0)
+    away_wins: int = Field(default=0)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+class PicksSnapshot(SQLModel, table=True):
+    """Published picks (one row per generation) shared by all workers"""
+    id: Optional[int] = Field(default=None, primary_key=True)
+    range_type: str = Field(index=True)
+    version: int = Field(default=1)
+    payload: dict = Field(sa_column=Column(JSON))  # {"picks": [...], "meta": {...}}
+    picks_count: int = Field(default=0)
+    inputs_fingerprint: str = Field(default="")
+    generated_at: datetime = Field(default_factory=datetime.utcnow, index=True)
+
+class GenerationLock(SQLModel, table=True):
+    """Lease letting a single worker run an expensive generation"""
+    name: str = Field(primary_key=True)
+    owner: str = Field()
+    acquired_at: datetime = Field(default_factory=datetime.utcnow)
+    expires_at: datetime = Field()
+
+class IdempotencyKey(SQLModel, table=True):
+    """Claim of an Idempotency-Key, then the response replayed to its retries"""
+    scope: str = Field(primary_key=True)
+    key: str = Field(primary_key=True)
+    fingerprint: str = Field()
+    owner: str = Field()  # Worker running (or that ran) the first request
+    response: Optional[dict] = Field(default=None, sa_column=Column(JSON))
+    completed_at: Optional[datetime] = Field(default=None)  # None while the first request runs
+    expires_at: datetime = Field(index=True)
+
+class SettledPick(SQLModel, table=True):
+    """Outcome of a published pick once its fixture is over (won is None when void)"""
+    id: Optional[int] = Field(default=None, primary_key=True)
+    fixture_id: int = Field(index=True)
+    market: str = Field()
+    league: str = Field(default="")
+    confidence: float = Field(default=0)
+    confidence_level: str = Field(default="")
+    won: Optional[bool] = Field(default=None)
+    home_goals: Optional[int] = Field(default=None)
+    away_goals: Optional[int] = Field(default=None)
+    snapshot_id: Optional[int] = Field(default=None)
+    settled_at: datetime = Field(default_factory=datetime.utcnow)
+
+class PickHitRate(SQLModel, table=True):
+    """Running hit counts of settled picks per dimension (market, league, confidence level)"""
+    dimension: str = Field(primary_key=True)
+    key: str = Field(primary_key=True)
+    picks: int = Field(default=0)
+    hits: int = Field(default=0)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+class OddsPrice(SQLModel, table=True):
+    """Latest bookmaker price per (fixture, bookmaker, market)"""
+    fixture_id: int = Field(primary_key=True)
+    bookmaker_id: int = Field(primary_key=True)
+    market: str = Field(primary_key=True)  # Model market key (over_2_5, btts, dc_1x...)
+    league_id: Optional[int] = Field(default=None, index=True)
+    home_team_id: Optional[int] = Field(default=None, index=True)
+    away_team_id: Optional[int] = Field(default=None, index=True)
+    kickoff: Optional[datetime] = Field(default=None, index=True)
+    odd: float = Field()
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+class OddsMovement(SQLModel, table=True):
+    """One recorded price change (previous_odd is None for the first price seen)"""
+    id: Optional[int] = Field(default=None, primary_key=True)
+    fixture_id: int = Field(index=True)
+    bookmaker_id: int = Field()
+    market: str = Field()
+    previous_odd: Optional[float] = Field(default=None)
+    odd: float = Field()
+    recorded_at: datetime = Field(default_factory=datetime.utcnow)
+
+class OddsPage(SQLModel, table=True):
+    """Refresh schedule of one page of the per-date odds listing"""
+    date: str = Field(primary_key=True)  # YYYY-MM-DD
+    page: int = Field(primary_key=True)
+    total_pages: int = Field(default=1)
+    fetched_at: datetime = Field(default_factory=datetime.utcnow)
+    next_fetch_at: datetime = Field(default_factory=datetime.utcnow)
@@ -0,0 +1,368 @@
+"""
+Odds Store - bookmaker prices of the pickable fixtures, kept current cheaply
+The paginated odds?date= listing is re-fetched page by page on a schedule
+set by how close the page's fixtures are to kickoff (prices move most in
+the last hours). Only prices that changed are written, each change is
+recorded as a movement, and consumers (scanner, chat value analysis,
+picks) read the latest price from the database without calling the API.
+"""
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from sqlmodel import Session, select
+
+from model_engine import TOTAL_LINES, _line_key
+from models import OddsPrice, OddsMovement, OddsPage
+from picks_store import picks_store
+
+logger = logging.getLogger(__name__)
+
+ODDS_BOOKMAKER = int(os.getenv("ODDS_BOOKMAKER", "8"))   # 8 = Bet365
+MAX_PAGES = 250                  # Safety cap on the worldwide listing (reported when hit)
+PAGE_CONCURRENCY = 4
+FIXTURES_TTL = 3600              # Pickable fixtures of a date older than this are re-listed
+
+# Page refresh interval by time to the page's next kickoff
+NEAR_KICKOFF = timedelta(hours=3)
+DAY_KICKOFF = timedelta(hours=24)
+NEAR_KICKOFF_TTL = timedelta(minutes=10)
+DAY_KICKOFF_TTL = timedelta(hours=1)
+FAR_KICKOFF_TTL = timedelta(hours=4)  # Also pages without upcoming pickable fixtures
+
+ODDS_REFRESH_INTERVAL = 300      # Seconds between scheduler ticks (most ticks fetch nothing)
+ODDS_LOCK_TTL = 120
+
+# API-Football bet name -> {value label -> model market}
+BET_MARKETS = {
+    "Match Winner": {"Home": "home_win", "Draw": "draw", "Away": "away_win"},
+    "Double Chance": {"Home/Draw": "dc_1x", "Draw/Away": "dc_x2", "Home/Away": "dc_12"},
+    "Both Teams Score": {"Yes": "btts", "No": "btts_no"},
+    "Goals Over/Under": {
+        f"{side} {line}": f"{side.lower()}_{_line_key(line)}"
+        for line in TOTAL_LINES for side in ["Over", "Under"]
+    },
+}
+
+# Picks market name -> model market
+PICK_MARKETS = {
+    "Over 1.5": "over_1_5",
+    "Over 2.5": "over_2_5",
+    "Under 2.5": "under_2_5",
+    "BTTS Sim": "btts",
+    "BTTS Não": "btts_no",
+    "Dupla Chance 1X": "dc_1x",
+    "Dupla Chance X2": "dc_x2",
+}
+
+
+def parse_odds(entries: List[Dict]) -> List[Dict]:
+    """Flatten odds entries into one row per (fixture, market) for the first bookmaker"""
+    rows = []
+    for entry in entries:
+        fixture_id = entry.get("fixture", {}).get("id")
+        bookmakers = entry.get("bookmakers") or []
+        if not fixture_id or not bookmakers:
+            continue
+        for bet in bookmakers[0].get("bets", []):
+            mapping = BET_MARKETS.get(bet.get("name"))
+            if not mapping:
+                continue
+            for value in bet.get("values", []):
+                market = mapping.get(str(value.get("value")))
+                try:
+                    odd = float(value.get("odd"))
+                except (TypeError, ValueError):
+                    continue
+                if market and odd > 1:
+                    rows.append({
+                        "fixture_id": fixture_id,
+                        "bookmaker_id": bookmakers[0].get("id"),
+                        "league_id": entry.get("league", {}).get("id"),
+                        "bet": bet.get("name"),
+                        "market": market,
+                        "odd": odd,
+                    })
+    return rows
+
+
+def pick_market_key(market: str, home_team: str = "", away_team: str = "") -> Optional[str]:
+    """Model market of a picks market name (None if odds aren't tracked for it)"""
+    if market.startswith("Vitória "):
+        team = market[len("Vitória "):]
+        return "home_win" if team == home_team else "away_win" if team == away_team else None
+    return PICK_MARKETS.get(market)
+
+
+def _kickoff(fixture: Dict) -> Optional[datetime]:
+    """Kickoff as naive UTC"""
+    data = fixture.get("fixture", {})
+    if data.get("timestamp"):
+        return datetime.utcfromtimestamp(data["timestamp"])
+    try:
+        kickoff = datetime.fromisoformat(data.get("date", "").replace("Z", "+00:00"))
+        return kickoff.replace(tzinfo=None) - (kickoff.utcoffset() or timedelta(0))
+    except ValueError:
+        return None
+
+
+class OddsStore:
+    def __init__(self, api=None, picks=None, engine=None, locks=None):
+        if api is None:
+            from football_api import FootballAPI
+            api = FootballAPI()
+        if engine is None:
+            from database import engine as default_engine
+            engine = default_engine
+        self.api = api
+        self.engine = engine
+        self.locks = locks or picks_store
+        # Resolved on first use (picks_engine reads prices from this store)
+        self.picks = picks
+
+    async def get_fixtures(self, date_str: str) -> Dict[int, Dict]:
+        """Upcoming priority fixtures of a date by id
+        
+        Served from the picks engine's fixture listing when it is recent
+        (picks generation, the scanner and the warmup share it).
+        """
+        if self.picks is None:
+            from picks_engine import picks_engine
+            self.picks = picks_engine
+        fixtures, _ = await self.picks.fetch_pickable_fixtures([date_str], max_age=FIXTURES_TTL)
+        return {f.get("fixture", {}).get("id"): f for f in fixtures}
+
+    def team_kickoffs(self, dates: List[str]) -> Optional[Dict[int, datetime]]:
+        """Earliest kickoff per team on the dates in any competition (None when unknown)"""
+        if self.picks is None:
+            from picks_engine import picks_engine
+            self.picks = picks_engine
+        return self.picks.team_kickoffs(dates)
+
+    def _page_ttl(self, kickoffs: List[datetime], now: datetime) -> timedelta:
+        """Refresh interval of a page from its next upcoming kickoff"""
+        upcoming = [k for k in kickoffs if k and k > now]
+        if not upcoming:
+            return FAR_KICKOFF_TTL
+        until = min(upcoming) - now
+        if until <= NEAR_KICKOFF:
+            return NEAR_KICKOFF_TTL
+        if until <= DAY_KICKOFF:
+            return DAY_KICKOFF_TTL
+        return FAR_KICKOFF_TTL
+
+    def _due_pages(self, date_str: str, now: datetime) -> Tuple[List[int], int]:
+        """Pages whose refresh is due (page 1 if the date was never fetched)"""
+        with Session(self.engine) as session:
+            pages = session.exec(select(OddsPage).where(OddsPage.date == date_str)).all()
+        if not pages:
+            return [1], 0
+        total = max(page.total_pages for page in pages)
+        known = {page.page: page for page in pages}
+        due = [
+            number for number in range(1, min(total, MAX_PAGES) + 1)
+            if number not in known or known[number].next_fetch_at <= now
+        ]
+        return due, total
+
+    async def refresh_date(self, date_str: str, force: bool = False) -> Dict:
+        """Re-fetch the due odds pages of a date and store the price changes"""
+        report = {"date": date_str, "requests": 0, "pages_total": 0, "new": 0, "changed": 0, "unchanged": 0, "truncated": False}
+        if not self.locks.acquire_lock(f"odds:{date_str}", ODDS_LOCK_TTL):
+            return {**report, "skipped": True}
+
+        try:
+            now = datetime.utcnow()
+            due, total = self._due_pages(date_str, now)
+            if force and total:
+                due = list(range(1, min(total, MAX_PAGES) + 1))
+            if not due:
+                return {**report, "pages_total": total, "truncated": total > MAX_PAGES}
+            fixtures = await self.get_fixtures(date_str)
+
+            semaphore = asyncio.Semaphore(PAGE_CONCURRENCY)
+
+            async def fetch_page(page):
+                async with semaphore:
+                    return page, await self.api.get_odds_page(date_str, page, ODDS_BOOKMAKER)
+
+            fetched = set()
+            while due:
+                responses = await asyncio.gather(*(fetch_page(page) for page in due), return_exceptions=True)
+                report["requests"] += len(due)
+                fetched.update(due)
+                for response in responses:
+                    if isinstance(response, Exception):
+                        logger.warning(f"[ODDS] Page request failed: {str(response)}")
+                        continue
+                    page, body = response
+                    total = max(total, int((body.get("paging") or {}).get("total") or 1))
+                    counts = self.ingest(body.get("response", []), fixtures)
+                    for key in ["new", "changed", "unchanged"]:
+                        report[key] += counts[key]
+                    kickoffs = [_kickoff(fixtures[fid]) for fid in counts["fixture_ids"]]
+                    self._schedule_page(date_str, page, total, now + self._page_ttl(kickoffs, now), now)
+                # Pages discovered by the first response (or a grown listing)
+                known = self._known_pages(date_str)
+                due = [page for page in range(1, min(total, MAX_PAGES) + 1) if page not in fetched and page not in known]
+
+            report["pages_total"] = total
+            if total > MAX_PAGES:
+                report["truncated"] = True
+                logger.warning(f"[ODDS] {date_str} listing has {total} pages, only the first {MAX_PAGES} are followed")
+            if report["requests"]:
+                logger.info(f"[ODDS] {report}")
+            return report
+        finally:
+            self.locks.release_lock(f"odds:{date_str}")
+
+    def _known_pages(self, date_str: str) -> set:
+        with Session(self.engine) as session:
+            return set(session.exec(select(OddsPage.page).where(OddsPage.date == date_str)).all())
+
+    def _schedule_page(self, date_str: str, page: int, total: int, next_fetch_at: datetime, now: datetime):
+        with Session(self.engine) as session:
+            row = session.get(OddsPage, (date_str, page)) or OddsPage(date=date_str, page=page)
+            row.total_pages = total
+            row.fetched_at = now
+            row.next_fetch_at = next_fetch_at
+            session.add(row)
+            session.commit()
+
+    def ingest(self, entries: List[Dict], fixtures: Dict[int, Dict]) -> Dict:
+        """Store the prices of known fixtures, writing only new or changed ones"""
+        rows = [row for row in parse_odds(entries) if row["fixture_id"] in fixtures]
+        counts = {"new": 0, "changed": 0, "unchanged": 0, "fixture_ids": sorted({row["fixture_id"] for row in rows})}
+        if not rows:
+            return counts
+
+        now = datetime.utcnow()
+        with Session(self.engine) as session:
+            existing = {
+                (price.fixture_id, price.bookmaker_id, price.market): price
+                for price in session.exec(
+                    select(OddsPrice).where(OddsPrice.fixture_id.in_(counts["fixture_ids"]))
+                ).all()
+            }
+            for row in rows:
+                key = (row["fixture_id"], row["bookmaker_id"], row["market"])
+                price = existing.get(key)
+                if price and price.odd == row["odd"]:
+                    counts["unchanged"] += 1
+                    continue
+
+                if price is None:
+                    fixture = fixtures[row["fixture_id"]]
+                    teams = fixture.get("teams", {})
+                    price = OddsPrice(
+                        fixture_id=row["fixture_id"],
+                        bookmaker_id=row["bookmaker_id"],
+                        market=row["market"],
+                        league_id=row["league_id"],
+                        home_team_id=teams.get("home", {}).get("id"),
+                        away_team_id=teams.get("away", {}).get("id"),
+                        kickoff=_kickoff(fixture),
+                        odd=row["odd"],
+                    )
+                    existing[key] = price
+                    counts["new"] += 1
+                    previous = None
+                else:
+                    previous = price.odd
+                    price.odd = row["odd"]
+                    counts["changed"] += 1
+                price.updated_at = now
+                session.add(price)
+                session.add(OddsMovement(
+                    fixture_id=row["fixture_id"],
+                    bookmaker_id=row["bookmaker_id"],
+                    market=row["market"],
+                    previous_odd=previous,
+                    odd=row["odd"],
+                    recorded_at=now,
+                ))
+            session.commit()
+        return counts
+
+    def latest(self, date_str: str = None, fixture_ids: List[int] = None, bookmaker_id: int = ODDS_BOOKMAKER) -> List[Dict]:
+        """Stored prices of a date's fixtures (by kickoff) or of given fixtures"""
+        query = select(OddsPrice).where(OddsPrice.bookmaker_id == bookmaker_id)
+        if date_str:
+            day = datetime.strptime(date_str, "%Y-%m-%d")
+            query = query.where(OddsPrice.kickoff >= day).where(OddsPrice.kickoff < day + timedelta(days=1))
+        if fixture_ids is not None:
+            query = query.where(OddsPrice.fixture_id.in_(fixture_ids))
+        with Session(self.engine) as session:
+            prices = session.exec(query).all()
+        return [
+            {
+                "fixture_id": price.fixture_id,
+                "league_id": price.league_id,
+                "market": price.market,
+                "odd": price.odd,
+                "updated_at": price.updated_at,
+            }
+            for price in prices
+        ]
+
+    def fixture_odds(self, fixture_ids: List[int]) -> Dict[int, Dict[str, float]]:
+        """Latest prices by fixture: {fixture_id: {market: odd}}"""
+        odds: Dict[int, Dict[str, float]] = {}
+        for row in self.latest(fixture_ids=fixture_ids):
+            odds.setdefault(row["fixture_id"], {})[row["market"]] = row["odd"]
+        return odds
+
+    def find_match_odds(self, home_id: int, away_id: int) -> Optional[Dict]:
+        """Latest prices of the next stored fixture between two teams (either order)"""
+        with Session(self.engine) as session:
+            prices = session.exec(
+                select(OddsPrice)
+                .where(OddsPrice.bookmaker_id == ODDS_BOOKMAKER)
+                .where(OddsPrice.kickoff > datetime.utcnow())
+                .where(
+                    ((OddsPrice.home_team_id == home_id) & (OddsPrice.away_team_id == away_id))
+                    | ((OddsPrice.home_team_id == away_id) & (OddsPrice.away_team_id == home_id))
+                )
+                .order_by(OddsPrice.kickoff)
+            ).all()
+        if not prices:
+            return None
+        first = prices[0]
+        return {
+            "fixture_id": first.fixture_id,
+            "kickoff": first.kickoff,
+            # Markets are from the listed home side's point of view
+            "home_team_id": first.home_team_id,
+            "odds": {price.market: price.odd for price in prices if price.fixture_id == first.fixture_id},
+            "updated_at": max(price.updated_at for price in prices if price.fixture_id == first.fixture_id),
+        }
+
+    def movements(self, fixture_id: int, bookmaker_id: int = ODDS_BOOKMAKER) -> List[Dict]:
+        """Recorded price changes of a fixture, oldest first"""
+        with Session(self.engine) as session:
+            rows = session.exec(
+                select(OddsMovement)
+                .where(OddsMovement.fixture_id == fixture_id)
+                .where(OddsMovement.bookmaker_id == bookmaker_id)
+                .order_by(OddsMovement.recorded_at, OddsMovement.id)
+            ).all()
+        return [
+            {"market": row.market, "previous_odd": row.previous_odd, "odd": row.odd, "recorded_at": row.recorded_at}
+            for row in rows
+        ]
+
+    async def run_periodically(self, interval: int = ODDS_REFRESH_INTERVAL):
+        """Keep today's and tomorrow's prices current (pages fetch on their own schedule)"""
+        while True:
+            now = datetime.utcnow()
+            for date_str in [now.strftime("%Y-%m-%d"), (now + timedelta(days=1)).strftime("%Y-%m-%d")]:
+                try:
+                    await self.refresh_date(date_str)
+                except Exception as e:
+                    logger.error(f"[ODDS] Refresh of {date_str} failed: {str(e)}")
+            await asyncio.sleep(interval)
+
+
+# Singleton instance
+odds_store = OddsStore()
@@ -3,13 +3,26 @@ Picks Engine - Generates daily picks for Elite users
 Analyzes fixtures from today and tomorrow, selects top 10 games,
 and generates betting recommendations using the same pipeline as the chatbot.
 """
+import asyncio
+import codecs
+import hashlib
+import heapq
 import httpx
 import os
 import logging
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
 from dotenv import load_dotenv
 
+from match_history import match_history
+from model_engine import score_model
+from ratings import rating_engine
+from league_baselines import league_baselines
+from json_stream import ArrayItemDecoder
+from picks_store import picks_store
+from odds_store import odds_store, pick_market_key, _kickoff
+from models import PicksSnapshot
+
 load_dotenv(dotenv_path="../.env")
 
 logger = logging.getLogger(__name__)
@@ -62,6 +75,53 @@ ALL_PRIORITY_LEAGUES = (
     PRIORITY_LEAGUES["tier3"]
 )
 
+PRIORITY_LEAGUE_IDS = frozenset(ALL_PRIORITY_LEAGUES)
+
+# Leagues whose season is the calendar year (others start mid-year)
+CALENDAR_YEAR_LEAGUES = frozenset([71, 72, 73, 13, 11, 128, 475, 476, 477, 478])
+
+# Fixture fetch strategy cost model (per-date vs per-league)
+REQUEST_COST_BYTES = 10_000_000         # One quota request valued as this many (streamed) downloaded bytes
+DEFAULT_DATE_PAYLOAD_BYTES = 3_000_000  # Full worldwide day, until observed
+DEFAULT_LEAGUE_PAYLOAD_BYTES = 20_000   # One league on one day, until observed
+PAYLOAD_EWMA_ALPHA = 0.3
+QUOTA_RESERVE = 200                     # Requests kept for chat analyses
+FETCH_CONCURRENCY = 5
+
+# Top-K picks selection
+TOP_PICKS = 10
+ANALYSIS_CONCURRENCY = 5
+ANALYSIS_TIME_BUDGET = 60      # Seconds for the whole selection
+ANALYSIS_BUDGET_FACTOR = 3     # At most K * factor fixtures analyzed (2 API calls each)
+
+# Statuses of games that can still be picked
+UPCOMING_STATUSES = ["NS", "TBD", "SUSP", "PST"]
+FINISHED_STATUSES = ["FT", "AET", "PEN"]
+
+# Shared generation (one worker at a time, others wait for its snapshot)
+GENERATION_LOCK_TTL = 180      # Seconds before a crashed worker's lock expires
+GENERATION_WAIT = 90           # Seconds to wait for another worker's snapshot
+GENERATION_POLL_INTERVAL = 1.0
+
+# Rolling multi-day window (one stored slate per day)
+WINDOW_DAYS = int(os.getenv("PICKS_WINDOW_DAYS", "7"))
+MAX_WINDOW_DAYS = 14
+WINDOW_PICKS_PER_DAY = 5
+NEAR_DAY_REFRESH_TTL = 1800        # Today and tomorrow
+FAR_DAY_REFRESH_TTL = 6 * 3600     # Later days change rarely
+
+# Carried-over analyses are redone at least this often, even if unchanged
+ANALYSIS_MAX_AGE = 6 * 3600
+
+# Finished fixtures of a streamed listing are stored in batches of this size
+HISTORY_INGEST_BATCH = 200
+
+# Percentage points a goal-market rate must sit above/below the league base rate
+BASELINE_MARGIN = 10
+
+# Awaited with each fixture's analysis as soon as it finishes (streaming)
+ResultCallback = Optional[Callable[[Dict], Awaitable[None]]]
+
 class PicksEngine:
     def __init__(self):
         self.api_key = os.getenv("APISPORTS_KEY")
@@ -71,6 +131,24 @@ class PicksEngine:
         self.cache = {}
         self.CACHE_TTL = 1800  # 30 minutes
         
+        # Observed fetch costs (drive the per-date vs per-league choice)
+        self._payload_bytes: Dict[str, float] = {}
+        self._quota_remaining: Optional[int] = None
+        self._league_seasons: Dict[int, int] = {}
+        
+        # date -> {"fixtures", "timestamp", "kickoffs"} of the last complete listing (reused by
+        # the odds store); kickoffs holds every team's earliest game of a full-day listing
+        self._fixture_lists: Dict[str, Dict] = {}
+        
+        # Published snapshots and the generation lock (shared by all workers)
+        self.store = picks_store
+        
+        # Stored bookmaker prices (read only, refreshed by the odds scheduler)
+        self.odds = odds_store
+        
+        # fixture_id -> {"fingerprint", "result", "analyzed_at"} from previous runs
+        self._analyses: Dict[int, Dict] = {}
+        
     def _is_cache_valid(self, cache_key: str) -> bool:
         if cache_key not in self.cache:
             return False
@@ -107,9 +185,266 @@ class PicksEngine:
             logger.error(f"API request failed: {str(e)}")
             return []
     
+    def _is_pickable(self, fixture: Dict) -> bool:
+        """Upcoming fixture from a priority league"""
+        status = fixture.get("fixture", {}).get("status", {}).get("short", "")
+        league_id = fixture.get("league", {}).get("id")
+        return status in UPCOMING_STATUSES and league_id in PRIORITY_LEAGUE_IDS
+    
+    async def _stream_fixtures(self, client: httpx.AsyncClient, params: Dict, usage: Dict,
+                               kickoffs: Dict[int, datetime] = None) -> List[Dict]:
+        """Stream a fixtures payload, keeping only pickable fixtures
+        
+        The payload is decoded incrementally while it downloads and
+        non-pickable fixtures are dropped as soon as they are parsed (the
+        finished ones after being stored in the match history, in batches),
+        so a full-day list (often >1,000 entries, several MB) is never held
+        in memory. Request count and downloaded bytes are added to `usage`.
+        With `kickoffs`, the earliest kickoff of every team with a game not
+        yet finished (any league) is recorded in it.
+        """
+        url = f"{self.base_url}/fixtures"
+        headers = {"x-apisports-key": self.api_key}
+        decoder = ArrayItemDecoder("response")
+        kept = []
+        finished = []
+        
+        usage["requests"] += 1
+        async with client.stream("GET", url, headers=headers, params=params) as response:
+            response.raise_for_status()
+            self._record_quota(response)
+            text = codecs.getincrementaldecoder("utf-8")()
+            async for chunk in response.aiter_bytes():
+                usage["bytes"] += len(chunk)
+                for fixture in decoder.feed(text.decode(chunk)):
+                    if kickoffs is not None:
+                        self._record_kickoff(fixture, kickoffs)
+                    if self._is_pickable(fixture):
+                        kept.append(fixture)
+                    elif fixture.get("fixture", {}).get("status", {}).get("short") in FINISHED_STATUSES:
+                        finished.append(fixture)
+                        if len(finished) >= HISTORY_INGEST_BATCH:
+                            match_history.ingest(finished)
+                            finished = []
+                if decoder.done:
+                    break
+        
+        # Quota, rate-limit and token failures come back as 200 with an empty response
+        errors = decoder.head_value("errors")
+        if errors:
+            raise ValueError(f"API-Sports errors: {errors}")
+        decoder.close()
+        
+        # Finished games of any league (cups included) tell us which teams have new results
+        match_history.ingest(finished)
+        
+        for f in kept:
+            league = f.get("league", {})
+            if league.get("season"):
+                self._league_seasons[league["id"]] = league["season"]
+        return kept
+    
+    def _record_kickoff(self, fixture: Dict, kickoffs: Dict[int, datetime]):
+        """Keep each team's earliest game that is not finished yet"""
+        if fixture.get("fixture", {}).get("status", {}).get("short") in FINISHED_STATUSES:
+            return
+        kickoff = _kickoff(fixture)
+        if kickoff is None:
+            return
+        for side in ["home", "away"]:
+            team_id = fixture.get("teams", {}).get(side, {}).get("id")
+            if team_id and (team_id not in kickoffs or kickoff < kickoffs[team_id]):
+                kickoffs[team_id] = kickoff
+    
+    def team_kickoffs(self, dates: List[str]) -> Optional[Dict[int, datetime]]:
+        """Earliest kickoff per team on the dates, in any competition
+        
+        Read from the last full-day listings of the dates (no request).
+        None when a date has none - not listed yet, or listed per league,
+        which leaves out cup and non-priority games.
+        """
+        merged: Dict[int, datetime] = {}
+        for date_str in dates:
+            listing = self._fixture_lists.get(date_str)
+            if not listing or listing.get("kickoffs") is None:
+                return None
+            for team_id, kickoff in listing["kickoffs"].items():
+                if team_id not in merged or kickoff < merged[team_id]:
+                    merged[team_id] = kickoff
+        return merged
+    
+    def _record_quota(self, response: httpx.Response):
+        """Remember the remaining daily quota reported by the API"""
+        remaining = response.headers.get("x-ratelimit-requests-remaining")
+        if remaining is not None and remaining.isdigit():
+            self._quota_remaining = int(remaining)
+    
+    def _observe_payload(self, strategy: str, calls: int, num_bytes: int):
+        """Update the moving average of payload size per call"""
+        if not calls:
+            return
+        per_call = num_bytes / calls
+        previous = self._payload_bytes.get(strategy)
+        self._payload_bytes[strategy] = per_call if previous is None else (
+            PAYLOAD_EWMA_ALPHA * per_call + (1 - PAYLOAD_EWMA_ALPHA) * previous
+        )
+    
+    def _season_for(self, league_id: int, date_str: str) -> int:
+        """Season of a league on a date (learned from the API, else by calendar)"""
+        if league_id in self._league_seasons:
+            return self._league_seasons[league_id]
+        date = datetime.strptime(date_str, "%Y-%m-%d")
+        if league_id in CALENDAR_YEAR_LEAGUES:
+            return date.year
+        return date.year if date.month >= 7 else date.year - 1
+    
+    def _choose_fetch_strategy(self, dates: List[str]) -> Tuple[str, Dict]:
+        """Pick per-date or per-league fetching by estimated cost
+        
+        Each request is valued at REQUEST_COST_BYTES on top of its expected
+        download - the streamed per-date payload is cheap in memory, quota
+        is not - so per-date is the default. Per-league fetching is only
+        considered once the API has reported a daily quota that can absorb
+        it with QUOTA_RESERVE left for chat analyses.
+        """
+        date_calls = len(dates)
+        league_calls = len(dates) * len(PRIORITY_LEAGUE_IDS)
+        date_bytes = self._payload_bytes.get("per_date") or DEFAULT_DATE_PAYLOAD_BYTES
+        league_bytes = self._payload_bytes.get("per_league") or DEFAULT_LEAGUE_PAYLOAD_BYTES
+        
+        estimate = {
+            "per_date": {"requests": date_calls, "bytes": int(date_calls * date_bytes)},
+            "per_league": {"requests": league_calls, "bytes": int(league_calls * league_bytes)},
+        }
+        cost = {
+            name: est["requests"] * REQUEST_COST_BYTES + est["bytes"]
+            for name, est in estimate.items()
+        }
+        
+        if self._quota_remaining is None or self._quota_remaining < league_calls + QUOTA_RESERVE:
+            strategy = "per_date"
+        else:
+            strategy = min(cost, key=cost.get)
+        return strategy, estimate
+    
+    async def fetch_pickable_fixtures(self, dates: List[str], max_age: int = None) -> Tuple[List[Dict], Dict]:
+        """Fetch upcoming priority-league fixtures for the given dates
+        
+        Returns the fixtures and a report of the strategy used and its cost.
+        Failed requests, and per-league requests that came back empty for a
+        season guessed by calendar, are listed in the report - the slate
+        may be incomplete (`complete` is False).
+        
+        With max_age, dates whose last complete listing is younger than
+        max_age seconds are served from it (`cached_dates`) and only the
+        rest is requested.
+        """
+        now = datetime.utcnow().timestamp()
+        cached_dates = [
+            date_str for date_str in dates
+            if max_age is not None and date_str in self._fixture_lists
+            and now - self._fixture_lists[date_str]["timestamp"] < max_age
+        ]
+        cached = [f for date_str in cached_dates for f in self._fixture_lists[date_str]["fixtures"]]
+        dates = [date_str for date_str in dates if date_str not in cached_dates]
+        if not dates:
+            return cached, {
+                "strategy": "cache", "requests": 0, "bytes": 0, "quota_remaining": self._quota_remaining,
+                "estimate": {}, "complete": True, "failed": [], "unverified_seasons": [], "cached_dates": cached_dates,
+            }
+        
+        strategy, estimate = self._choose_fetch_strategy(dates)
+        usage = {"requests": 0, "bytes": 0}
+        failed, unverified = [], []
+        
+        if not self.api_key:
+            logger.error("APISPORTS_KEY not configured!")
+            return [], {
+                "strategy": strategy, "estimate": estimate, **usage, "quota_remaining": self._quota_remaining,
+                "complete": False, "failed": [{"error": "APISPORTS_KEY not configured"}], "unverified_seasons": [],
+                "cached_dates": [],
+            }
+        
+        if strategy == "per_league":
+            params_list = [
+                {"date": date_str, "league": league_id, "season": self._season_for(league_id, date_str)}
+                for date_str in dates
+                for league_id in ALL_PRIORITY_LEAGUES
+            ]
+        else:
+            params_list = [{"date": date_str} for date_str in dates]
+        
+        semaphore = asyncio.Semaphore(FETCH_CONCURRENCY)
+        
+        # Seasons not learned from the API yet are a calendar guess
+        guessed = {league_id for league_id in ALL_PRIORITY_LEAGUES if league_id not in self._league_seasons}
+        
+        # Payload sizes of the successful requests only (error replies are tiny)
+        observed = {"requests": 0, "bytes": 0}
+        
+        # Full-day listings also record every team's next kickoff
+        team_kickoffs: Dict[str, Dict[int, datetime]] = {}
+        
+        async def fetch(client, params):
+            request_usage = {"requests": 0, "bytes": 0}
+            kickoffs = {} if strategy == "per_date" else None
+            async with semaphore:
+                try:
+                    fixtures = await self._stream_fixtures(client, params, request_usage, kickoffs)
+                except Exception as e:
+                    logger.error(f"API request failed ({params}): {str(e)}")
+                    failed.append({**params, "error": str(e)})
+                    return []
+                finally:
+                    for key in usage:
+                        usage[key] += request_usage[key]
+            for key in observed:
+                observed[key] += request_usage[key]
+            if kickoffs is not None:
+                team_kickoffs[params["date"]] = kickoffs
+            if not fixtures and params.get("league") in guessed:
+                unverified.append(params)
+            return fixtures
+        
+        async with httpx.AsyncClient(timeout=15.0) as client:
+            results = await asyncio.gather(*(fetch(client, params) for params in params_list))
+        
+        self._observe_payload(strategy, observed["requests"], observed["bytes"])
+        fixtures = [f for batch in results for f in batch]
+        
+        # Only complete listings of a date are kept for reuse (a failed or
+        # error reply leaves the date to be fetched again by the next caller)
+        incomplete = {params["date"] for params in failed + unverified}
+        by_date: Dict[str, List[Dict]] = {date_str: [] for date_str in dates}
+        for params, batch in zip(params_list, results):
+            by_date[params["date"]].extend(batch)
+        for date_str, batch in by_date.items():
+            if date_str not in incomplete:
+                self._fixture_lists[date_str] = {"fixtures": batch, "timestamp": now, "kickoffs": team_kickoffs.get(date_str)}
+        
+        report = {
+            "strategy": strategy,
+            "requests": usage["requests"],
+            "bytes": usage["bytes"],
+            "quota_remaining": self._quota_remaining,
+            "estimate": estimate,
+            "complete": not failed and not unverified,
+            "failed": failed,
+            "unverified_seasons": unverified,
+            "cached_dates": cached_dates,
+        }
+        logger.info(f"[PICKS] Fetched {len(fixtures)} pickable fixtures via {strategy}: {usage['requests']} requests, {usage['bytes']} bytes")
+        if failed or unverified:
+            logger.warning(
+                f"[PICKS] Incomplete fixture fetch: {len(failed)} failed requests, "
+                f"{len(unverified)} empty leagues with a guessed season"
+            )
+        return cached + fixtures, report
+    
     async def get_fixtures_by_date(self, date_str: str) -> List[Dict]:
-        """Get all fixtures for a specific date"""
-        return await self._make_request("fixtures", {"date": date_str})
+        """Get upcoming priority-league fixtures for a specific date"""
+        fixtures, _ = await self.fetch_pickable_fixtures([date_str])
+        return fixtures
     
     async def get_team_fixtures(self, team_id: int, last: int = 10) -> List[Dict]:
         """Get last N fixtures for a team"""
@@ -131,25 +466,18 @@ class PicksEngine:
             return 3
         return 99  # Not priority
     
-    def _filter_and_rank_fixtures(self, fixtures: List[Dict], max_count: int = 10) -> List[Dict]:
-        """Filter fixtures to priority leagues and rank them"""
-        # Filter only future games from priority leagues
-        now = datetime.utcnow()
-        priority_fixtures = []
+    def _rank_candidates(self, fixtures: List[Dict]) -> List[Tuple]:
+        """Build a heap of pickable fixtures ranked by tier, then kickoff
         
+        Entries are (priority, date, fixture_id, fixture); heapify is O(n)
+        and candidates are popped only as analysis needs them.
+        """
+        candidates = []
         for f in fixtures:
-            fixture_data = f.get("fixture", {})
-            league = f.get("league", {})
-            league_id = league.get("id")
-            status = fixture_data.get("status", {}).get("short", "")
-            
-            # Only not started games
-            if status not in ["NS", "TBD", "SUSP", "PST"]:
-                continue
-            
-            # Check if priority league
-            if league_id not in ALL_PRIORITY_LEAGUES:
+            if not self._is_pickable(f):
                 continue
+            fixture_data = f.get("fixture", {})
+            league_id = f.get("league", {}).get("id")
             
             # Parse date
             try:
@@ -158,19 +486,156 @@ class PicksEngine:
             except:
                 continue
             
-            priority = self._get_league_priority(league_id)
-            priority_fixtures.append({
-                "fixture": f,
-                "priority": priority,
-                "date": game_date,
-                "league_id": league_id
-            })
+            candidates.append((self._get_league_priority(league_id), game_date, fixture_data.get("id") or 0, f))
+        
+        heapq.heapify(candidates)
+        return candidates
+    
+    def _filter_and_rank_fixtures(self, fixtures: List[Dict], max_count: int = 10) -> List[Dict]:
+        """Filter fixtures to priority leagues and rank them"""
+        candidates = self._rank_candidates(fixtures)
+        return [entry[3] for entry in heapq.nsmallest(max_count, candidates)]
+    
+    def _fingerprints(self, candidates: List[Tuple]) -> Dict[int, str]:
+        """Inputs fingerprint per candidate fixture
+        
+        Covers what can change an analysis: kickoff time, status and the
+        latest finished match of either team in the local match history.
+        
+        The history learns new results from every finished fixture of the
+        fetched listings (any official competition) and from the analyses
+        themselves. A result no listing shows - played on a date that is
+        no longer fetched, or outside the per-league requests - leaves the
+        fingerprint unchanged, so it reaches the picks only when the
+        carried-over analysis expires, at most ANALYSIS_MAX_AGE later.
+        """
+        team_ids = set()
+        for entry in candidates:
+            teams = entry[3].get("teams", {})
+            team_ids.add(teams.get("home", {}).get("id"))
+            team_ids.add(teams.get("away", {}).get("id"))
+        team_ids.discard(None)
+        last_fixtures = match_history.last_fixture_ids(list(team_ids))
         
-        # Sort by priority (tier), then by date (earlier first)
-        priority_fixtures.sort(key=lambda x: (x["priority"], x["date"]))
+        fingerprints = {}
+        for entry in candidates:
+            fixture = entry[3]
+            fixture_data = fixture.get("fixture", {})
+            teams = fixture.get("teams", {})
+            home_id = teams.get("home", {}).get("id")
+            away_id = teams.get("away", {}).get("id")
+            inputs = "|".join(str(value) for value in [
+                fixture_data.get("date"),
+                fixture_data.get("status", {}).get("short"),
+                home_id, last_fixtures.get(home_id),
+                away_id, last_fixtures.get(away_id),
+            ])
+            fingerprints[entry[2]] = hashlib.sha1(inputs.encode()).hexdigest()[:16]
+        return fingerprints
+    
+    def _reusable_analysis(self, fixture_id: int, fingerprint: str) -> Optional[Dict]:
+        """Previous analysis entry for a fixture if its inputs are unchanged"""
+        entry = self._analyses.get(fixture_id)
+        if not entry or entry["fingerprint"] != fingerprint:
+            return None
+        if datetime.utcnow().timestamp() - entry["analyzed_at"] > ANALYSIS_MAX_AGE:
+            return None
+        return entry
+    
+    async def _analyze_and_remember(self, entry: Tuple) -> Optional[Dict]:
+        """Analyze a fixture and keep the outcome (including drops) for later runs"""
+        fixture = entry[3]
+        result = await self.analyze_fixture(fixture)
+        # Fingerprint after the analysis, which stores the teams' latest matches
+        fingerprint = self._fingerprints([entry])[entry[2]]
+        if result:
+            result["inputs_fingerprint"] = fingerprint
+        self._analyses[entry[2]] = {
+            "fingerprint": fingerprint,
+            "result": result,
+            "analyzed_at": datetime.utcnow().timestamp(),
+        }
+        return result
+    
+    async def _select_top_picks(self, candidates: List[Tuple], k: int = TOP_PICKS, rebuild: bool = False, on_result: ResultCallback = None) -> Tuple[List[Dict], Dict]:
+        """Analyze ranked candidates concurrently until K fixtures have picks
+        
+        Candidates are popped from the heap in rank order; every fixture
+        dropped for insufficient data or no picks is backfilled with the
+        next one. Stops at K successes, when the heap is empty, or when the
+        time or analysis (API quota) budget runs out.
+        
+        Fixtures whose inputs fingerprint matches a previous run reuse that
+        outcome without any upstream call, unless `rebuild` is set.
+        
+        `on_result` is awaited with each of the first K results as soon as
+        it is available (rank order is only final in the returned list).
+        """
+        fingerprints = self._fingerprints(candidates)
+        deadline = asyncio.get_running_loop().time() + ANALYSIS_TIME_BUDGET
+        max_analyses = k * ANALYSIS_BUDGET_FACTOR
+        results = []
+        pending = set()
+        started = failed = reused = 0
+        stop_reason = None
+        
+        while True:
+            # Keep enough analyses in flight to reach K, within the budgets
+            while (candidates and len(results) + len(pending) < k
+                   and len(pending) < ANALYSIS_CONCURRENCY and started < max_analyses):
+                entry = heapq.heappop(candidates)
+                previous = None if rebuild else self._reusable_analysis(entry[2], fingerprints[entry[2]])
+                if previous:
+                    reused += 1
+                    if previous["result"]:
+                        results.append(previous["result"])
+                        if on_result:
+                            await on_result(previous["result"])
+                    else:
+                        failed += 1
+                    continue
+                pending.add(asyncio.ensure_future(self._analyze_and_remember(entry)))
+                started += 1
+            
+            if not pending:
+                if len(results) < k:
+                    stop_reason = "quota_budget" if started >= max_analyses and candidates else "no_candidates"
+                break
+            
+            timeout = deadline - asyncio.get_running_loop().time()
+            if timeout <= 0:
+                stop_reason = "time_budget"
+                break
+            done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                result = task.result() if not task.exception() else None
+                if result:
+                    results.append(result)
+                    if on_result and len(results) <= k:
+                        await on_result(result)
+                else:
+                    failed += 1
+        
+        for task in pending:
+            task.cancel()
+        
+        # Forget analyses too old to be reused
+        now = datetime.utcnow().timestamp()
+        self._analyses = {
+            fid: entry for fid, entry in self._analyses.items()
+            if now - entry["analyzed_at"] <= ANALYSIS_MAX_AGE
+        }
         
-        # Return top N
-        return [pf["fixture"] for pf in priority_fixtures[:max_count]]
+        report = {
+            "analyzed_success": len(results),
+            "analyzed_failed": failed,
+            "analyzed_total": started,
+            "reused": reused,
+            "backfilled": max(0, started + reused - k),
+            "cancelled": len(pending),
+            "stop_reason": stop_reason,
+        }
+        return results[:k], report
     
     def _calculate_stats(self, fixtures: List[Dict], team_id: int) -> Dict:
         """Calculate statistics from fixtures for a team"""
@@ -245,14 +710,41 @@ class PicksEngine:
             "win_rate": round(wins / total * 100, 1) if total > 0 else 0,
         }
     
-    def _generate_picks_for_match(self, stats_a: Dict, stats_b: Dict, team_a_name: str, team_b_name: str) -> List[Dict]:
-        """Generate betting picks for a match based on team stats"""
+    def _generate_picks_for_match(self, stats_a: Dict, stats_b: Dict, team_a_name: str, team_b_name: str, model: Dict = None, ratings: Dict = None, baseline: Dict = None) -> List[Dict]:
+        """Generate betting picks for a match based on team stats
+        
+        When the score model covers the match, its probabilities replace
+        the simple averages of the two teams' historical rates. Result
+        picks (1X2 / double chance) need opponent-adjusted probabilities,
+        so they only come from the score model or the Elo ratings.
+        
+        With a league baseline, goal-market thresholds are raised/lowered so
+        raw team averages must also stand out from what is normal in that
+        league. Model probabilities already carry the league's effect, so
+        the baseline doesn't apply to them.
+        """
         picks = []
         
+        # Thresholds (global, tightened by the league base rates for raw averages)
+        over_25_min, under_25_max = 50, 45
+        over_15_min = 70
+        btts_min, btts_no_max = 55, 40
+        if baseline and not model:
+            over_25_min = max(over_25_min, baseline["over_2_5_rate"] + BASELINE_MARGIN)
+            under_25_max = min(under_25_max, baseline["over_2_5_rate"] - BASELINE_MARGIN)
+            over_15_min = max(over_15_min, baseline["over_1_5_rate"] + BASELINE_MARGIN / 2)
+            btts_min = max(btts_min, baseline["btts_rate"] + BASELINE_MARGIN)
+            btts_no_max = min(btts_no_max, baseline["btts_rate"] - BASELINE_MARGIN)
+        
         # Calculate combined stats
-        avg_over_25 = (stats_a.get("over_25_rate", 0) + stats_b.get("over_25_rate", 0)) / 2
-        avg_over_15 = (stats_a.get("over_15_rate", 0) + stats_b.get("over_15_rate", 0)) / 2
-        avg_btts = (stats_a.get("btts_rate", 0) + stats_b.get("btts_rate", 0)) / 2
+        if model:
+            avg_over_25 = model["over_2_5"]
+            avg_over_15 = model["over_1_5"]
+            avg_btts = model["btts"]
+        else:
+            avg_over_25 = (stats_a.get("over_25_rate", 0) + stats_b.get("over_25_rate", 0)) / 2
+            avg_over_15 = (stats_a.get("over_15_rate", 0) + stats_b.get("over_15_rate", 0)) / 2
+            avg_btts = (stats_a.get("btts_rate", 0) + stats_b.get("btts_rate", 0)) / 2
         
         # Combined goals
         avg_goals_total = (
@@ -261,7 +753,7 @@ class PicksEngine:
         ) / 2
         
         # Over 2.5 pick
-        if avg_over_25 >= 50:
+        if avg_over_25 >= over_25_min:
             confidence = min(avg_over_25, 99)
             confidence_level = "ALTA" if confidence >= 70 else "MÉDIA" if confidence >= 55 else "BAIXA"
             picks.append({
@@ -272,7 +764,7 @@ class PicksEngine:
             })
         
         # Under 2.5 pick (if low scoring)
-        if avg_over_25 < 45:
+        if avg_over_25 < under_25_max:
             confidence = min(100 - avg_over_25, 99)
             confidence_level = "ALTA" if confidence >= 70 else "MÉDIA" if confidence >= 55 else "BAIXA"
             picks.append({
@@ -283,7 +775,7 @@ class PicksEngine:
             })
         
         # Over 1.5 pick
-        if avg_over_15 >= 70:
+        if avg_over_15 >= over_15_min:
             confidence = min(avg_over_15, 99)
             confidence_level = "ALTA" if confidence >= 80 else "MÉDIA" if confidence >= 70 else "BAIXA"
             picks.append({
@@ -294,7 +786,7 @@ class PicksEngine:
             })
         
         # BTTS pick
-        if avg_btts >= 55:
+        if avg_btts >= btts_min:
             confidence = min(avg_btts, 99)
             confidence_level = "ALTA" if confidence >= 70 else "MÉDIA" if confidence >= 55 else "BAIXA"
             picks.append({
@@ -305,7 +797,7 @@ class PicksEngine:
             })
         
         # BTTS No pick
-        if avg_btts < 40:
+        if avg_btts < btts_no_max:
             confidence = min(100 - avg_btts, 99)
             confidence_level = "ALTA" if confidence >= 70 else "MÉDIA" if confidence >= 55 else "BAIXA"
             picks.append({
@@ -315,6 +807,38 @@ class PicksEngine:
                 "justification": f"Clean sheets: {int(stats_a.get('clean_sheet_rate', 0))}% e {int(stats_b.get('clean_sheet_rate', 0))}%"
             })
         
+        # Result picks (opponent-adjusted)
+        result_probs = model or ratings
+        if result_probs:
+            home_win = result_probs["home_win"]
+            draw = result_probs["draw"]
+            away_win = result_probs["away_win"]
+            if model:
+                justification = f"Modelo: {home_win:.0f}% / {draw:.0f}% / {away_win:.0f}%"
+            else:
+                justification = f"Rating Elo: {ratings['rating_home']:.0f} x {ratings['rating_away']:.0f}"
+            
+            result_pick = None
+            if home_win >= 60:
+                result_pick = (f"Vitória {team_a_name}", home_win)
+            elif away_win >= 55:
+                result_pick = (f"Vitória {team_b_name}", away_win)
+            elif home_win + draw >= 80:
+                result_pick = ("Dupla Chance 1X", home_win + draw)
+            elif away_win + draw >= 80:
+                result_pick = ("Dupla Chance X2", away_win + draw)
+            
+            if result_pick:
+                market, confidence = result_pick
+                confidence = min(confidence, 99)
+                confidence_level = "ALTA" if confidence >= 75 else "MÉDIA" if confidence >= 60 else "BAIXA"
+                picks.append({
+                    "market": market,
+                    "confidence": round(confidence, 1),
+                    "confidence_level": confidence_level,
+                    "justification": justification
+                })
+        
         # Sort by confidence and return top 2
         picks.sort(key=lambda x: x["confidence"], reverse=True)
         return picks[:2]
@@ -341,6 +865,9 @@ class PicksEngine:
             home_fixtures = await self.get_team_fixtures(home_id, 15)
             away_fixtures = await self.get_team_fixtures(away_id, 15)
             
+            # Keep finished matches in the local history (feeds the score model)
+            match_history.ingest(home_fixtures + away_fixtures)
+            
             # Filter official matches (exclude friendlies)
             home_fixtures = self._filter_official_matches(home_fixtures)[:10]
             away_fixtures = self._filter_official_matches(away_fixtures)[:10]
@@ -353,8 +880,13 @@ class PicksEngine:
             stats_home = self._calculate_stats(home_fixtures, home_id)
             stats_away = self._calculate_stats(away_fixtures, away_id)
             
+            # Score model probabilities (None when the league isn't covered locally)
+            model = score_model.price_match(league.get("id"), home_id, away_id)
+            ratings = rating_engine.match_probabilities(home_id, away_id)
+            baseline = league_baselines.get(league.get("id"), league.get("season"))
+            
             # Generate picks
-            picks = self._generate_picks_for_match(stats_home, stats_away, home_name, away_name)
+            picks = self._generate_picks_for_match(stats_home, stats_away, home_name, away_name, model, ratings, baseline)
             
             if not picks:
                 return None
@@ -380,6 +912,20 @@ class PicksEngine:
                     "home": stats_home,
                     "away": stats_away
                 },
+                "model": {
+                    "home_win": model["home_win"],
+                    "draw": model["draw"],
+                    "away_win": model["away_win"],
+                    "expected_goals_home": model["expected_goals_home"],
+                    "expected_goals_away": model["expected_goals_away"],
+                } if model else None,
+                "ratings": ratings,
+                "league_baseline": {
+                    "avg_goals": baseline["avg_goals"],
+                    "over_2_5_rate": baseline["over_2_5_rate"],
+                    "btts_rate": baseline["btts_rate"],
+                    "home_advantage": baseline["home_advantage"],
+                } if baseline else None,
                 "games_analyzed": len(home_fixtures) + len(away_fixtures)
             }
             
@@ -412,38 +958,218 @@ class PicksEngine:
         
         return official
     
-    async def get_daily_picks(self, range_type: str = "both", force_refresh: bool = False) -> Dict:
+    def _seed_from_snapshot(self, snapshot: PicksSnapshot):
+        """Carry over analyses published by any worker (e.g. after a restart)"""
+        analyzed_at = snapshot.generated_at.timestamp()
+        for result in snapshot.payload.get("picks", []):
+            fixture_id = result.get("fixture_id")
+            fingerprint = result.get("inputs_fingerprint")
+            if fixture_id and fingerprint and fixture_id not in self._analyses:
+                self._analyses[fixture_id] = {"fingerprint": fingerprint, "result": result, "analyzed_at": analyzed_at}
+    
+    def _attach_odds(self, results: List[Dict]):
+        """Add the latest stored bookmaker price to each pick (no API call)"""
+        try:
+            odds = self.odds.fixture_odds([r["fixture_id"] for r in results if r.get("fixture_id")])
+        except Exception as e:
+            logger.warning(f"Could not read stored odds: {str(e)}")
+            return
+        for result in results:
+            prices = odds.get(result.get("fixture_id"), {})
+            for pick in result.get("picks", []):
+                market = pick_market_key(pick.get("market", ""), result.get("home_team", ""), result.get("away_team", ""))
+                pick["odd"] = prices.get(market)
+    
+    def _with_odds(self, on_result: ResultCallback) -> ResultCallback:
+        """Wrap a streaming callback so streamed results carry their odds too"""
+        if not on_result:
+            return None
+        
+        async def callback(result: Dict):
+            self._attach_odds([result])
+            await on_result(result)
+        return callback
+    
+    def _snapshot_fingerprint(self, picks: List[Dict]) -> str:
+        """Combined inputs fingerprint of a published slate"""
+        return hashlib.sha1("|".join(sorted(
+            f"{r['fixture_id']}:{r.get('inputs_fingerprint', '')}" for r in picks
+        )).encode()).hexdigest()[:16]
+    
+    def _snapshot_result(self, snapshot: PicksSnapshot) -> Dict:
+        result = snapshot.payload
+        result["meta"]["snapshot_version"] = snapshot.version
+        return result
+    
+    async def get_daily_picks(self, range_type: str = "both", force_refresh: bool = False, rebuild: bool = False, on_result: ResultCallback = None) -> Dict:
         """
         Get daily picks for today and/or tomorrow
         range_type: "today", "tomorrow", or "both"
+        force_refresh: skip the picks cache (unchanged fixtures are still carried over)
+        rebuild: re-analyze every fixture from scratch
+        on_result: awaited with each fixture's picks as they are analyzed
+        (only when this call generates; cached results are returned whole)
+        
+        Picks are published as snapshots in the database: workers serve the
+        latest one and a lock lets a single worker generate at a time.
         """
         cache_key = f"picks_{range_type}"
+        lock_name = f"picks_{range_type}"
         
-        # Check cache
-        if not force_refresh:
+        # Check cache (process-local first, then the shared snapshot)
+        if not force_refresh and not rebuild:
             cached = self._get_cache(cache_key)
             if cached:
                 logger.info(f"Returning cached picks for {range_type}")
                 return cached
+            snapshot = self.store.latest(range_type)
+            if snapshot and datetime.utcnow() - snapshot.generated_at < timedelta(seconds=self.CACHE_TTL):
+                logger.info(f"Returning {range_type} snapshot v{snapshot.version}")
+                result = self._snapshot_result(snapshot)
+                self._set_cache(cache_key, result)
+                return result
+        
+        requested_at = datetime.utcnow()
+        if not self.store.acquire_lock(lock_name, GENERATION_LOCK_TTL):
+            # Another worker is generating - wait for its snapshot
+            logger.info(f"Picks for {range_type} being generated by another worker, waiting")
+            waited = 0.0
+            while waited < GENERATION_WAIT and self.store.is_locked(lock_name):
+                await asyncio.sleep(GENERATION_POLL_INTERVAL)
+                waited += GENERATION_POLL_INTERVAL
+            snapshot = self.store.latest(range_type)
+            if snapshot and (snapshot.generated_at >= requested_at or self.store.is_locked(lock_name)):
+                result = self._snapshot_result(snapshot)
+                self._set_cache(cache_key, result)
+                return result
+            if not self.store.acquire_lock(lock_name, GENERATION_LOCK_TTL):
+                raise RuntimeError(f"Picks generation for {range_type} is locked")
+        
+        try:
+            snapshot = self.store.latest(range_type)
+            if snapshot and not rebuild:
+                self._seed_from_snapshot(snapshot)
+            result = await self._generate_picks(range_type, rebuild, on_result)
+            
+            saved = self.store.save(range_type, result, self._snapshot_fingerprint(result["picks"]))
+            if saved:
+                result = self._snapshot_result(saved)
+        finally:
+            self.store.release_lock(lock_name)
         
+        # Cache result
+        self._set_cache(cache_key, result)
+        
+        return result
+    
+    async def get_window_picks(self, days: int = None, force_refresh: bool = False, on_result: ResultCallback = None) -> Dict:
+        """
+        Get picks for a rolling window of N days starting today
+        
+        Each day's slate is stored as its own snapshot ("day:YYYY-MM-DD").
+        Only days without a slate (normally just the one entering the window
+        at rollover) are analyzed from scratch; stale days are refreshed
+        incrementally, reusing every analysis whose inputs are unchanged.
+        Later days are refreshed less often than today and tomorrow.
+        on_result is awaited with each fixture analyzed for a refreshed day.
+        """
+        days = min(max(days or WINDOW_DAYS, 1), MAX_WINDOW_DAYS)
+        now = datetime.utcnow()
+        dates = [(now + timedelta(days=offset)).strftime("%Y-%m-%d") for offset in range(days)]
+        snapshots = {date_str: self.store.latest(f"day:{date_str}") for date_str in dates}
+        
+        stale = []
+        for offset, date_str in enumerate(dates):
+            snapshot = snapshots[date_str]
+            ttl = NEAR_DAY_REFRESH_TTL if offset < 2 else FAR_DAY_REFRESH_TTL
+            if force_refresh or not snapshot or (now - snapshot.generated_at).total_seconds() > ttl:
+                stale.append(date_str)
+        
+        fetch_report = None
+        slates = {date_str: self._snapshot_result(snapshot) for date_str, snapshot in snapshots.items() if snapshot}
+        
+        # Another worker refreshing the window: serve what is stored
+        if stale and self.store.acquire_lock("picks_window", GENERATION_LOCK_TTL):
+            try:
+                for snapshot in snapshots.values():
+                    if snapshot:
+                        self._seed_from_snapshot(snapshot)
+                
+                logger.info(f"Refreshing picks window days: {', '.join(stale)}")
+                fixtures, fetch_report = await self.fetch_pickable_fixtures(stale)
+                by_date: Dict[str, List[Dict]] = {}
+                for f in fixtures:
+                    by_date.setdefault(f.get("fixture", {}).get("date", "")[:10], []).append(f)
+                
+                for date_str in stale:
+                    candidates = self._rank_candidates(by_date.get(date_str, []))
+                    priority_count = len(candidates)
+                    picks_results, selection_report = await self._select_top_picks(
+                        candidates, k=WINDOW_PICKS_PER_DAY, on_result=self._with_odds(on_result)
+                    )
+                    picks_results.sort(
+                        key=lambda x: max(p["confidence"] for p in x["picks"]) if x["picks"] else 0,
+                        reverse=True
+                    )
+                    self._attach_odds(picks_results)
+                    result = {
+                        "picks": picks_results,
+                        "meta": {
+                            "range": f"day:{date_str}",
+                            "date": date_str,
+                            "generated_at": datetime.utcnow().isoformat(),
+                            "priority_fixtures": priority_count,
+                            **selection_report
+                        }
+                    }
+                    saved = self.store.save(f"day:{date_str}", result, self._snapshot_fingerprint(picks_results))
+                    slates[date_str] = self._snapshot_result(saved) if saved else result
+            finally:
+                self.store.release_lock("picks_window")
+        
+        picks = []
+        day_summaries = []
+        for date_str in dates:
+            slate = slates.get(date_str)
+            if not slate:
+                continue
+            picks.extend(slate["picks"])
+            day_summaries.append({
+                "date": date_str,
+                "picks_count": len(slate["picks"]),
+                "generated_at": slate["meta"].get("generated_at"),
+                "snapshot_version": slate["meta"].get("snapshot_version"),
+                "refreshed": date_str in stale and fetch_report is not None,
+            })
+        
+        return {
+            "picks": picks,
+            "days": day_summaries,
+            "meta": {
+                "range": "window",
+                "window_days": days,
+                "generated_at": datetime.utcnow().isoformat(),
+                "refreshed_days": stale if fetch_report is not None else [],
+                "fetch": fetch_report
+            }
+        }
+    
+    async def _generate_picks(self, range_type: str, rebuild: bool = False, on_result: ResultCallback = None) -> Dict:
+        """Fetch, rank and analyze fixtures for a range"""
         logger.info(f"Generating picks for {range_type}")
         
         # Get dates
         today = datetime.utcnow().strftime("%Y-%m-%d")
         tomorrow = (datetime.utcnow() + timedelta(days=1)).strftime("%Y-%m-%d")
         
-        all_fixtures = []
-        
-        # Fetch fixtures
+        dates = []
         if range_type in ["today", "both"]:
-            today_fixtures = await self.get_fixtures_by_date(today)
-            all_fixtures.extend(today_fixtures)
-            logger.info(f"Fetched {len(today_fixtures)} fixtures for today")
-        
+            dates.append(today)
         if range_type in ["tomorrow", "both"]:
-            tomorrow_fixtures = await self.get_fixtures_by_date(tomorrow)
-            all_fixtures.extend(tomorrow_fixtures)
-            logger.info(f"Fetched {len(tomorrow_fixtures)} fixtures for tomorrow")
+            dates.append(tomorrow)
+        
+        # Fetch fixtures (per-date or per-league, whichever is cheaper)
+        all_fixtures, fetch_report = await self.fetch_pickable_fixtures(dates)
         
         # Remove duplicates by fixture ID
         seen_ids = set()
@@ -456,45 +1182,33 @@ class PicksEngine:
         
         logger.info(f"Total unique fixtures: {len(unique_fixtures)}")
         
-        # Filter and rank to get top 10
-        top_fixtures = self._filter_and_rank_fixtures(unique_fixtures, max_count=10)
-        logger.info(f"Selected {len(top_fixtures)} priority fixtures")
-        
-        # Analyze each fixture
-        picks_results = []
-        analyzed = 0
-        failed = 0
+        # Rank candidates and analyze until the top 10 have picks (backfilling drops)
+        candidates = self._rank_candidates(unique_fixtures)
+        priority_count = len(candidates)
+        logger.info(f"Ranked {priority_count} priority fixtures")
         
-        for fixture in top_fixtures:
-            result = await self.analyze_fixture(fixture)
-            if result:
-                picks_results.append(result)
-                analyzed += 1
-            else:
-                failed += 1
+        picks_results, selection_report = await self._select_top_picks(
+            candidates, k=TOP_PICKS, rebuild=rebuild, on_result=self._with_odds(on_result)
+        )
         
         # Sort by best pick confidence
         picks_results.sort(
             key=lambda x: max(p["confidence"] for p in x["picks"]) if x["picks"] else 0,
             reverse=True
         )
+        self._attach_odds(picks_results)
         
-        result = {
+        return {
             "picks": picks_results,
             "meta": {
                 "range": range_type,
                 "generated_at": datetime.utcnow().isoformat(),
                 "total_fixtures_fetched": len(unique_fixtures),
-                "priority_fixtures": len(top_fixtures),
-                "analyzed_success": analyzed,
-                "analyzed_failed": failed
+                "priority_fixtures": priority_count,
+                **selection_report,
+                "fetch": fetch_report
             }
         }
-        
-        # Cache result
-        self._set_cache(cache_key, result)
-        
-        return result
 
 
 # Singleton instance
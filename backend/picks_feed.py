@@ -0,0 +1,129 @@
+"""
+Picks Feed - push notifications of newly published picks snapshots
+One poll per worker reads the newest snapshot version of every range (a
+single grouped query) and, when one moved, fans a compact message (range,
+version, the diff against the previous version and the results of the
+added/changed fixtures) out to every connected client. A page holding
+the previous version applies it locally, so neither polling nor a new
+snapshot makes clients call /api/picks.
+Polling the shared table rather than hooking the engine means snapshots
+published by any worker reach the clients of all of them.
+"""
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Set
+
+from picks_store import picks_store
+
+logger = logging.getLogger(__name__)
+
+PICKS_FEED_INTERVAL = 5             # Seconds between version checks (only while clients are connected)
+PICKS_FEED_KEEPALIVE = 20           # Seconds of silence before a keepalive comment is sent
+PICKS_FEED_LOOKBACK = timedelta(days=2)  # Older window days no longer change
+SUBSCRIBER_QUEUE_SIZE = 50          # Pending messages per client before the oldest are dropped
+
+
+def _pick_signature(result: Dict) -> str:
+    """What makes a fixture's published picks differ between versions"""
+    markets = ",".join(f"{p.get('market')}:{p.get('confidence')}" for p in result.get("picks", []))
+    return f"{result.get('inputs_fingerprint', '')}|{markets}"
+
+
+def snapshot_diff(previous: Optional[Dict[int, str]], current: Dict[int, str]) -> Dict[str, List[int]]:
+    """Fixture ids added, removed and changed between two published slates"""
+    previous = previous or {}
+    return {
+        "added": [fid for fid in current if fid not in previous],
+        "removed": [fid for fid in previous if fid not in current],
+        "changed": [fid for fid in current if fid in previous and previous[fid] != current[fid]],
+    }
+
+
+class PicksFeed:
+    def __init__(self, store=None):
+        self.store = store or picks_store
+        self._subscribers: Set[asyncio.Queue] = set()
+        # range -> {"version": int, "picks": {fixture_id: signature}}
+        self._known: Dict[str, Dict] = {}
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._subscribers)
+
+    def versions(self) -> Dict[str, int]:
+        """Last version seen of every range"""
+        return {range_type: known["version"] for range_type, known in self._known.items()}
+
+    def subscribe(self) -> asyncio.Queue:
+        """Register a client; its queue receives every snapshot message"""
+        if not self._subscribers:
+            # Nothing was polled while nobody listened: catch up silently
+            self.check(publish=False)
+        queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self._subscribers.discard(queue)
+
+    def publish(self, message: Dict):
+        """Hand one message to every connected client"""
+        for queue in list(self._subscribers):
+            if queue.full():
+                # Slow client: drop its oldest message rather than block the others
+                queue.get_nowait()
+            queue.put_nowait(message)
+
+    def check(self, publish: bool = True) -> List[Dict]:
+        """Publish a message for every range whose snapshot version moved"""
+        messages = []
+        versions = self.store.latest_versions(since=datetime.utcnow() - PICKS_FEED_LOOKBACK)
+        for range_type, version in versions.items():
+            known = self._known.get(range_type)
+            if known and known["version"] >= version:
+                continue
+            snapshot = self.store.latest(range_type)
+            if not snapshot:
+                continue
+
+            picks = snapshot.payload.get("picks", [])
+            signatures = {result.get("fixture_id"): _pick_signature(result) for result in picks}
+            self._known[range_type] = {"version": snapshot.version, "picks": signatures}
+            if not publish:
+                continue
+
+            diff = snapshot_diff(known["picks"] if known else None, signatures)
+            updated = set(diff["added"]) | set(diff["changed"])
+            message = {
+                "range": range_type,
+                "version": snapshot.version,
+                "previous_version": known["version"] if known else None,
+                "generated_at": snapshot.generated_at,
+                "picks_count": snapshot.picks_count,
+                "ranking": [result.get("fixture_id") for result in picks],
+                "diff": diff,
+                # Only what moved - unchanged results are already on the page
+                "results": [result for result in picks if result.get("fixture_id") in updated],
+                "meta": {**snapshot.payload.get("meta", {}), "snapshot_version": snapshot.version},
+            }
+            messages.append(message)
+            self.publish(message)
+
+        if messages:
+            logger.info(f"[PICKS FEED] Pushed {len(messages)} update(s) to {self.subscribers} client(s)")
+        return messages
+
+    async def run_periodically(self, interval: int = PICKS_FEED_INTERVAL):
+        """Check for new snapshots while clients are connected"""
+        while True:
+            if self._subscribers:
+                try:
+                    self.check()
+                except Exception as e:
+                    logger.error(f"[PICKS FEED] Check failed: {str(e)}")
+            await asyncio.sleep(interval)
+
+
+# Singleton instance
+picks_feed = PicksFeed()
@@ -0,0 +1,141 @@
+"""
+Picks Store - published picks snapshots and the generation lock
+Every generation is stored as a versioned snapshot row so all workers
+serve the same picks, restarts keep them, and past publications remain
+queryable. A lease row in the same database makes sure only one worker
+generates a given range at a time.
+"""
+import json
+import logging
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from sqlalchemy import delete, func, update
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, select
+
+from models import PicksSnapshot, GenerationLock
+
+logger = logging.getLogger(__name__)
+
+
+class PicksStore:
+    def __init__(self, engine=None):
+        if engine is None:
+            from database import engine as default_engine
+            engine = default_engine
+        self.engine = engine
+
+        # Identifies this worker as lock owner
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+    def latest(self, range_type: str) -> Optional[PicksSnapshot]:
+        """Most recent snapshot for a range (None if never generated)"""
+        try:
+            with Session(self.engine) as session:
+                return session.exec(
+                    select(PicksSnapshot)
+                    .where(PicksSnapshot.range_type == range_type)
+                    .order_by(PicksSnapshot.version.desc())
+                ).first()
+        except Exception as e:
+            logger.warning(f"[PICKS STORE] Could not read snapshot: {str(e)}")
+            return None
+
+    def save(self, range_type: str, result: Dict, inputs_fingerprint: str = "") -> Optional[PicksSnapshot]:
+        """Store a generated result as the next snapshot version"""
+        # JSON round-trip so datetimes and other values are stored as plain JSON
+        payload = json.loads(json.dumps(result, default=str))
+        try:
+            with Session(self.engine) as session:
+                previous = session.exec(
+                    select(PicksSnapshot.version)
+                    .where(PicksSnapshot.range_type == range_type)
+                    .order_by(PicksSnapshot.version.desc())
+                ).first()
+                snapshot = PicksSnapshot(
+                    range_type=range_type,
+                    version=(previous or 0) + 1,
+                    payload=payload,
+                    picks_count=len(payload.get("picks", [])),
+                    inputs_fingerprint=inputs_fingerprint,
+                )
+                session.add(snapshot)
+                session.commit()
+                session.refresh(snapshot)
+                logger.info(f"[PICKS STORE] Saved {range_type} snapshot v{snapshot.version} ({snapshot.picks_count} picks)")
+                return snapshot
+        except Exception as e:
+            logger.error(f"[PICKS STORE] Could not save snapshot: {str(e)}")
+            return None
+
+    def latest_versions(self, since: datetime = None) -> Dict[str, int]:
+        """Newest snapshot version of every range, in one query"""
+        query = select(PicksSnapshot.range_type, func.max(PicksSnapshot.version)).group_by(PicksSnapshot.range_type)
+        if since:
+            query = query.where(PicksSnapshot.generated_at >= since)
+        try:
+            with Session(self.engine) as session:
+                return {range_type: version for range_type, version in session.exec(query).all()}
+        except Exception as e:
+            logger.warning(f"[PICKS STORE] Could not read versions: {str(e)}")
+            return {}
+
+    def history(self, range_type: str = None, limit: int = 20) -> List[PicksSnapshot]:
+        """Published snapshots, newest first"""
+        with Session(self.engine) as session:
+            query = select(PicksSnapshot)
+            if range_type:
+                query = query.where(PicksSnapshot.range_type == range_type)
+            return session.exec(query.order_by(PicksSnapshot.generated_at.desc()).limit(limit)).all()
+
+    def acquire_lock(self, name: str, ttl_seconds: int) -> bool:
+        """Take the named lease if it is free, expired or already ours"""
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=ttl_seconds)
+        try:
+            with Session(self.engine) as session:
+                session.add(GenerationLock(name=name, owner=self.owner, acquired_at=now, expires_at=expires_at))
+                session.commit()
+                return True
+        except IntegrityError:
+            pass
+        except Exception as e:
+            logger.warning(f"[PICKS STORE] Could not take lock {name}: {str(e)}")
+            return False
+
+        # Lock row exists: take it over only if expired (or re-entrant)
+        with Session(self.engine) as session:
+            result = session.exec(
+                update(GenerationLock)
+                .where(GenerationLock.name == name)
+                .where((GenerationLock.expires_at < now) | (GenerationLock.owner == self.owner))
+                .values(owner=self.owner, acquired_at=now, expires_at=expires_at)
+            )
+            session.commit()
+            return result.rowcount == 1
+
+    def release_lock(self, name: str):
+        """Release the named lease if we hold it"""
+        try:
+            with Session(self.engine) as session:
+                session.exec(
+                    delete(GenerationLock)
+                    .where(GenerationLock.name == name)
+                    .where(GenerationLock.owner == self.owner)
+                )
+                session.commit()
+        except Exception as e:
+            logger.warning(f"[PICKS STORE] Could not release lock {name}: {str(e)}")
+
+    def is_locked(self, name: str) -> bool:
+        """Whether another worker currently holds the named lease"""
+        with Session(self.engine) as session:
+            lock = session.get(GenerationLock, name)
+            return bool(lock and lock.expires_at > datetime.utcnow() and lock.owner != self.owner)
+
+
+# Singleton instance
+picks_store = PicksStore()
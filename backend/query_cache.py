@@ -0,0 +1,56 @@
+"""
+Query Cache - front door of the chat: normalized message -> parsed match
+Popular messages ("Arsenal x Chelsea", "arsenal vs chelsea", "ARSENAL x
+CHELSEA over 2,5") are normalized to one key that maps straight to the
+parsed markets/odds and the resolved teams, so a repeated query skips
+parsing, the LLM and team resolution altogether.
+"""
+import logging
+import re
+import unicodedata
+from typing import Dict, Optional
+
+from ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+QUERY_CACHE_TTL = 86400             # Seconds a parsed/resolved query is trusted
+QUERY_CACHE_SIZE = 5000             # Entries kept, least recently used evicted first
+
+# Matchup separators, all mapped to " x "
+SEPARATORS = r"\s+(?:x|vs\.?|versus|v|contra|×)\s+|\s+-\s+"
+
+# Market phrasings the parser treats alike, mapped to one token
+MARKET_SYNONYMS = [
+    (r"\b(?:mais de|acima de)\s*(\d)", r"over \1"),
+    (r"\b(?:menos de|abaixo de)\s*(\d)", r"under \1"),
+    (r"\b(?:ambas?|ambos?)\s*marcam?\b|\bboth\s*teams?\s*(?:to\s*)?score\b", "btts"),
+    (r"\b(\d+(?:\.\d+)?)\s*gols?\b|\b(\d+(?:\.\d+)?)\s*goals?\b", lambda m: m.group(1) or m.group(2)),
+]
+
+
+def normalize_query(text: str) -> str:
+    """Case, accents, separators, spacing and market/odd tokens canonicalized"""
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    text = re.sub(r"(\d),(\d)", r"\1.\2", text)
+    text = re.sub(r"@\s+", "@", text)
+    text = re.sub(r"odds?\s*[:=]?\s*(\d)", r"@\1", text)
+    text = re.sub(r"[!?¡¿\"']", " ", text)
+    text = re.sub(SEPARATORS, " x ", f" {text} ")
+    for pattern, replacement in MARKET_SYNONYMS:
+        text = re.sub(pattern, replacement, text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+class QueryCache(TTLCache):
+    def __init__(self, ttl: int = QUERY_CACHE_TTL, size: int = QUERY_CACHE_SIZE):
+        super().__init__(ttl, size)
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Parsed match for a normalized message (None when missing or expired)"""
+        return super().get(key)
+
+    def set(self, key: str, parsed: Dict):
+        """Remember a parsed match: {"teams_text", "markets", "odds", "teams": [team, team]}"""
+        super().set(key, parsed)
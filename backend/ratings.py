@@ -0,0 +1,193 @@
+"""
+Ratings Engine - Elo-style team strength
+Ratings are updated incrementally (O(1) per match) as finished fixtures
+land in the local match history, persisted in the database, and used by
+the chat and picks paths to account for opponent quality without any
+extra upstream calls.
+"""
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional
+from sqlalchemy import case, or_, update
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, select
+
+from match_history import match_history
+from models import TeamRating
+
+logger = logging.getLogger(__name__)
+
+INITIAL_RATING = 1500.0
+K_FACTOR = 20.0
+HOME_ADVANTAGE = 60.0        # Elo points added to the home side
+MAX_DRAW_PROBABILITY = 0.30  # Draw share when both sides are level
+MIN_RATED_MATCHES = 5        # A rating needs this many matches before it prices a game
+CACHE_TTL = 300              # Reload ratings written by other workers every 5 minutes
+
+
+class RatingEngine:
+    def __init__(self, engine=None):
+        if engine is None:
+            from database import engine as default_engine
+            engine = default_engine
+        self.engine = engine
+
+        # team_id -> rating / matches rated (read cache)
+        self._ratings: Dict[int, float] = {}
+        self._matches: Dict[int, int] = {}
+        self._loaded_at = 0.0
+
+    def _margin_multiplier(self, goal_diff: int) -> float:
+        """World Football Elo goal-difference multiplier"""
+        goal_diff = abs(goal_diff)
+        if goal_diff <= 1:
+            return 1.0
+        if goal_diff == 2:
+            return 1.5
+        return (11 + goal_diff) / 8
+
+    def expected_home(self, home_rating: float, away_rating: float) -> float:
+        """Expected score (0-1) of the home side"""
+        return 1 / (1 + 10 ** (-(home_rating + HOME_ADVANTAGE - away_rating) / 400))
+
+    def update(self, fixtures: List[Dict]):
+        """Apply newly stored finished fixtures (oldest first) to the ratings
+
+        Only the teams involved are read and written, so the cost is O(1)
+        per match - ratings are never recomputed from scratch. Elo depends
+        on match order, so a fixture played before either team's last rated
+        match (a late backfill of older results) is skipped, and a team's
+        last_fixture_id/last_match_date only ever move forward.
+        """
+        if not fixtures:
+            return
+
+        team_ids = set()
+        for f in fixtures:
+            team_ids.add(f["home_team_id"])
+            team_ids.add(f["away_team_id"])
+
+        with Session(self.engine) as session:
+            rows = {
+                row.team_id: row for row in session.exec(
+                    select(TeamRating).where(TeamRating.team_id.in_(list(team_ids)))
+                ).all()
+            }
+        current = {team_id: rows[team_id].rating if team_id in rows else INITIAL_RATING for team_id in team_ids}
+        last_dates = {team_id: rows[team_id].last_match_date for team_id in rows}
+
+        # Changes are written as increments, so updates made by other
+        # workers in the meantime add up instead of being overwritten
+        changes = {}
+        skipped = 0
+        for f in sorted(fixtures, key=lambda x: x["date"]):
+            home_id, away_id = f["home_team_id"], f["away_team_id"]
+            if any(last_dates.get(team_id) and f["date"] <= last_dates[team_id] for team_id in (home_id, away_id)):
+                skipped += 1
+                continue
+            goal_diff = f["home_goals"] - f["away_goals"]
+            actual = 1.0 if goal_diff > 0 else 0.5 if goal_diff == 0 else 0.0
+            delta = K_FACTOR * self._margin_multiplier(goal_diff) * (actual - self.expected_home(current[home_id], current[away_id]))
+
+            for team_id, change in [(home_id, delta), (away_id, -delta)]:
+                current[team_id] += change
+                last_dates[team_id] = f["date"]
+                changes.setdefault(team_id, {"delta": 0.0, "matches": 0})
+                changes[team_id]["delta"] += change
+                changes[team_id]["matches"] += 1
+                changes[team_id]["last_fixture_id"] = f["fixture_id"]
+                changes[team_id]["last_match_date"] = f["date"]
+
+        if skipped:
+            logger.info(f"[RATINGS] Skipped {skipped} fixtures older than a team's last rated match")
+        if not changes:
+            return
+
+        for team_id in set(changes) - set(rows):
+            try:
+                with Session(self.engine) as session:
+                    session.add(TeamRating(team_id=team_id, rating=INITIAL_RATING))
+                    session.commit()
+            except IntegrityError:
+                pass  # Created by another worker meanwhile
+
+        with Session(self.engine) as session:
+            now = datetime.utcnow()
+            for team_id, change in changes.items():
+                newer = or_(TeamRating.last_match_date.is_(None), TeamRating.last_match_date < change["last_match_date"])
+                session.exec(
+                    update(TeamRating)
+                    .where(TeamRating.team_id == team_id)
+                    .values(
+                        rating=TeamRating.rating + change["delta"],
+                        matches=TeamRating.matches + change["matches"],
+                        # Another worker may have rated a later match meanwhile
+                        last_fixture_id=case(
+                            (newer, change["last_fixture_id"]), else_=TeamRating.last_fixture_id
+                        ),
+                        last_match_date=case(
+                            (newer, change["last_match_date"]), else_=TeamRating.last_match_date
+                        ),
+                        updated_at=now,
+                    )
+                )
+            session.commit()
+
+            for row in session.exec(select(TeamRating).where(TeamRating.team_id.in_(list(changes)))).all():
+                self._ratings[row.team_id] = row.rating
+                self._matches[row.team_id] = row.matches
+
+        logger.info(f"[RATINGS] Applied {len(fixtures) - skipped} fixtures ({len(changes)} teams updated)")
+
+    def _refresh(self):
+        """Reload all ratings if the read cache is stale"""
+        now = datetime.utcnow().timestamp()
+        if now - self._loaded_at < CACHE_TTL:
+            return
+        try:
+            with Session(self.engine) as session:
+                rows = session.exec(select(TeamRating)).all()
+                self._ratings = {row.team_id: row.rating for row in rows}
+                self._matches = {row.team_id: row.matches for row in rows}
+            self._loaded_at = now
+        except Exception as e:
+            logger.warning(f"[RATINGS] Could not load ratings: {str(e)}")
+
+    def get_rating(self, team_id: int) -> Optional[float]:
+        """Current rating of a team (None if it has no stored matches yet)"""
+        self._refresh()
+        return self._ratings.get(team_id)
+
+    def get_ratings(self, team_ids: List[int]) -> Dict[int, float]:
+        """Current ratings for several teams (unknown teams omitted)"""
+        self._refresh()
+        return {tid: self._ratings[tid] for tid in team_ids if tid in self._ratings}
+
+    def match_probabilities(self, home_id: int, away_id: int) -> Optional[Dict]:
+        """Strength-adjusted 1X2 probabilities (%) for a matchup
+
+        None if a team is unrated or has fewer than MIN_RATED_MATCHES
+        matches - a new team's rating is still close to the initial one.
+        """
+        home_rating = self.get_rating(home_id)
+        away_rating = self.get_rating(away_id)
+        if home_rating is None or away_rating is None:
+            return None
+        if min(self._matches.get(home_id, 0), self._matches.get(away_id, 0)) < MIN_RATED_MATCHES:
+            return None
+
+        expected = self.expected_home(home_rating, away_rating)
+        # Draws are most likely between level sides and fade as the gap grows
+        draw = MAX_DRAW_PROBABILITY * (1 - abs(2 * expected - 1))
+        return {
+            "rating_home": round(home_rating, 1),
+            "rating_away": round(away_rating, 1),
+            "home_win": round((expected - draw / 2) * 100, 1),
+            "draw": round(draw * 100, 1),
+            "away_win": round((1 - expected - draw / 2) * 100, 1),
+        }
+
+
+# Singleton instance - ratings follow the local match history
+rating_engine = RatingEngine()
+match_history.subscribe(rating_engine.update)
@@ -0,0 +1,186 @@
+"""
+Odds Scanner - bulk value detection across the day's fixtures
+Bookmaker prices of the day's priority fixtures come from the odds store
+(kept current page by page from the paginated odds?date= listing) and are
+compared with the score model (Elo for result markets when the model
+doesn't cover a league) in one vectorized pass: implied and margin-free
+probabilities, model probability and edge for every market. The ranked
+list backs the Elite "Scanner de odds".
+"""
+import logging
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from model_engine import score_model, TOTAL_LINES, _line_key
+from odds_store import odds_store, ODDS_BOOKMAKER, BET_MARKETS
+from ratings import rating_engine
+
+logger = logging.getLogger(__name__)
+
+MARKET_LABELS = {
+    "home_win": "Vitória Mandante",
+    "draw": "Empate",
+    "away_win": "Vitória Visitante",
+    "dc_1x": "Dupla Chance 1X",
+    "dc_x2": "Dupla Chance X2",
+    "dc_12": "Dupla Chance 12",
+    "btts": "BTTS Sim",
+    "btts_no": "BTTS Não",
+    **{
+        f"{side}_{_line_key(line)}": f"{side.capitalize()} {line}"
+        for line in TOTAL_LINES for side in ["over", "under"]
+    },
+}
+
+# Model market -> API-Football bet it belongs to
+MARKET_BETS = {market: bet for bet, mapping in BET_MARKETS.items() for market in mapping.values()}
+
+
+def _margin_group(market: str) -> Tuple[str, int]:
+    """Outcome set the bookmaker margin is spread over, and how many of its outcomes win"""
+    if market.startswith(("over_", "under_")):
+        return f"total_{market.split('_', 1)[1]}", 1
+    bet = MARKET_BETS[market]
+    # Two of the three double chance outcomes always win
+    return bet, 2 if bet == "Double Chance" else 1
+
+# Result markets Elo can price when the score model can't
+ELO_MARKETS = {
+    "home_win": ["home_win"],
+    "draw": ["draw"],
+    "away_win": ["away_win"],
+    "dc_1x": ["home_win", "draw"],
+    "dc_x2": ["draw", "away_win"],
+    "dc_12": ["home_win", "away_win"],
+}
+
+
+def value_table(rows: List[Dict], probabilities: np.ndarray) -> Dict[str, np.ndarray]:
+    """Vectorized implied/fair probabilities and edge for odds rows
+
+    `probabilities` holds the model probability (0-1, NaN if unknown) per
+    row. The bookmaker margin is removed per fixture and outcome set (1X2,
+    double chance, BTTS, each goal line).
+    """
+    odds = np.array([row["odd"] for row in rows], dtype=float)
+    groups = {}
+    group_ids, winners = [], []
+    for row in rows:
+        group, winning = _margin_group(row["market"])
+        group_ids.append(groups.setdefault((row["fixture_id"], group), len(groups)))
+        winners.append(winning)
+    group_ids = np.array(group_ids)
+
+    implied = 1 / odds
+    overround = np.bincount(group_ids, weights=implied)[group_ids] / np.array(winners)
+    return {
+        "implied": implied,
+        "fair": implied / overround,
+        "model": probabilities,
+        "edge": probabilities * odds - 1,
+    }
+
+
+class OddsScanner:
+    def __init__(self, store=None, model=None, ratings=None):
+        self.store = store or odds_store
+        self.model = model or score_model
+        self.ratings = ratings or rating_engine
+
+    def _probabilities(self, rows: List[Dict], fixtures: Dict[int, Dict]) -> Tuple[np.ndarray, List[Optional[str]]]:
+        """Model probability (0-1) and its source for every odds row"""
+        fixture_ids = list({row["fixture_id"] for row in rows})
+        matchups = []
+        for fid in fixture_ids:
+            teams = fixtures[fid].get("teams", {})
+            matchups.append((fixtures[fid].get("league", {}).get("id"), teams.get("home", {}).get("id"), teams.get("away", {}).get("id")))
+        priced = dict(zip(fixture_ids, self.model.price_fixtures(matchups)))
+
+        elo = {}
+        probabilities = np.full(len(rows), np.nan)
+        sources = [None] * len(rows)
+        for i, row in enumerate(rows):
+            fid, market = row["fixture_id"], row["market"]
+            model = priced.get(fid)
+            if model and market in model:
+                probabilities[i] = model[market] / 100
+                sources[i] = "model"
+            elif market in ELO_MARKETS:
+                if fid not in elo:
+                    teams = fixtures[fid].get("teams", {})
+                    elo[fid] = self.ratings.match_probabilities(teams.get("home", {}).get("id"), teams.get("away", {}).get("id"))
+                if elo[fid]:
+                    probabilities[i] = sum(elo[fid][key] for key in ELO_MARKETS[market]) / 100
+                    sources[i] = "elo"
+        return probabilities, sources
+
+    async def scan(self, date_str: str, market: str = None, league_id: int = None, min_edge: float = 0.0,
+                   min_odd: float = 1.0, max_odd: float = 100.0, min_probability: float = 0.0, limit: int = 50) -> Dict:
+        """Ranked value list (highest edge first) for a date
+
+        min_edge and min_probability are percentages; market matches a
+        model market key or prefix (e.g. "over", "btts", "dc_").
+        """
+        # Only pages due on their kickoff schedule are fetched
+        refresh = await self.store.refresh_date(date_str)
+        fixtures = await self.store.get_fixtures(date_str)
+        stored = self.store.latest(date_str=date_str)
+        rows = [row for row in stored if row["fixture_id"] in fixtures]
+
+        meta = {
+            "date": date_str,
+            "bookmaker": ODDS_BOOKMAKER,
+            "odds_rows": len(stored),
+            "fixtures_with_odds": len({row["fixture_id"] for row in rows}),
+            "odds_updated_at": max((row["updated_at"] for row in rows), default=None),
+            "odds_requests": refresh["requests"],
+        }
+        if not rows:
+            return {"values": [], "meta": {**meta, "priced_rows": 0}}
+
+        probabilities, sources = self._probabilities(rows, fixtures)
+        table = value_table(rows, probabilities)
+
+        odds_arr = np.array([row["odd"] for row in rows])
+        keep = (
+            ~np.isnan(table["edge"])
+            & (table["edge"] * 100 >= min_edge)
+            & (odds_arr >= min_odd) & (odds_arr <= max_odd)
+            & (table["model"] * 100 >= min_probability)
+        )
+        if market:
+            keep &= np.array([row["market"].startswith(market) for row in rows])
+        if league_id:
+            keep &= np.array([row["league_id"] == league_id for row in rows])
+
+        ranked = np.flatnonzero(keep)[np.argsort(-table["edge"][keep], kind="stable")][:limit]
+
+        values = []
+        for i in ranked:
+            row = rows[i]
+            fixture = fixtures[row["fixture_id"]]
+            teams = fixture.get("teams", {})
+            values.append({
+                "fixture_id": row["fixture_id"],
+                "home_team": teams.get("home", {}).get("name", ""),
+                "away_team": teams.get("away", {}).get("name", ""),
+                "league": fixture.get("league", {}).get("name", ""),
+                "league_id": row["league_id"],
+                "kickoff": fixture.get("fixture", {}).get("date"),
+                "market": row["market"],
+                "market_label": MARKET_LABELS.get(row["market"], row["market"]),
+                "odd": row["odd"],
+                "implied_probability": round(float(table["implied"][i]) * 100, 1),
+                "fair_probability": round(float(table["fair"][i]) * 100, 1),
+                "model_probability": round(float(table["model"][i]) * 100, 1),
+                "edge": round(float(table["edge"][i]) * 100, 1),
+                "source": sources[i],
+            })
+
+        meta["priced_rows"] = int((~np.isnan(probabilities)).sum())
+        return {"values": values, "meta": meta}
+
+
+# Singleton instance
+odds_scanner = OddsScanner()
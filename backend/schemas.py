@@ -31,6 +31,14 @@ class ChatResponse(BaseModel):
     response: str
     timestamp: datetime
 
+class MatchupRequest(BaseModel):
+    home: str
+    away: str
+
+class BatchAnalysisRequest(BaseModel):
+    matches: List[MatchupRequest] = []
+    slip: Optional[str] = None  # Pasted slip, e.g. "Arsenal x Chelsea, Benfica x Porto"
+
 class SubscriptionCreate(BaseModel):
     user_id: int
     plan: str
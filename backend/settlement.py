@@ -0,0 +1,243 @@
+"""
+Pick Settlement - grading of published picks and hit-rate tracking
+Fixtures of published picks (from the stored snapshots) are fetched in
+batched multi-id requests once they are over, every market is graded,
+and running hit counts per market, league and confidence level are
+updated in the same transaction.
+"""
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from sqlmodel import Session, select
+
+from match_history import match_history
+from models import PicksSnapshot, SettledPick, PickHitRate
+from picks_store import picks_store
+
+logger = logging.getLogger(__name__)
+
+FINISHED_STATUSES = ["FT", "AET", "PEN"]
+VOID_STATUSES = ["CANC", "ABD", "AWD", "WO"]
+
+SETTLE_AFTER = timedelta(hours=3)   # After kickoff before the result is requested
+GIVE_UP_AFTER = timedelta(days=7)   # Postponed/unknown fixtures are voided after this
+LOOKBACK = timedelta(days=10)       # Snapshots scanned for published picks
+BATCH_SIZE = 20                     # API-Football max ids per /fixtures request
+MAX_CONCURRENCY = 3
+
+SETTLEMENT_INTERVAL = 3600          # Seconds between settlement runs
+SETTLEMENT_LOCK_TTL = 600
+
+
+def grade_market(market: str, home_goals: int, away_goals: int, home_team: str = "", away_team: str = "") -> Optional[bool]:
+    """Whether a pick won (None if the market is not gradable)"""
+    total = home_goals + away_goals
+    if market == "Over 1.5":
+        return total > 1
+    if market == "Over 2.5":
+        return total > 2
+    if market == "Under 2.5":
+        return total < 3
+    if market == "BTTS Sim":
+        return home_goals > 0 and away_goals > 0
+    if market == "BTTS Não":
+        return home_goals == 0 or away_goals == 0
+    if market == "Dupla Chance 1X":
+        return home_goals >= away_goals
+    if market == "Dupla Chance X2":
+        return away_goals >= home_goals
+    if market.startswith("Vitória "):
+        team = market[len("Vitória "):]
+        if team == home_team:
+            return home_goals > away_goals
+        if team == away_team:
+            return away_goals > home_goals
+    return None
+
+
+def market_group(market: str) -> str:
+    """Market name for hit-rate aggregation (team names dropped)"""
+    return "Vitória" if market.startswith("Vitória ") else market
+
+
+class PickSettlement:
+    def __init__(self, api=None, engine=None):
+        if api is None:
+            from football_api import FootballAPI
+            api = FootballAPI()
+        if engine is None:
+            from database import engine as default_engine
+            engine = default_engine
+        self.api = api
+        self.engine = engine
+
+    def _pending(self) -> Dict[int, Dict]:
+        """Latest published version of every unsettled fixture (fixture_id -> entry)"""
+        since = datetime.utcnow() - LOOKBACK
+        with Session(self.engine) as session:
+            snapshots = session.exec(
+                select(PicksSnapshot)
+                .where(PicksSnapshot.generated_at >= since)
+                .order_by(PicksSnapshot.generated_at)
+            ).all()
+            pending = {}
+            for snapshot in snapshots:
+                for result in snapshot.payload.get("picks", []):
+                    if result.get("fixture_id"):
+                        pending[result["fixture_id"]] = {"snapshot_id": snapshot.id, "result": result}
+            if not pending:
+                return {}
+            settled = set(session.exec(
+                select(SettledPick.fixture_id).where(SettledPick.fixture_id.in_(list(pending.keys())))
+            ).all())
+        return {fid: entry for fid, entry in pending.items() if fid not in settled}
+
+    def _kickoff(self, result: Dict) -> Optional[datetime]:
+        try:
+            kickoff = datetime.fromisoformat(result.get("date_iso", "").replace("Z", "+00:00"))
+            return kickoff.replace(tzinfo=None) - (kickoff.utcoffset() or timedelta(0))
+        except (ValueError, AttributeError):
+            return None
+
+    async def _fetch(self, fixture_ids: List[int]) -> Dict[int, Dict]:
+        """Fetch fixtures in batched multi-id requests"""
+        semaphore = asyncio.Semaphore(MAX_CONCURRENCY)
+
+        async def fetch_batch(batch):
+            async with semaphore:
+                return await self.api.get_fixtures_by_ids(batch)
+
+        batches = [fixture_ids[i:i + BATCH_SIZE] for i in range(0, len(fixture_ids), BATCH_SIZE)]
+        responses = await asyncio.gather(*(fetch_batch(batch) for batch in batches), return_exceptions=True)
+
+        fixtures = {}
+        for response in responses:
+            if isinstance(response, Exception):
+                logger.warning(f"[SETTLEMENT] Batch request failed: {str(response)}")
+                continue
+            for fixture in response:
+                fixtures[fixture.get("fixture", {}).get("id")] = fixture
+        return fixtures
+
+    async def settle(self) -> Dict:
+        """Grade every published pick whose fixture is over"""
+        now = datetime.utcnow()
+        pending = self._pending()
+
+        due, expired = [], []
+        for fid, entry in pending.items():
+            kickoff = self._kickoff(entry["result"])
+            if kickoff is None or now - kickoff > GIVE_UP_AFTER:
+                expired.append(fid)
+            elif now - kickoff > SETTLE_AFTER:
+                due.append(fid)
+
+        fixtures = await self._fetch(due) if due else {}
+        match_history.ingest(list(fixtures.values()))
+
+        rows = []
+        for fid in due + expired:
+            entry = pending[fid]
+            result = entry["result"]
+            fixture = fixtures.get(fid)
+            status = (fixture or {}).get("fixture", {}).get("status", {}).get("short", "")
+
+            if status in FINISHED_STATUSES:
+                # Markets settle on the 90-minute score
+                fulltime = (fixture.get("score") or {}).get("fulltime") or {}
+                goals = fixture.get("goals", {})
+                home_goals = fulltime.get("home") if fulltime.get("home") is not None else goals.get("home")
+                away_goals = fulltime.get("away") if fulltime.get("away") is not None else goals.get("away")
+            elif status in VOID_STATUSES or fid in expired:
+                home_goals = away_goals = None
+            else:
+                continue  # Not over yet (live, postponed...) - retry next run
+
+            for pick in result.get("picks", []):
+                won = None
+                if home_goals is not None and away_goals is not None:
+                    won = grade_market(pick["market"], home_goals, away_goals, result.get("home_team", ""), result.get("away_team", ""))
+                rows.append(SettledPick(
+                    fixture_id=fid,
+                    market=pick["market"],
+                    league=result.get("league", ""),
+                    confidence=pick.get("confidence", 0),
+                    confidence_level=pick.get("confidence_level", ""),
+                    won=won,
+                    home_goals=home_goals,
+                    away_goals=away_goals,
+                    snapshot_id=entry["snapshot_id"],
+                ))
+
+        graded = [row for row in rows if row.won is not None]
+        report = {
+            "pending_fixtures": len(pending),
+            "requested_fixtures": len(due),
+            "requests": (len(due) + BATCH_SIZE - 1) // BATCH_SIZE,
+            "settled_fixtures": len({row.fixture_id for row in rows}),
+            "settled_picks": len(graded),
+            "won": sum(1 for row in graded if row.won),
+            "void_picks": len(rows) - len(graded),
+        }
+        self._store(rows)
+
+        logger.info(f"[SETTLEMENT] {report}")
+        return report
+
+    def _store(self, rows: List[SettledPick]):
+        """Insert settled picks and bump the running hit counts in one transaction"""
+        if not rows:
+            return
+
+        increments: Dict[tuple, List[int]] = {}
+        for row in rows:
+            if row.won is None:
+                continue
+            for key in [("overall", "all"), ("market", market_group(row.market)),
+                        ("league", row.league or "-"), ("confidence_level", row.confidence_level or "-")]:
+                counts = increments.setdefault(key, [0, 0])
+                counts[0] += 1
+                counts[1] += int(row.won)
+
+        with Session(self.engine) as session:
+            session.add_all(rows)
+            now = datetime.utcnow()
+            for (dimension, key), (picks, hits) in increments.items():
+                rate = session.get(PickHitRate, (dimension, key)) or PickHitRate(dimension=dimension, key=key)
+                rate.picks += picks
+                rate.hits += hits
+                rate.updated_at = now
+                session.add(rate)
+            session.commit()
+
+    def hit_rates(self) -> Dict[str, List[Dict]]:
+        """Aggregate hit rates grouped by dimension"""
+        with Session(self.engine) as session:
+            rates = session.exec(select(PickHitRate).order_by(PickHitRate.picks.desc())).all()
+        grouped: Dict[str, List[Dict]] = {}
+        for rate in rates:
+            grouped.setdefault(rate.dimension, []).append({
+                "key": rate.key,
+                "picks": rate.picks,
+                "hits": rate.hits,
+                "hit_rate": round(rate.hits / rate.picks * 100, 1) if rate.picks else 0.0,
+            })
+        return grouped
+
+    async def run_periodically(self, interval: int = SETTLEMENT_INTERVAL):
+        """Settle forever; the shared lock keeps it to one worker per run"""
+        while True:
+            try:
+                if picks_store.acquire_lock("settlement", SETTLEMENT_LOCK_TTL):
+                    try:
+                        await self.settle()
+                    finally:
+                        picks_store.release_lock("settlement")
+            except Exception as e:
+                logger.error(f"[SETTLEMENT] Run failed: {str(e)}")
+            await asyncio.sleep(interval)
+
+
+# Singleton instance
+pick_settlement = PickSettlement()
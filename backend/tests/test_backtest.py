@@ -0,0 +1,111 @@
+"""
+Unit tests for the vectorized backtest of the picks rules
+"""
+import pytest
+import sys
+import os
+import numpy as np
+from datetime import datetime, timedelta
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import backtest as backtest_module
+from backtest import prekickoff_features, market_histograms, evaluate_grid, run_backtest, BIN_SCALE
+
+
+def random_matches(n=600, teams=20, seed=1):
+    rng = np.random.default_rng(seed)
+    start = datetime(2025, 1, 1)
+    matches = []
+    for i in range(n):
+        home, away = rng.choice(np.arange(1, teams + 1), size=2, replace=False)
+        matches.append({
+            "date": start + timedelta(hours=i),
+            "home_team_id": int(home),
+            "away_team_id": int(away),
+            "home_goals": int(rng.poisson(1.5)),
+            "away_goals": int(rng.poisson(1.1)),
+        })
+    return matches
+
+
+def brute_force_rate(matches, index, team_id, window=10):
+    """Over 2.5 rate of a team over its matches before matches[index]"""
+    previous = [m for m in matches[:index] if team_id in (m["home_team_id"], m["away_team_id"])][-window:]
+    if not previous:
+        return 0, 0
+    return sum(m["home_goals"] + m["away_goals"] > 2 for m in previous) / len(previous) * 100, len(previous)
+
+
+class TestFeatures:
+    """Test the pre-kickoff form windows"""
+
+    def test_matches_brute_force(self):
+        """Test vectorized windows equal a per-match loop (no look-ahead)"""
+        matches = random_matches()
+        features = prekickoff_features(matches, window=10, min_games=5)
+
+        expected = []
+        for i, m in enumerate(matches):
+            rate_home, games_home = brute_force_rate(matches, i, m["home_team_id"])
+            rate_away, games_away = brute_force_rate(matches, i, m["away_team_id"])
+            if games_home >= 5 and games_away >= 5:
+                expected.append((rate_home + rate_away) / 2)
+
+        assert features["n"] == len(expected)
+        assert np.allclose(features["over_2_5"], expected)
+
+
+class TestGrid:
+    """Test grid evaluation against direct counting"""
+
+    def test_grid_equals_direct_count(self):
+        """Test hit rates and level counts for a few grid points"""
+        features = prekickoff_features(random_matches())
+        histogram = market_histograms(features)["Over 2.5"]
+        value, outcome = features["over_2_5"], features["over_2_5_outcome"]
+
+        points = np.array([[50, 70, 55], [40, 60, 50], [65, 80, 70]])
+        result = evaluate_grid(histogram, points * BIN_SCALE)
+        for i, (threshold, alta, media) in enumerate(points):
+            picked = value >= threshold
+            assert result["picks"][i] == picked.sum()
+            assert result["hit_rate"][i] == pytest.approx(outcome[picked].mean() * 100)
+            assert result["alta_picks"][i] == (value >= alta).sum()
+            assert result["media_picks"][i] == ((value >= media) & (value < alta)).sum()
+
+    def test_under_rule_is_strict(self):
+        """Test the current Under 2.5 rule picks rate < 45 only"""
+        features = prekickoff_features(random_matches())
+        report = run_backtest(random_matches(), grid={"threshold": [50], "alta": [70], "media": [55]})
+        assert report["markets"]["Under 2.5"]["current"]["picks"] == (features["over_2_5"] < 45).sum()
+
+    def test_process_pool_matches_serial(self, monkeypatch):
+        """Test the process-pool path returns the same results"""
+        monkeypatch.setattr(backtest_module, "POOL_MIN_GRID", 10)
+        matches = random_matches()
+        grid = {"threshold": list(range(40, 60)), "alta": [65, 70], "media": [55, 60]}
+        serial = run_backtest(matches, grid=grid)
+        pooled = run_backtest(matches, grid=grid, workers=2)
+        assert pooled["workers"] == 2
+        assert pooled["markets"] == serial["markets"]
+
+    def test_report_returns_the_whole_grid(self):
+        """Test every grid point is returned, aligned with evaluate_grid"""
+        matches = random_matches()
+        grid = {"threshold": list(range(40, 60)), "alta": [65, 70], "media": [55, 60]}
+        report = run_backtest(matches, grid=grid)
+
+        points = np.array(report["grid"]["points"])
+        assert len(points) == report["grid_points"] == 80
+        expected = evaluate_grid(market_histograms(prekickoff_features(matches))["Over 2.5"], points * BIN_SCALE)
+        columns = report["markets"]["Over 2.5"]["grid"]
+        for column in ("picks", "hit_rate", "alta_picks", "baixa_hit_rate"):
+            assert len(columns[column]) == len(points)
+            assert columns[column] == pytest.approx([None if np.isnan(v) else round(float(v), 1) for v in expected[column]])
+
+    def test_report_states_the_decision_path(self):
+        """Test the report says model and baseline adjustments are not replayed"""
+        report = run_backtest(random_matches(), grid={"threshold": [50], "alta": [70], "media": [55]})
+        assert len(report["decision_path"]["not_replayed"]) == 2
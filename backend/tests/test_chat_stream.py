@@ -0,0 +1,142 @@
+"""
+Unit tests for progressive (streamed) chat analyses
+"""
+import pytest
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlmodel import SQLModel, create_engine
+from sqlalchemy.pool import StaticPool
+
+from chatbot import ChatBot
+from match_history import MatchHistory
+
+
+def make_fixture(team_id, i):
+    home = i % 2 == 0
+    return {
+        "fixture": {"id": team_id * 100 + i, "date": f"2026-09-{i + 1:02d}T18:00:00+00:00", "status": {"short": "FT"}},
+        "league": {"id": 39, "name": "Premier League", "type": "League", "season": 2026},
+        "teams": {
+            "home": {"id": team_id if home else 999, "name": "Home"},
+            "away": {"id": 999 if home else team_id, "name": "Away"},
+        },
+        "goals": {"home": i % 3, "away": i % 2},
+        "score": {"halftime": {"home": 0, "away": 0}, "fulltime": {"home": i % 3, "away": i % 2}},
+    }
+
+
+class MockAPI:
+    TEAMS = {"arsenal": {"id": 1, "name": "Arsenal"}, "chelsea": {"id": 2, "name": "Chelsea"}}
+
+    async def resolve_team(self, name, context_fixtures=None):
+        return self.TEAMS.get(name.lower().strip())
+
+    def cached_team_fixtures(self, team_id, last=10):
+        return None
+
+    async def get_team_fixtures(self, team_id, last=10):
+        return [make_fixture(team_id, i) for i in range(last)]
+
+    async def translate_team_name_with_llm(self, text):
+        return {"teams": [], "ambiguous": False}
+
+
+class MockStatsStore:
+    async def ingest(self, fixtures):
+        return {}
+
+
+class Stub:
+    def price_match(self, *args):
+        return None
+
+    def match_probabilities(self, *args):
+        return None
+
+    def get(self, *args):
+        return None
+
+    def find_match_odds(self, *args):
+        return None
+
+
+class MockUser:
+    id = 1
+    subscription = None
+
+
+@pytest.fixture
+def chatbot():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine)
+    bot = ChatBot()
+    bot.api = MockAPI()
+    bot.stats_store = MockStatsStore()
+    bot.history = MatchHistory(engine)
+    bot.model = bot.ratings = bot.baselines = bot.odds = Stub()
+    return bot
+
+
+class TestChatStream:
+    @pytest.mark.asyncio
+    async def test_stages_are_emitted_in_order(self, chatbot):
+        events = []
+
+        async def progress(event, data):
+            events.append((event, data))
+
+        response = await chatbot.process_message("Arsenal x Chelsea", MockUser(), progress)
+
+        assert [event for event, _ in events] == ["parsed", "teams", "resolved", "form", "stats", "markets"]
+        data = dict(events)
+        assert data["resolved"]["team_a"] == {"id": 1, "name": "Arsenal"}
+        assert "Forma Recente" in data["form"]["text"]
+        assert "Estatísticas" in data["stats"]["text"]
+        # Streamed blocks are exactly the blocks of the final message
+        for event in ["form", "stats", "markets"]:
+            assert data[event]["text"] in response
+
+    @pytest.mark.asyncio
+    async def test_same_response_without_progress(self, chatbot):
+        async def progress(event, data):
+            pass
+
+        streamed = await chatbot.process_message("Arsenal x Chelsea", MockUser(), progress)
+        plain = await chatbot.process_message("Arsenal x Chelsea", MockUser())
+
+        # Footer carries the minute of generation
+        assert streamed.rsplit("BetFaro |", 1)[0] == plain.rsplit("BetFaro |", 1)[0]
+
+    @pytest.mark.asyncio
+    async def test_team_stats_computed_once(self, chatbot, monkeypatch):
+        computed = []
+        calculate = chatbot._calculate_team_stats
+
+        def counted(fixtures, team_id):
+            computed.append(team_id)
+            return calculate(fixtures, team_id)
+
+        monkeypatch.setattr(chatbot, "_calculate_team_stats", counted)
+
+        async def progress(event, data):
+            pass
+
+        await chatbot.process_message("Arsenal x Chelsea", MockUser(), progress)
+
+        assert sorted(computed) == [1, 2]
+
+    @pytest.mark.asyncio
+    async def test_unresolved_team_stops_after_parse(self, chatbot):
+        events = []
+
+        async def progress(event, data):
+            events.append(event)
+
+        await chatbot.process_message("Arsenal x Unknown FC", MockUser(), progress)
+
+        assert "resolved" not in events
+        assert events[0] == "parsed"
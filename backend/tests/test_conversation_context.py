@@ -0,0 +1,140 @@
+"""
+Unit tests for follow-up questions answered from the conversation context
+"""
+import pytest
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlmodel import SQLModel, create_engine
+from sqlalchemy.pool import StaticPool
+
+from chatbot import ChatBot
+from conversation_context import ConversationContext
+from match_history import MatchHistory
+
+
+def make_fixture(team_id, i):
+    home = i % 2 == 0
+    return {
+        "fixture": {"id": team_id * 100 + i, "date": f"2026-09-{i + 1:02d}T18:00:00+00:00", "status": {"short": "FT"}},
+        "league": {"id": 39, "name": "Premier League", "type": "League", "season": 2026},
+        "teams": {
+            "home": {"id": team_id if home else 999, "name": "Home"},
+            "away": {"id": 999 if home else team_id, "name": "Away"},
+        },
+        "goals": {"home": i % 3, "away": i % 2},
+        "score": {"halftime": {"home": 0, "away": 0}, "fulltime": {"home": i % 3, "away": i % 2}},
+    }
+
+
+class MockAPI:
+    TEAMS = {"arsenal": {"id": 1, "name": "Arsenal"}, "chelsea": {"id": 2, "name": "Chelsea"}}
+
+    def __init__(self):
+        self.resolved = []
+        self.fetched = []
+
+    async def resolve_team(self, name, context_fixtures=None):
+        self.resolved.append(name)
+        return self.TEAMS.get(name.lower().strip())
+
+    def cached_team_fixtures(self, team_id, last=10):
+        return None
+
+    async def get_team_fixtures(self, team_id, last=10):
+        self.fetched.append(team_id)
+        return [make_fixture(team_id, i) for i in range(last)]
+
+    async def translate_team_name_with_llm(self, text):
+        return {"teams": [], "ambiguous": False}
+
+
+class MockStatsStore:
+    async def ingest(self, fixtures):
+        return {}
+
+
+class Stub:
+    def price_match(self, *args):
+        return None
+
+    def match_probabilities(self, *args):
+        return None
+
+    def get(self, *args):
+        return None
+
+    def find_match_odds(self, *args):
+        return None
+
+
+class MockUser:
+    def __init__(self, user_id=1):
+        self.id = user_id
+        self.subscription = None
+
+
+@pytest.fixture
+def chatbot():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine)
+    bot = ChatBot()
+    bot.api = MockAPI()
+    bot.stats_store = MockStatsStore()
+    bot.history = MatchHistory(engine)
+    bot.model = bot.ratings = bot.baselines = bot.odds = Stub()
+    return bot
+
+
+class TestFollowUp:
+    def test_parse_follow_up(self, chatbot):
+        assert chatbot._parse_follow_up("e o over 3.5?") == {"markets": ["Over 3.5 Gols"], "odds": []}
+        assert chatbot._parse_follow_up("e com odd 2.10?") == {"markets": [], "odds": ["2.10"]}
+        assert chatbot._parse_follow_up("E pra 2,10?")["odds"] == ["2.10"]
+        assert chatbot._parse_follow_up("Chelsea over 2.5") is None
+        assert chatbot._parse_follow_up("e o chelsea?") is None
+
+    @pytest.mark.asyncio
+    async def test_new_market_without_resolution_or_fetching(self, chatbot):
+        await chatbot.process_message("Arsenal x Chelsea over 2.5 @1.90", MockUser())
+        resolved, fetched = len(chatbot.api.resolved), len(chatbot.api.fetched)
+        events = []
+
+        async def progress(event, data):
+            events.append((event, data))
+
+        text = await chatbot.process_message("e o over 3.5?", MockUser(), progress)
+
+        assert "⚽ Arsenal vs Chelsea" in text
+        assert "Over 3.5 Gols" in text
+        assert "Odd informada" not in text
+        assert (len(chatbot.api.resolved), len(chatbot.api.fetched)) == (resolved, fetched)
+        assert [event for event, _ in events] == ["parsed", "teams", "markets"]
+
+    @pytest.mark.asyncio
+    async def test_odd_alone_keeps_the_markets(self, chatbot):
+        await chatbot.process_message("Arsenal x Chelsea over 2.5", MockUser())
+
+        text = await chatbot.process_message("e com odd 2.10?", MockUser())
+
+        assert "Over 2.5 Gols" in text
+        assert "Odd informada: 2.10" in text
+        assert chatbot.conversations.get(1)["markets"] == ["Over 2.5 Gols"]
+
+    @pytest.mark.asyncio
+    async def test_context_is_per_user(self, chatbot):
+        await chatbot.process_message("Arsenal x Chelsea", MockUser(1))
+
+        text = await chatbot.process_message("e o over 3.5?", MockUser(2))
+
+        assert "Arsenal vs Chelsea" not in text
+        assert chatbot.conversations.get(2) is None
+
+    def test_expired_context_is_dropped(self):
+        context = ConversationContext(ttl=0)
+        context.set(1, {"home": {"name": "Arsenal"}}, [], [])
+        assert context.get(1) is None
+        assert len(context) == 0
@@ -0,0 +1,118 @@
+"""
+Unit tests for the fixture statistics store
+Tests that statistics are fetched once per fixture and reused afterwards
+"""
+import pytest
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlmodel import SQLModel, create_engine
+from sqlalchemy.pool import StaticPool
+
+from chatbot import ChatBot
+from fixture_stats import FixtureStatsStore
+
+
+class MockAPI:
+    """Mock FootballAPI that counts statistics calls"""
+    def __init__(self):
+        self.calls = []
+
+    async def get_fixture_statistics(self, fixture_id):
+        self.calls.append(fixture_id)
+        return [
+            {"team": {"id": 42}, "statistics": [
+                {"type": "Corner Kicks", "value": 6},
+                {"type": "Yellow Cards", "value": 2},
+                {"type": "Red Cards", "value": None},
+            ]},
+            {"team": {"id": fixture_id + 100}, "statistics": [
+                {"type": "Corner Kicks", "value": 4},
+                {"type": "Yellow Cards", "value": 3},
+                {"type": "Red Cards", "value": 1},
+            ]},
+        ]
+
+
+def make_fixture(fixture_id, status="FT"):
+    return {
+        "fixture": {"id": fixture_id, "status": {"short": status}},
+        "teams": {"home": {"id": 42}, "away": {"id": fixture_id + 100}},
+        "goals": {"home": 1, "away": 0},
+    }
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine)
+    return engine
+
+
+class TestFixtureStatsStore:
+    """Test fetch-once ingestion"""
+
+    @pytest.mark.asyncio
+    async def test_only_new_fixtures_fetched(self, engine):
+        """Test that stored fixtures are not fetched again"""
+        api = MockAPI()
+        store = FixtureStatsStore(api, engine)
+
+        await store.ingest([make_fixture(1), make_fixture(2)])
+        assert sorted(api.calls) == [1, 2]
+
+        stats = await store.ingest([make_fixture(1), make_fixture(2), make_fixture(3)])
+        assert sorted(api.calls) == [1, 2, 3], "Only fixture 3 should be fetched"
+        assert stats[3]["home_corners"] == 6
+        assert stats[3]["away_red_cards"] == 1
+        assert stats[3]["home_red_cards"] == 0
+
+    @pytest.mark.asyncio
+    async def test_persisted_across_instances(self, engine):
+        """Test that a new store (e.g. after restart) reads from the database"""
+        api = MockAPI()
+        await FixtureStatsStore(api, engine).ingest([make_fixture(1)])
+
+        api_after_restart = MockAPI()
+        stats = await FixtureStatsStore(api_after_restart, engine).ingest([make_fixture(1)])
+        assert api_after_restart.calls == []
+        assert stats[1]["away_corners"] == 4
+
+    @pytest.mark.asyncio
+    async def test_unfinished_fixtures_ignored(self, engine):
+        """Test that unfinished fixtures are never fetched"""
+        api = MockAPI()
+        stats = await FixtureStatsStore(api, engine).ingest([make_fixture(1, status="NS")])
+        assert api.calls == []
+        assert stats == {}
+
+
+class TestAdvancedStats:
+    """Test corners/cards markets from stored statistics"""
+
+    @pytest.fixture
+    def chatbot(self):
+        return ChatBot()
+
+    def test_corners_and_cards(self, chatbot):
+        """Test match totals and over lines"""
+        fixtures = [make_fixture(1), make_fixture(2)]
+        statistics = {
+            1: {"home_corners": 6, "away_corners": 4, "home_yellow_cards": 2, "away_yellow_cards": 3, "home_red_cards": 0, "away_red_cards": 1},
+            2: {"home_corners": 3, "away_corners": 2, "home_yellow_cards": 1, "away_yellow_cards": 1, "home_red_cards": 0, "away_red_cards": 0},
+        }
+        corners, cards = chatbot._calculate_advanced_stats(fixtures, statistics)
+        assert corners["sample"] == 2
+        assert corners["avg"] == 7.5
+        assert corners["over_9_5"] == 50
+        assert cards["avg"] == 4
+        assert cards["over_4_5"] == 50
+
+    def test_no_statistics(self, chatbot):
+        """Test empty stats when nothing is stored"""
+        corners, cards = chatbot._calculate_advanced_stats([make_fixture(1)], {})
+        assert corners["sample"] == 0
+        assert cards["sample"] == 0
@@ -378,5 +378,57 @@ class TestFormOrderConsistency:
         assert form_list[4] == "D", "Fifth game should be D"
 
 
+class TestHalfTimeStats:
+    """Test HT / 2nd-half markets computed from score.halftime"""
+    
+    @pytest.fixture
+    def chatbot(self):
+        return ChatBot()
+    
+    def _fixture(self, home_id, away_id, ft, ht):
+        return {
+            "teams": {"home": {"id": home_id}, "away": {"id": away_id}},
+            "goals": {"home": ft[0], "away": ft[1]},
+            "score": {"halftime": {"home": ht[0], "away": ht[1]}}
+        }
+    
+    def test_ht_goal_markets(self, chatbot):
+        """Test HT over lines and goals in both halves"""
+        fixtures = [
+            self._fixture(42, 1, (2, 1), (1, 0)),  # HT 1 goal, 2H 2 goals
+            self._fixture(42, 2, (0, 0), (0, 0)),  # no goals
+            self._fixture(3, 42, (1, 1), (1, 1)),  # HT 2 goals, 2H none
+            self._fixture(4, 42, (0, 2), (0, 0)),  # 2H only
+        ]
+        stats = chatbot._calculate_team_stats(fixtures, 42)
+        assert stats["ht_sample"] == 4
+        assert stats["ht_over_0_5"] == 50
+        assert stats["ht_over_1_5"] == 25
+        assert stats["sh_over_0_5"] == 50
+        assert stats["sh_over_1_5"] == 50
+        assert stats["goals_both_halves"] == 25
+    
+    def test_htft_from_team_perspective(self, chatbot):
+        """Test HT/FT result is computed from the team's point of view"""
+        fixtures = [
+            self._fixture(42, 1, (2, 1), (0, 1)),  # L/W at home
+            self._fixture(2, 42, (0, 3), (0, 1)),  # W/W away
+        ]
+        stats = chatbot._calculate_team_stats(fixtures, 42)
+        assert stats["htft"] == {"L/W": 50, "W/W": 50}
+        assert stats["ht_win_rate"] == 50
+        assert stats["ht_loss_rate"] == 50
+    
+    def test_missing_halftime_is_excluded(self, chatbot):
+        """Test fixtures without score.halftime don't dilute HT rates"""
+        fixtures = [
+            self._fixture(42, 1, (1, 0), (1, 0)),
+            {"teams": {"home": {"id": 42}, "away": {"id": 2}}, "goals": {"home": 0, "away": 0}},
+        ]
+        ht = chatbot._calculate_ht_stats(fixtures, 42)
+        assert ht["ht_sample"] == 1
+        assert ht["ht_over_0_5"] == 100
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
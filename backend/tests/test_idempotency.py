@@ -0,0 +1,177 @@
+"""
+Unit tests for idempotent replay of retried chat/picks requests
+"""
+import pytest
+import sys
+import os
+import asyncio
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlmodel import SQLModel, Session, create_engine, select
+from sqlalchemy.pool import StaticPool
+
+import idempotency
+from idempotency import IdempotencyStore, IdempotencyConflict, request_fingerprint
+from models import IdempotencyKey
+
+
+class Producer:
+    """Counts runs; a gate holds them in flight until released"""
+    def __init__(self, fail=False):
+        self.calls = 0
+        self.fail = fail
+        self.gate = asyncio.Event()
+        self.gate.set()
+
+    async def __call__(self):
+        self.calls += 1
+        await self.gate.wait()
+        if self.fail:
+            raise RuntimeError("analysis failed")
+        return {"response": f"run {self.calls}"}
+
+
+FINGERPRINT = request_fingerprint({"content": "Arsenal x Chelsea"})
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine)
+    return engine
+
+
+class TestIdempotencyStore:
+    def test_fingerprint_ignores_key_order(self):
+        assert request_fingerprint({"range": "both", "days": None}) == request_fingerprint({"days": None, "range": "both"})
+        assert request_fingerprint({"content": "a"}) != request_fingerprint({"content": "b"})
+
+    @pytest.mark.asyncio
+    async def test_retry_replays_the_first_response(self, engine):
+        store, produce = IdempotencyStore(engine), Producer()
+
+        first = await store.run("chat:1", "k1", FINGERPRINT, produce)
+        retry = await store.run("chat:1", "k1", FINGERPRINT, produce)
+
+        assert first == ({"response": "run 1"}, False)
+        assert retry == ({"response": "run 1"}, True)
+        assert produce.calls == 1
+        assert store.replays == 1
+
+    @pytest.mark.asyncio
+    async def test_keys_are_scoped(self, engine):
+        store, produce = IdempotencyStore(engine), Producer()
+
+        await store.run("chat:1", "k1", FINGERPRINT, produce)
+        _, replayed = await store.run("chat:2", "k1", FINGERPRINT, produce)
+
+        assert replayed is False
+        assert produce.calls == 2
+
+    @pytest.mark.asyncio
+    async def test_concurrent_duplicates_await_the_first(self, engine):
+        store, produce = IdempotencyStore(engine), Producer()
+        produce.gate.clear()
+
+        tasks = [asyncio.create_task(store.run("chat:1", "k1", FINGERPRINT, produce)) for _ in range(3)]
+        await asyncio.sleep(0)
+        produce.gate.set()
+        results = await asyncio.gather(*tasks)
+
+        assert produce.calls == 1
+        assert [replayed for _, replayed in results] == [False, True, True]
+        assert all(response == {"response": "run 1"} for response, _ in results)
+
+    @pytest.mark.asyncio
+    async def test_same_key_different_request(self, engine):
+        store = IdempotencyStore(engine)
+        await store.run("chat:1", "k1", FINGERPRINT, Producer())
+
+        with pytest.raises(IdempotencyConflict):
+            await store.run("chat:1", "k1", request_fingerprint({"content": "Benfica x Porto"}), Producer())
+
+    @pytest.mark.asyncio
+    async def test_failures_are_not_kept(self, engine):
+        store, failing = IdempotencyStore(engine), Producer(fail=True)
+
+        with pytest.raises(RuntimeError):
+            await store.run("chat:1", "k1", FINGERPRINT, failing)
+        produce = Producer()
+        response, replayed = await store.run("chat:1", "k1", FINGERPRINT, produce)
+
+        assert replayed is False
+        assert produce.calls == 1
+        assert len(store) == 1
+
+    @pytest.mark.asyncio
+    async def test_cancelled_first_request_hands_over_to_the_retry(self, engine):
+        store, stuck = IdempotencyStore(engine), Producer()
+        stuck.gate.clear()
+        first = asyncio.create_task(store.run("chat:1", "k1", FINGERPRINT, stuck))
+        await asyncio.sleep(0)
+        produce = Producer()
+        retry = asyncio.create_task(store.run("chat:1", "k1", FINGERPRINT, produce))
+        await asyncio.sleep(0)
+
+        first.cancel()
+        response, replayed = await retry
+
+        assert first.cancelled()
+        assert (response, replayed) == ({"response": "run 1"}, False)
+        assert produce.calls == 1
+
+    @pytest.mark.asyncio
+    async def test_expired_keys_run_again(self, engine):
+        store, produce = IdempotencyStore(engine, ttl=0), Producer()
+
+        await store.run("chat:1", "k1", FINGERPRINT, produce)
+        _, replayed = await store.run("chat:1", "k1", FINGERPRINT, produce)
+
+        assert replayed is False
+        assert produce.calls == 2
+
+    @pytest.mark.asyncio
+    async def test_other_worker_replays_the_stored_response(self, engine):
+        produce = Producer()
+        await IdempotencyStore(engine).run("chat:1", "k1", FINGERPRINT, produce)
+
+        other = IdempotencyStore(engine)
+        response, replayed = await other.run("chat:1", "k1", FINGERPRINT, produce)
+
+        assert (response, replayed) == ({"response": "run 1"}, True)
+        assert produce.calls == 1
+
+    @pytest.mark.asyncio
+    async def test_other_worker_waits_for_the_running_request(self, engine, monkeypatch):
+        monkeypatch.setattr(idempotency, "IDEMPOTENCY_POLL_INTERVAL", 0.01)
+        produce = Producer()
+        produce.gate.clear()
+        first = asyncio.create_task(IdempotencyStore(engine).run("chat:1", "k1", FINGERPRINT, produce))
+        await asyncio.sleep(0)
+        retry = asyncio.create_task(IdempotencyStore(engine).run("chat:1", "k1", FINGERPRINT, produce))
+        await asyncio.sleep(0.05)
+
+        produce.gate.set()
+        assert await first == ({"response": "run 1"}, False)
+        assert await retry == ({"response": "run 1"}, True)
+        assert produce.calls == 1
+
+    @pytest.mark.asyncio
+    async def test_claim_of_a_dead_worker_is_taken_over(self, engine):
+        stuck = Producer()
+        stuck.gate.clear()
+        crashed = asyncio.create_task(IdempotencyStore(engine, lease=0).run("chat:1", "k1", FINGERPRINT, stuck))
+        await asyncio.sleep(0)
+
+        produce = Producer()
+        response, replayed = await IdempotencyStore(engine).run("chat:1", "k1", FINGERPRINT, produce)
+
+        assert replayed is False
+        assert produce.calls == 1
+        with Session(engine) as session:
+            assert session.exec(select(IdempotencyKey)).one().response == {"response": "run 1"}
+        crashed.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await crashed
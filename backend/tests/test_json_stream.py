@@ -0,0 +1,81 @@
+"""
+Unit tests for incremental JSON decoding
+"""
+import pytest
+import sys
+import os
+import json
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from json_stream import ArrayItemDecoder
+
+
+def make_fixture(fixture_id, league_id, status="NS"):
+    return {
+        "fixture": {"id": fixture_id, "date": "2026-10-19T18:00:00+00:00", "status": {"short": status}},
+        "league": {"id": league_id, "name": "Liga \"Teste\" ]}"},
+        "teams": {"home": {"id": 1, "name": "A"}, "away": {"id": 2, "name": "B"}},
+    }
+
+
+def make_payload(fixtures, errors=None):
+    return json.dumps({
+        "get": "fixtures",
+        "parameters": {"date": "2026-10-19", "note": "response"},
+        "errors": errors or [],
+        "results": len(fixtures),
+        "response": fixtures,
+    }, indent=1)
+
+
+class TestArrayItemDecoder:
+    """Test decoding of array items from arbitrary chunks"""
+
+    def test_every_split_point(self):
+        """Test items match json.loads wherever the chunk boundary falls"""
+        fixtures = [make_fixture(i, 39) for i in range(3)]
+        payload = make_payload(fixtures)
+        for split in range(len(payload)):
+            decoder = ArrayItemDecoder("response")
+            items = decoder.feed(payload[:split]) + decoder.feed(payload[split:])
+            decoder.close()
+            assert items == fixtures, f"Mismatch when split at {split}"
+
+    def test_small_chunks_and_empty_array(self):
+        """Test byte-sized chunks and an empty response"""
+        fixtures = [make_fixture(i, 39) for i in range(5)]
+        decoder = ArrayItemDecoder("response")
+        items = []
+        for char in make_payload(fixtures):
+            items.extend(decoder.feed(char))
+        assert items == fixtures
+
+        decoder = ArrayItemDecoder("response")
+        assert decoder.feed(make_payload([])) == []
+        assert decoder.done
+
+    def test_truncated_payload(self):
+        """Test a payload cut mid-array is reported"""
+        payload = make_payload([make_fixture(1, 39), make_fixture(2, 39)])
+        decoder = ArrayItemDecoder("response")
+        decoder.feed(payload[:len(payload) // 2])
+        with pytest.raises(ValueError):
+            decoder.close()
+
+    def test_fields_before_the_array(self):
+        """Test the errors object sent ahead of the array is readable wherever the split falls"""
+        errors = {"requests": "You have reached the request limit for the day"}
+        payload = make_payload([], errors)
+        for split in range(len(payload)):
+            decoder = ArrayItemDecoder("response")
+            decoder.feed(payload[:split])
+            decoder.feed(payload[split:])
+            decoder.close()
+            assert decoder.head_value("errors") == errors, f"Mismatch when split at {split}"
+
+        decoder = ArrayItemDecoder("response")
+        decoder.feed(make_payload([make_fixture(1, 39)]))
+        assert decoder.head_value("errors") == []
+        assert decoder.head_value("paging") is None
@@ -0,0 +1,97 @@
+"""
+Unit tests for the incremental league baselines
+"""
+import pytest
+import sys
+import os
+from datetime import datetime, timedelta
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlmodel import SQLModel, create_engine
+from sqlalchemy.pool import StaticPool
+
+from league_baselines import LeagueBaselines, MIN_MATCHES
+from picks_engine import PicksEngine
+
+
+def make_match(fixture_id, home_goals, away_goals, league_id=78, season=2025):
+    return {
+        "fixture_id": fixture_id,
+        "league_id": league_id,
+        "season": season,
+        "date": datetime.utcnow() - timedelta(days=1),
+        "home_team_id": 1,
+        "away_team_id": 2,
+        "home_goals": home_goals,
+        "away_goals": away_goals,
+    }
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine)
+    return engine
+
+
+class TestLeagueBaselines:
+    """Test running totals and derived base rates"""
+
+    def test_incremental_rates(self, engine):
+        """Test base rates after two batches equal the rates over all matches"""
+        baselines = LeagueBaselines(engine)
+        baselines.update([make_match(i, 2, 1) for i in range(MIN_MATCHES // 2)])
+        assert baselines.get(78, 2025) is None, "Too few matches for a baseline"
+
+        baselines.update([make_match(100 + i, 0, 0) for i in range(MIN_MATCHES // 2)])
+        baseline = baselines.get(78, 2025)
+        assert baseline["matches"] == MIN_MATCHES
+        assert baseline["over_2_5_rate"] == 50
+        assert baseline["btts_rate"] == 50
+        assert baseline["avg_goals"] == 1.5
+        assert baseline["home_advantage"] == 50
+
+    def test_season_falls_back_to_pooled(self, engine):
+        """Test a thin season uses the league's seasons pooled together"""
+        LeagueBaselines(engine).update(
+            [make_match(i, 1, 1, season=2024) for i in range(MIN_MATCHES)] + [make_match(999, 3, 0, season=2025)]
+        )
+        baseline = LeagueBaselines(engine).get(78, 2025)
+        assert baseline["season"] is None
+        assert baseline["matches"] == MIN_MATCHES + 1
+        assert LeagueBaselines(engine).get(140) is None
+
+    def test_workers_batches_add_up(self, engine):
+        """Test batches written by two workers are both counted"""
+        first, second = LeagueBaselines(engine), LeagueBaselines(engine)
+        first.update([make_match(i, 2, 1) for i in range(MIN_MATCHES // 2)])
+        second.update([make_match(100 + i, 0, 0) for i in range(MIN_MATCHES // 2)])
+
+        assert LeagueBaselines(engine).get(78, 2025)["matches"] == MIN_MATCHES
+        assert second.get(78, 2025)["matches"] == MIN_MATCHES
+
+
+class TestBaselineThresholds:
+    """Test picks thresholds follow the league base rates"""
+
+    def test_high_scoring_league_raises_over_threshold(self):
+        """Test an Over 2.5 rate that is normal for the league is not picked"""
+        stats = {"over_25_rate": 60, "over_15_rate": 60, "btts_rate": 50, "avg_goals_for": 1.5, "avg_goals_against": 1.5}
+        engine = PicksEngine()
+        baseline = {"over_2_5_rate": 58, "over_1_5_rate": 80, "btts_rate": 55}
+
+        markets = [p["market"] for p in engine._generate_picks_for_match(stats, stats, "A", "B")]
+        assert "Over 2.5" in markets
+        markets = [p["market"] for p in engine._generate_picks_for_match(stats, stats, "A", "B", baseline=baseline)]
+        assert "Over 2.5" not in markets
+
+    def test_model_probabilities_are_not_adjusted_again(self):
+        """Test the league-aware model isn't held to the baseline thresholds"""
+        stats = {"over_25_rate": 40, "over_15_rate": 60, "btts_rate": 50, "avg_goals_for": 1.5, "avg_goals_against": 1.5}
+        model = {"over_2_5": 60, "over_1_5": 80, "btts": 50, "home_win": 40, "draw": 30, "away_win": 30}
+        baseline = {"over_2_5_rate": 58, "over_1_5_rate": 80, "btts_rate": 55}
+
+        markets = [p["market"] for p in PicksEngine()._generate_picks_for_match(stats, stats, "A", "B", model=model, baseline=baseline)]
+        assert "Over 2.5" in markets
@@ -0,0 +1,293 @@
+"""
+Unit tests for the structured match analysis the chat text is rendered from
+"""
+import pytest
+import sys
+import os
+import json
+from datetime import datetime
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlmodel import SQLModel, create_engine
+from sqlalchemy.pool import StaticPool
+
+from analysis_cache import AnalysisCache, analysis_key
+from chatbot import ChatBot
+from match_history import MatchHistory
+
+
+def make_fixture(team_id, i):
+    home = i % 2 == 0
+    return {
+        "fixture": {"id": team_id * 100 + i, "date": f"2026-09-{i + 1:02d}T18:00:00+00:00", "status": {"short": "FT"}},
+        "league": {"id": 39, "name": "Premier League", "type": "League", "season": 2026},
+        "teams": {
+            "home": {"id": team_id if home else 999, "name": "Home"},
+            "away": {"id": 999 if home else team_id, "name": "Away"},
+        },
+        "goals": {"home": i % 3, "away": i % 2},
+        "score": {"halftime": {"home": i % 2, "away": 0}, "fulltime": {"home": i % 3, "away": i % 2}},
+    }
+
+
+class MockAPI:
+    TEAMS = {
+        "arsenal": {"id": 1, "name": "Arsenal"}, "chelsea": {"id": 2, "name": "Chelsea"},
+        "benfica": {"id": 3, "name": "Benfica"}, "fc porto": {"id": 4, "name": "FC Porto"},
+    }
+
+    def __init__(self, games=10):
+        self.games = games
+        self.resolved = []
+        self.fetched = []
+        self.history = {}
+
+    async def resolve_team(self, name, context_fixtures=None):
+        self.resolved.append(name)
+        return self.TEAMS.get(name.lower().strip())
+
+    def cached_team_fixtures(self, team_id, last=10):
+        return self.history.get((team_id, last))
+
+    async def get_team_fixtures(self, team_id, last=10):
+        self.fetched.append(team_id)
+        self.history[(team_id, last)] = [make_fixture(team_id, i) for i in range(min(last, self.games))]
+        return self.history[(team_id, last)]
+
+
+class MockStatsStore:
+    def __init__(self):
+        self.calls = []
+
+    async def ingest(self, fixtures):
+        self.calls.append(len(fixtures))
+        return {}
+
+
+class MockModel:
+    def __init__(self):
+        self.calls = 0
+
+    def price_match(self, *args):
+        self.calls += 1
+        return {
+            "home_win": 48.0, "draw": 26.0, "away_win": 26.0,
+            "expected_goals_home": 1.5, "expected_goals_away": 1.1,
+            "correct_scores": [{"score": "1-1", "probability": 12.0}],
+            "over_1_5": 72.0, "over_2_5": 48.0, "btts": 52.0,
+            "home_scores": 78.0, "away_scores": 67.0,
+        }
+
+
+class MockOdds:
+    def __init__(self):
+        self.updated_at = None
+
+    def find_match_odds(self, *args):
+        return {"fixture_id": 77, "kickoff": None, "updated_at": self.updated_at, "odds": {"over_2_5": 2.2, "btts": 1.8}}
+
+
+class Stub:
+    def match_probabilities(self, *args):
+        return None
+
+    def get(self, *args):
+        return None
+
+
+class MockUser:
+    id = 1
+    subscription = None
+
+
+@pytest.fixture
+def chatbot():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine)
+    bot = ChatBot()
+    bot.api = MockAPI()
+    bot.stats_store = MockStatsStore()
+    bot.history = MatchHistory(engine)
+    bot.model = MockModel()
+    bot.odds = MockOdds()
+    bot.ratings = bot.baselines = Stub()
+    return bot
+
+
+class TestMatchAnalysis:
+    @pytest.mark.asyncio
+    async def test_structure_is_plain_json(self, chatbot):
+        analysis = await chatbot.match_analysis("Arsenal", "Chelsea")
+
+        assert analysis["home"] == {"id": 1, "name": "Arsenal"}
+        assert analysis["sample"]["games"] == 10
+        assert analysis["sample"]["home"]["fixtures"] == [100 + i for i in range(9, -1, -1)]
+        assert analysis["probabilities"]["source"] == "model"
+        assert analysis["probabilities"]["under_2_5"] == pytest.approx(52.0)
+        json.dumps(analysis)
+
+    @pytest.mark.asyncio
+    async def test_picks_sorted_and_capped(self, chatbot):
+        analysis = await chatbot.match_analysis("Arsenal", "Chelsea")
+
+        probabilities = [pick["probability"] for pick in analysis["picks"]]
+        assert probabilities == sorted(probabilities, reverse=True)
+        assert all(1 <= p <= 99 for p in probabilities)
+        assert {"over_1_5", "btts_no", "home_scores"} <= {pick["market"] for pick in analysis["picks"]}
+
+    @pytest.mark.asyncio
+    async def test_market_odds_edge(self, chatbot):
+        analysis = await chatbot.match_analysis("Arsenal", "Chelsea")
+
+        values = {value["market"]: value for value in analysis["market_odds"]["values"]}
+        assert set(values) == {"over_2_5", "btts"}
+        assert values["over_2_5"]["edge"] == pytest.approx((0.48 * 2.2 - 1) * 100)
+
+    @pytest.mark.asyncio
+    async def test_same_fixtures_same_analysis(self, chatbot):
+        first = await chatbot.match_analysis("Arsenal", "Chelsea")
+        second = await chatbot.match_analysis("Arsenal", "Chelsea")
+        assert json.dumps(first, sort_keys=True) == json.dumps(second, sort_keys=True)
+
+    @pytest.mark.asyncio
+    async def test_chat_text_is_rendered_from_it(self, chatbot):
+        analysis = await chatbot.match_analysis("Arsenal", "Chelsea")
+        text = await chatbot.process_message("Arsenal x Chelsea", MockUser())
+
+        assert "⚽ Arsenal vs Chelsea" in text
+        assert analysis["picks"][0]["label"] in text
+        assert analysis["insights"][0] in text
+        assert "💰 Odds de Mercado" in text
+
+    @pytest.mark.asyncio
+    async def test_errors(self, chatbot):
+        assert (await chatbot.match_analysis("Arsenal", "Nowhere FC"))["error"] == "team_not_found"
+
+        chatbot.api = MockAPI(games=3)
+        analysis = await chatbot.match_analysis("Arsenal", "Chelsea")
+        assert analysis["error"] == "insufficient_data"
+        assert analysis["errors"]["home"]
+
+
+class TestBatchAnalysis:
+    @pytest.mark.asyncio
+    async def test_teams_fetched_once(self, chatbot):
+        analyses = await chatbot.match_analyses([("Arsenal", "Chelsea"), ("Chelsea", "Benfica"), ("arsenal", "FC Porto")])
+
+        assert [a["home"]["name"] for a in analyses] == ["Arsenal", "Chelsea", "Arsenal"]
+        assert sorted(chatbot.api.fetched) == [1, 2, 3, 4]
+        assert len(chatbot.api.resolved) == 4
+        # One statistics ingest for every distinct sample fixture
+        assert chatbot.stats_store.calls == [40]
+
+    @pytest.mark.asyncio
+    async def test_same_result_as_single_analysis(self, chatbot):
+        single = await chatbot.match_analysis("Benfica", "FC Porto")
+        batch = await chatbot.match_analyses([("Arsenal", "Chelsea"), ("Benfica", "FC Porto")])
+        assert json.dumps(batch[1], sort_keys=True) == json.dumps(single, sort_keys=True)
+
+    @pytest.mark.asyncio
+    async def test_errors_stay_per_match(self, chatbot):
+        analyses = await chatbot.match_analyses([("Arsenal", "Nowhere FC"), ("Benfica", "FC Porto")])
+        assert analyses[0] == {"error": "team_not_found", "team": "Nowhere FC"}
+        assert analyses[1]["home"]["name"] == "Benfica"
+        assert 0 not in {leg["match"] for leg in chatbot.accumulator(analyses)["legs"]}
+
+    def test_accumulator(self, chatbot):
+        def analysis(probability, market="over_1_5", odd=None):
+            values = [{"market": market, "odd": odd}] if odd else []
+            return {
+                "home": {"name": "A"}, "away": {"name": "B"},
+                "picks": [{"market": market, "label": "Over 1.5 Gols", "probability": probability}],
+                "market_odds": {"values": values} if odd else None,
+            }
+
+        combined = chatbot.accumulator([analysis(80, odd=1.4), analysis(50, odd=2.2)])
+        assert combined["probability"] == pytest.approx(40.0)
+        assert combined["fair_odd"] == pytest.approx(2.5)
+        assert combined["odd"] == pytest.approx(3.08)
+        assert combined["edge"] == pytest.approx(23.2)
+        assert combined["complete"] is True
+
+        partial = chatbot.accumulator([analysis(80), {"error": "team_not_found"}])
+        assert partial["odd"] is None
+        assert partial["complete"] is False
+
+    def test_parse_slip(self, chatbot):
+        slip = "Arsenal x Chelsea, Benfica vs Porto\nnada aqui"
+        assert chatbot._parse_slip(slip) == [("Arsenal", "Chelsea"), ("Benfica", "FC Porto")]
+
+
+class TestAnalysisCache:
+    @pytest.mark.asyncio
+    async def test_repeated_query_is_a_lookup(self, chatbot):
+        first = await chatbot.match_analysis("Arsenal", "Chelsea")
+        second = await chatbot.match_analysis("arsenal", "chelsea")
+
+        assert second is first
+        assert chatbot.model.calls == 1
+        assert chatbot.stats_store.calls == [20]
+        assert chatbot.analysis_cache.hits == 1
+        assert chatbot.api.fetched == [1, 2], "Cached histories name the key, nothing is fetched"
+
+    @pytest.mark.asyncio
+    async def test_streamed_hit_emits_the_same_blocks(self, chatbot):
+        async def collect(events, event, data):
+            events[event] = data["text"] if "text" in data else data
+
+        first, second = {}, {}
+        await chatbot.process_message("Arsenal x Chelsea", MockUser(), lambda event, data: collect(first, event, data))
+        chatbot.query_cache.clear()
+        await chatbot.process_message("Arsenal x Chelsea", MockUser(), lambda event, data: collect(second, event, data))
+
+        assert chatbot.analysis_cache.hits == 1
+        assert [second[event] for event in ["form", "stats", "markets"]] == [first[event] for event in ["form", "stats", "markets"]]
+
+    @pytest.mark.asyncio
+    async def test_price_move_invalidates(self, chatbot):
+        await chatbot.match_analysis("Arsenal", "Chelsea")
+        chatbot.odds.updated_at = datetime(2026, 10, 19, 12, 0)
+
+        await chatbot.match_analysis("Arsenal", "Chelsea")
+
+        assert chatbot.model.calls == 2
+        assert len(chatbot.analysis_cache) == 1
+
+    @pytest.mark.asyncio
+    async def test_markets_and_odds_share_the_entry(self, chatbot):
+        plain = await chatbot.process_message("Arsenal x Chelsea", MockUser())
+        with_odd = await chatbot.process_message("Arsenal x Chelsea over 2.5 @2.10", MockUser())
+
+        assert chatbot.model.calls == 1
+        assert "💰 Análise de Valor" in with_odd
+        assert "💰 Análise de Valor" not in plain
+
+    @pytest.mark.asyncio
+    async def test_new_game_invalidates(self, chatbot):
+        await chatbot.match_analysis("Arsenal", "Chelsea")
+        chatbot.api.games = 11  # Both teams played again
+        chatbot.api.history.clear()  # ...and their cached histories expired
+
+        analysis = await chatbot.match_analysis("Arsenal", "Chelsea")
+
+        assert chatbot.model.calls == 2
+        assert analysis["sample"]["home"]["fixtures"][0] == 110
+        assert len(chatbot.analysis_cache) == 1
+
+    def test_expired_entries_are_dropped(self):
+        cache = AnalysisCache(ttl=0)
+        cache.set(analysis_key(1, 2, 10, 20), {"home": "A"})
+        assert cache.get(analysis_key(1, 2, 10, 20)) is None
+        assert len(cache) == 0
+
+    def test_least_recently_used_evicted(self):
+        cache = AnalysisCache(size=2)
+        cache.set(analysis_key(1, 2, 10, 20), {})
+        cache.set(analysis_key(3, 4, 30, 40), {})
+        cache.get(analysis_key(1, 2, 10, 20))
+        cache.set(analysis_key(5, 6, 50, 60), {})
+
+        assert cache.get(analysis_key(3, 4, 30, 40)) is None
+        assert cache.get(analysis_key(1, 2, 10, 20)) == {}
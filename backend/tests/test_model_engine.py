@@ -0,0 +1,153 @@
+"""
+Unit tests for the local match history and the Dixon-Coles score model
+"""
+import pytest
+import sys
+import os
+import numpy as np
+from datetime import datetime, timedelta
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlmodel import SQLModel, create_engine
+from sqlalchemy.pool import StaticPool
+
+from match_history import MatchHistory
+from model_engine import ScoreModel, score_matrices, market_probabilities
+
+
+def make_api_fixture(fixture_id, home_id, away_id, home_goals, away_goals, status="FT", league_id=39, league_name="Premier League"):
+    return {
+        "fixture": {"id": fixture_id, "date": "2026-01-10T15:00:00+00:00", "status": {"short": status}},
+        "league": {"id": league_id, "name": league_name, "type": "League", "season": 2025},
+        "teams": {"home": {"id": home_id}, "away": {"id": away_id}},
+        "goals": {"home": home_goals, "away": away_goals},
+        "score": {"halftime": {"home": 0, "away": 0}},
+    }
+
+
+def synthetic_league(n_teams=12, rounds=2, seed=0):
+    """Round-robin league with known strengths (team 1 is the strongest attack)"""
+    rng = np.random.default_rng(seed)
+    attack = np.linspace(0.5, -0.5, n_teams)
+    now = datetime.utcnow()
+    matches = []
+    for _ in range(rounds):
+        for h in range(n_teams):
+            for a in range(n_teams):
+                if h == a:
+                    continue
+                lam_home = np.exp(0.1 + 0.3 + attack[h] - 0.5 * attack[a])
+                lam_away = np.exp(0.1 + attack[a] - 0.5 * attack[h])
+                matches.append({
+                    "home_team_id": h + 1,
+                    "away_team_id": a + 1,
+                    "home_goals": int(rng.poisson(lam_home)),
+                    "away_goals": int(rng.poisson(lam_away)),
+                    "date": now - timedelta(days=int(rng.integers(1, 200))),
+                })
+    return matches
+
+
+class MockHistory:
+    """In-memory stand-in for MatchHistory"""
+    def __init__(self, matches):
+        self.matches = matches
+        self.league_versions = {39: 1}
+
+    def get_league_matches(self, league_id, since=None):
+        return self.matches if league_id == 39 else []
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine)
+    return engine
+
+
+class TestMatchHistory:
+    """Test ingestion of finished fixtures"""
+
+    def test_ingest_only_new_finished_official(self, engine):
+        """Test that unfinished, friendly and already stored fixtures are skipped"""
+        history = MatchHistory(engine)
+        new = history.ingest([
+            make_api_fixture(1, 10, 20, 2, 1),
+            make_api_fixture(2, 10, 30, None, None, status="NS"),
+            make_api_fixture(3, 10, 40, 1, 1, league_id=667, league_name="Club Friendly"),
+        ])
+        assert [f["fixture_id"] for f in new] == [1]
+
+        new = history.ingest([make_api_fixture(1, 10, 20, 2, 1), make_api_fixture(4, 20, 10, 0, 0)])
+        assert [f["fixture_id"] for f in new] == [4]
+        assert history.league_versions[39] == 2
+        assert len(history.get_league_matches(39)) == 2
+
+    def test_concurrent_insert_keeps_the_rest_of_the_batch(self, engine):
+        """Test rows stored by another worker meanwhile are skipped, not the whole batch"""
+        other = MatchHistory(engine)
+
+        class Interleaved(MatchHistory):
+            def _row_to_dict(self, row):
+                if not getattr(self, "interleaved", False):
+                    self.interleaved = True
+                    other.ingest([make_api_fixture(2, 30, 40, 1, 0)])
+                return super()._row_to_dict(row)
+
+        history = Interleaved(engine)
+        notified = []
+        history.subscribe(lambda fixtures: notified.append([f["fixture_id"] for f in fixtures]))
+
+        new = history.ingest([make_api_fixture(i, 10 * i, 10 * i + 1, 2, 1) for i in (1, 2, 3)])
+        assert sorted(f["fixture_id"] for f in new) == [1, 3]
+        assert notified == [[f["fixture_id"] for f in new]]
+        assert len(history.get_league_matches(39)) == 3
+
+
+class TestScoreMatrices:
+    """Test the vectorized score matrix and market derivation"""
+
+    def test_matrices_are_distributions(self):
+        """Test each matrix sums to 1 and 1X2 covers all outcomes"""
+        matrices = score_matrices(np.array([1.5, 0.8]), np.array([1.1, 2.0]), np.array([-0.1, 0.0]))
+        assert matrices.shape == (2, 11, 11)
+        assert np.allclose(matrices.sum(axis=(1, 2)), 1)
+
+        probs = market_probabilities(matrices)
+        assert np.allclose(probs["home_win"] + probs["draw"] + probs["away_win"], 1)
+        assert np.allclose(probs["over_2_5"] + probs["under_2_5"], 1)
+        assert np.allclose(probs["btts"] + probs["btts_no"], 1)
+        assert np.allclose(probs["handicap_home_-1.5"] + probs["handicap_away_+1.5"], 1)
+        assert probs["home_win"][0] > probs["away_win"][0]
+        assert probs["away_win"][1] > probs["home_win"][1]
+
+
+class TestScoreModel:
+    """Test league fitting and pricing"""
+
+    def test_fit_recovers_strengths(self):
+        """Test that fitted attack ratings follow the true strengths"""
+        model = ScoreModel(MockHistory(synthetic_league())).get_league_model(39)
+        assert model is not None
+        assert model["home_adv"] > 0
+        fitted = [model["attack"][model["teams"][team_id]] for team_id in range(1, 13)]
+        assert np.corrcoef(fitted, np.linspace(0.5, -0.5, 12))[0, 1] > 0.8
+
+    def test_price_fixtures(self):
+        """Test pricing of covered and uncovered matchups in one call"""
+        score_model = ScoreModel(MockHistory(synthetic_league()))
+        results = score_model.price_fixtures([(39, 1, 12), (39, 1, 999), (140, 1, 2)])
+        assert results[1] is None, "Unknown team should not be priced"
+        assert results[2] is None, "League without history should not be priced"
+
+        priced = results[0]
+        assert priced["home_win"] > priced["away_win"]
+        assert abs(priced["home_win"] + priced["draw"] + priced["away_win"] - 100) < 0.5
+        assert len(priced["correct_scores"]) == 5
+
+    def test_not_enough_matches(self):
+        """Test that small samples are not fitted"""
+        score_model = ScoreModel(MockHistory(synthetic_league()[:10]))
+        assert score_model.get_league_model(39) is None
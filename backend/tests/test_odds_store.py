@@ -0,0 +1,198 @@
+"""
+Unit tests for the odds store (paged refresh schedule and price deltas)
+"""
+import pytest
+import sys
+import os
+from datetime import datetime, timedelta
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlmodel import SQLModel, Session, create_engine, select
+from sqlalchemy.pool import StaticPool
+
+from models import OddsMovement, OddsPage
+import odds_store as odds_module
+from odds_store import OddsStore, pick_market_key, NEAR_KICKOFF_TTL, FAR_KICKOFF_TTL
+from picks_store import PicksStore
+
+DATE = "2026-10-19"
+
+
+def make_entry(fixture_id, over=1.8, under=2.05, btts=1.7):
+    return {
+        "league": {"id": 39},
+        "fixture": {"id": fixture_id},
+        "bookmakers": [{
+            "id": 8,
+            "name": "Bet365",
+            "bets": [
+                {"id": 5, "name": "Goals Over/Under", "values": [
+                    {"value": "Over 2.5", "odd": str(over)},
+                    {"value": "Under 2.5", "odd": str(under)},
+                ]},
+                {"id": 8, "name": "Both Teams Score", "values": [{"value": "Yes", "odd": str(btts)}]},
+            ],
+        }],
+    }
+
+
+def make_fixture(fixture_id, kickoff):
+    return {
+        "fixture": {"id": fixture_id, "timestamp": int((kickoff - datetime(1970, 1, 1)).total_seconds())},
+        "league": {"id": 39},
+        "teams": {"home": {"id": fixture_id * 10}, "away": {"id": fixture_id * 10 + 1}},
+    }
+
+
+class MockAPI:
+    """Serves `entries` in pages of `page_size` and counts requests"""
+    def __init__(self, entries, page_size=2):
+        self.entries = entries
+        self.page_size = page_size
+        self.requests = []
+
+    async def get_odds_page(self, date_str, page=1, bookmaker=None):
+        self.requests.append(page)
+        pages = [self.entries[i:i + self.page_size] for i in range(0, len(self.entries), self.page_size)] or [[]]
+        return {"paging": {"current": page, "total": len(pages)}, "response": pages[page - 1]}
+
+
+class MockPicks:
+    def __init__(self, fixtures):
+        self.fixtures = fixtures
+
+    async def fetch_pickable_fixtures(self, dates, max_age=None):
+        return self.fixtures, {}
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine)
+    return engine
+
+
+def make_store(engine, entries, fixtures):
+    api = MockAPI(entries)
+    return OddsStore(api=api, picks=MockPicks(fixtures), engine=engine, locks=PicksStore(engine)), api
+
+
+class TestRefresh:
+    @pytest.mark.asyncio
+    async def test_first_refresh_fetches_every_page(self, engine):
+        kickoff = datetime.utcnow() + timedelta(hours=10)
+        store, api = make_store(engine, [make_entry(i) for i in range(1, 6)], [make_fixture(i, kickoff) for i in range(1, 6)])
+
+        report = await store.refresh_date(DATE)
+
+        assert sorted(api.requests) == [1, 2, 3]
+        assert report["pages_total"] == 3
+        assert report["new"] == 15
+        assert store.fixture_odds([1])[1] == {"over_2_5": 1.8, "under_2_5": 2.05, "btts": 1.7}
+
+    @pytest.mark.asyncio
+    async def test_pages_not_due_are_not_fetched(self, engine):
+        kickoff = datetime.utcnow() + timedelta(hours=10)
+        store, api = make_store(engine, [make_entry(i) for i in range(1, 5)], [make_fixture(i, kickoff) for i in range(1, 5)])
+
+        await store.refresh_date(DATE)
+        api.requests.clear()
+        report = await store.refresh_date(DATE)
+
+        assert api.requests == []
+        assert report["requests"] == 0
+
+    @pytest.mark.asyncio
+    async def test_schedule_follows_kickoff(self, engine):
+        now = datetime.utcnow()
+        fixtures = [make_fixture(1, now + timedelta(hours=1)), make_fixture(2, now + timedelta(hours=1)),
+                    make_fixture(3, now - timedelta(hours=2)), make_fixture(4, now - timedelta(hours=2))]
+        store, api = make_store(engine, [make_entry(i) for i in range(1, 5)], fixtures)
+
+        await store.refresh_date(DATE)
+
+        with Session(engine) as session:
+            pages = {page.page: page for page in session.exec(select(OddsPage)).all()}
+        assert pages[1].next_fetch_at - pages[1].fetched_at == NEAR_KICKOFF_TTL
+        assert pages[2].next_fetch_at - pages[2].fetched_at == FAR_KICKOFF_TTL
+
+        # Only the page whose next kickoff is close becomes due
+        with Session(engine) as session:
+            for page in session.exec(select(OddsPage)).all():
+                page.next_fetch_at -= NEAR_KICKOFF_TTL
+                session.add(page)
+            session.commit()
+        api.requests.clear()
+        await store.refresh_date(DATE)
+        assert api.requests == [1]
+
+    @pytest.mark.asyncio
+    async def test_truncated_listing_is_reported(self, engine, monkeypatch):
+        monkeypatch.setattr(odds_module, "MAX_PAGES", 2)
+        kickoff = datetime.utcnow() + timedelta(hours=10)
+        store, api = make_store(engine, [make_entry(i) for i in range(1, 6)], [make_fixture(i, kickoff) for i in range(1, 6)])
+
+        report = await store.refresh_date(DATE)
+
+        assert sorted(api.requests) == [1, 2]
+        assert report["pages_total"] == 3
+        assert report["truncated"] is True
+
+    @pytest.mark.asyncio
+    async def test_locked_date_is_skipped(self, engine):
+        store, api = make_store(engine, [make_entry(1)], [make_fixture(1, datetime.utcnow() + timedelta(hours=5))])
+        assert PicksStore(engine).acquire_lock(f"odds:{DATE}", 60)
+
+        report = await store.refresh_date(DATE)
+
+        assert report["skipped"] is True
+        assert api.requests == []
+
+
+class TestDeltas:
+    def test_only_changes_are_recorded(self, engine):
+        kickoff = datetime.utcnow() + timedelta(hours=5)
+        store, _ = make_store(engine, [], [])
+        fixtures = {1: make_fixture(1, kickoff)}
+
+        first = store.ingest([make_entry(1)], fixtures)
+        second = store.ingest([make_entry(1)], fixtures)
+        third = store.ingest([make_entry(1, over=1.75, under=2.1)], fixtures)
+
+        assert (first["new"], second["unchanged"], third["changed"], third["unchanged"]) == (3, 3, 2, 1)
+        with Session(engine) as session:
+            assert len(session.exec(select(OddsMovement)).all()) == 5
+        over = [m for m in store.movements(1) if m["market"] == "over_2_5"]
+        assert [(m["previous_odd"], m["odd"]) for m in over] == [(None, 1.8), (1.8, 1.75)]
+        assert store.fixture_odds([1])[1]["over_2_5"] == 1.75
+
+    def test_unknown_fixtures_are_ignored(self, engine):
+        store, _ = make_store(engine, [], [])
+        counts = store.ingest([make_entry(99)], {})
+        assert counts["new"] == 0
+        assert store.fixture_odds([99]) == {}
+
+
+class TestReaders:
+    def test_find_match_odds_either_order(self, engine):
+        store, _ = make_store(engine, [], [])
+        store.ingest([make_entry(1)], {1: make_fixture(1, datetime.utcnow() + timedelta(hours=5))})
+
+        found = store.find_match_odds(11, 10)
+        assert found["fixture_id"] == 1
+        assert found["home_team_id"] == 10
+        assert found["odds"]["btts"] == 1.7
+        assert store.find_match_odds(10, 99) is None
+
+    def test_started_fixtures_are_not_found(self, engine):
+        store, _ = make_store(engine, [], [])
+        store.ingest([make_entry(1)], {1: make_fixture(1, datetime.utcnow() - timedelta(minutes=5))})
+        assert store.find_match_odds(10, 11) is None
+
+    def test_pick_market_key(self):
+        assert pick_market_key("Over 2.5") == "over_2_5"
+        assert pick_market_key("BTTS Não") == "btts_no"
+        assert pick_market_key("Vitória Arsenal", "Chelsea", "Arsenal") == "away_win"
+        assert pick_market_key("Escanteios") is None
@@ -0,0 +1,121 @@
+"""
+Unit tests for the picks snapshot notification feed
+"""
+import pytest
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlmodel import SQLModel, create_engine
+from sqlalchemy.pool import StaticPool
+
+from picks_feed import PicksFeed, SUBSCRIBER_QUEUE_SIZE, snapshot_diff
+from picks_store import PicksStore
+
+
+def make_result(fixture_id, fingerprint="a", confidence=70):
+    return {
+        "fixture_id": fixture_id,
+        "inputs_fingerprint": fingerprint,
+        "picks": [{"market": "Over 2.5", "confidence": confidence}],
+    }
+
+
+@pytest.fixture
+def store():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine)
+    return PicksStore(engine)
+
+
+class CountingStore:
+    """Counts version queries made against the wrapped store"""
+    def __init__(self, store):
+        self.store = store
+        self.version_queries = 0
+
+    def latest_versions(self, since=None):
+        self.version_queries += 1
+        return self.store.latest_versions(since)
+
+    def latest(self, range_type):
+        return self.store.latest(range_type)
+
+
+class TestSnapshotDiff:
+    def test_added_removed_changed(self):
+        diff = snapshot_diff({1: "a", 2: "b", 3: "c"}, {1: "a", 3: "x", 4: "d"})
+        assert diff == {"added": [4], "removed": [2], "changed": [3]}
+
+    def test_first_version_adds_everything(self):
+        assert snapshot_diff(None, {1: "a"})["added"] == [1]
+
+
+class TestPicksFeed:
+    def test_latest_versions_one_row_per_range(self, store):
+        store.save("today", {"picks": []})
+        store.save("today", {"picks": []})
+        store.save("tomorrow", {"picks": []})
+        assert store.latest_versions() == {"today": 2, "tomorrow": 1}
+
+    def test_existing_snapshots_are_not_pushed_on_subscribe(self, store):
+        store.save("today", {"picks": [make_result(1)]})
+        feed = PicksFeed(store)
+
+        queue = feed.subscribe()
+
+        assert queue.empty()
+        assert feed.versions() == {"today": 1}
+        assert feed.check() == []
+
+    def test_new_version_is_pushed_with_diff(self, store):
+        store.save("today", {"picks": [make_result(1), make_result(2)]})
+        feed = PicksFeed(store)
+        queue = feed.subscribe()
+
+        store.save("today", {"picks": [make_result(2, confidence=75), make_result(3)]})
+        feed.check()
+
+        message = queue.get_nowait()
+        assert message["range"] == "today"
+        assert (message["version"], message["previous_version"]) == (2, 1)
+        assert message["ranking"] == [2, 3]
+        assert message["diff"] == {"added": [3], "removed": [1], "changed": [2]}
+        assert [result["fixture_id"] for result in message["results"]] == [2, 3]
+        assert message["meta"]["snapshot_version"] == 2
+
+    def test_single_check_serves_every_client(self, store):
+        counting = CountingStore(store)
+        feed = PicksFeed(counting)
+        queues = [feed.subscribe() for _ in range(25)]
+        queries = counting.version_queries
+
+        store.save("both", {"picks": [make_result(1)]})
+        feed.check()
+
+        assert counting.version_queries == queries + 1
+        assert all(queue.get_nowait()["version"] == 1 for queue in queues)
+
+    def test_unsubscribed_client_gets_nothing(self, store):
+        feed = PicksFeed(store)
+        queue = feed.subscribe()
+        other = feed.subscribe()
+        feed.unsubscribe(queue)
+
+        store.save("today", {"picks": []})
+        feed.check()
+
+        assert queue.empty()
+        assert other.qsize() == 1
+
+    def test_slow_client_keeps_newest_messages(self, store):
+        feed = PicksFeed(store)
+        queue = feed.subscribe()
+
+        for version in range(1, SUBSCRIBER_QUEUE_SIZE + 3):
+            feed.publish({"version": version})
+
+        assert queue.qsize() == SUBSCRIBER_QUEUE_SIZE
+        assert queue.get_nowait()["version"] == 3
@@ -0,0 +1,262 @@
+"""
+Unit tests for the picks fixture fetching (streaming filter and strategy)
+"""
+import pytest
+import sys
+import os
+import json
+import httpx
+from datetime import datetime
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlmodel import SQLModel, create_engine
+from sqlalchemy.pool import StaticPool
+
+import picks_engine as picks_module
+from match_history import MatchHistory
+from picks_engine import PicksEngine, PRIORITY_LEAGUE_IDS, QUOTA_RESERVE
+
+
+def make_fixture(fixture_id, league_id, status="NS", season=2026):
+    return {
+        "fixture": {"id": fixture_id, "date": "2026-10-19T18:00:00+00:00", "status": {"short": status}},
+        "league": {"id": league_id, "season": season},
+        "teams": {"home": {"id": 1, "name": "A"}, "away": {"id": 2, "name": "B"}},
+    }
+
+
+@pytest.fixture(autouse=True)
+def history(monkeypatch):
+    """Local match history backed by an in-memory database"""
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine)
+    history = MatchHistory(engine)
+    monkeypatch.setattr(picks_module, "match_history", history)
+    return history
+
+
+def use_mock_api(monkeypatch, handler):
+    real_client = httpx.AsyncClient
+    monkeypatch.setattr(
+        picks_module.httpx, "AsyncClient",
+        lambda **kwargs: real_client(transport=httpx.MockTransport(handler), **kwargs)
+    )
+    engine = PicksEngine()
+    engine.api_key = "test"
+    return engine
+
+
+class TestStreamedFixtures:
+    """Test fetched fixtures are filtered while streaming"""
+
+    @pytest.mark.asyncio
+    async def test_per_date_filters_while_streaming(self, monkeypatch):
+        """Test non-priority leagues and started games are dropped"""
+        payload = json.dumps({"get": "fixtures", "response": [
+            make_fixture(1, 39),
+            make_fixture(2, 99999),
+            make_fixture(3, 140, status="FT"),
+            make_fixture(4, 140, status="TBD"),
+        ]})
+
+        def handler(request):
+            assert dict(request.url.params) == {"date": "2026-10-19"}
+            return httpx.Response(200, content=payload.encode(), headers={"x-ratelimit-requests-remaining": "7"})
+
+        engine = use_mock_api(monkeypatch, handler)
+        engine._quota_remaining = 10  # Too little quota for per-league calls
+        fixtures, report = await engine.fetch_pickable_fixtures(["2026-10-19"])
+
+        assert [f["fixture"]["id"] for f in fixtures] == [1, 4]
+        assert report["strategy"] == "per_date"
+        assert report["requests"] == 1
+        assert report["bytes"] == len(payload)
+        assert report["quota_remaining"] == 7
+
+    @pytest.mark.asyncio
+    async def test_finished_fixtures_of_any_league_are_stored(self, monkeypatch, history):
+        """Test cup and non-priority results reach the match history, in batches"""
+        monkeypatch.setattr(picks_module, "HISTORY_INGEST_BATCH", 2)
+        finished = []
+        for fixture_id, league_id in [(3, 140), (5, 99999), (6, 48)]:
+            fixture = make_fixture(fixture_id, league_id, status="FT")
+            fixture["league"]["name"] = "Cup"
+            fixture["teams"] = {"home": {"id": fixture_id * 10}, "away": {"id": fixture_id * 10 + 1}}
+            fixture["goals"] = {"home": 2, "away": 1}
+            finished.append(fixture)
+        payload = json.dumps({"response": [make_fixture(1, 39)] + finished})
+
+        engine = use_mock_api(monkeypatch, lambda request: httpx.Response(200, content=payload.encode()))
+        fixtures, _ = await engine.fetch_pickable_fixtures(["2026-10-19"])
+
+        assert [f["fixture"]["id"] for f in fixtures] == [1]
+        assert history.last_fixture_ids([30, 50, 60]) == {30: 3, 50: 5, 60: 6}
+
+
+    @pytest.mark.asyncio
+    async def test_full_day_listing_records_every_team_kickoff(self, monkeypatch):
+        """Test cup games count as a team's next game, and per-league listings are unknown"""
+        cup = make_fixture(2, 99999)
+        cup["fixture"]["date"] = "2026-10-19T12:00:00+00:00"
+        cup["teams"] = {"home": {"id": 1}, "away": {"id": 3}}
+        payload = json.dumps({"response": [make_fixture(1, 39), cup, make_fixture(3, 140, status="FT")]})
+
+        engine = use_mock_api(monkeypatch, lambda request: httpx.Response(200, content=payload.encode()))
+        await engine.fetch_pickable_fixtures(["2026-10-19"])
+
+        kickoffs = engine.team_kickoffs(["2026-10-19"])
+        assert kickoffs == {1: datetime(2026, 10, 19, 12), 2: datetime(2026, 10, 19, 18), 3: datetime(2026, 10, 19, 12)}
+        assert engine.team_kickoffs(["2026-10-19", "2026-10-20"]) is None
+
+        engine._fixture_lists["2026-10-19"]["kickoffs"] = None  # Listed per league
+        assert engine.team_kickoffs(["2026-10-19"]) is None
+
+
+class TestFetchStrategy:
+    """Test the per-date vs per-league choice"""
+
+    def test_strategy_follows_observed_costs(self):
+        """Test quota outweighs download size unless the per-date payload is huge"""
+        engine = PicksEngine()
+        engine._quota_remaining = 7500
+        strategy, estimate = engine._choose_fetch_strategy(["2026-10-19", "2026-10-20"])
+        assert strategy == "per_date"
+        assert estimate["per_league"]["requests"] == 2 * len(PRIORITY_LEAGUE_IDS)
+
+        engine._observe_payload("per_date", 1, 1_000_000_000)
+        assert engine._choose_fetch_strategy(["2026-10-19"])[0] == "per_league"
+
+    def test_unknown_quota_is_per_date(self):
+        """Test a cold start (no quota reported yet) doesn't fan out per league"""
+        engine = PicksEngine()
+        engine._observe_payload("per_date", 1, 1_000_000_000)
+        assert engine._choose_fetch_strategy(["2026-10-19"])[0] == "per_date"
+
+    def test_low_quota_forces_per_date(self):
+        """Test per-league fetching is skipped when quota is short"""
+        engine = PicksEngine()
+        engine._quota_remaining = len(PRIORITY_LEAGUE_IDS) + QUOTA_RESERVE - 1
+        assert engine._choose_fetch_strategy(["2026-10-19"])[0] == "per_date"
+
+    @pytest.mark.asyncio
+    async def test_per_league_requests(self, monkeypatch):
+        """Test one request per priority league with its season"""
+        requested = []
+
+        def handler(request):
+            params = dict(request.url.params)
+            requested.append(params)
+            league_id = int(params["league"])
+            fixtures = [make_fixture(league_id, league_id)] if league_id in (39, 71) else []
+            return httpx.Response(200, json={"response": fixtures})
+
+        engine = use_mock_api(monkeypatch, handler)
+        engine._quota_remaining = 7500
+        engine._observe_payload("per_date", 1, 1_000_000_000)
+        fixtures, report = await engine.fetch_pickable_fixtures(["2026-03-01"])
+
+        assert report["strategy"] == "per_league"
+        assert report["requests"] == len(PRIORITY_LEAGUE_IDS)
+        assert sorted(f["league"]["id"] for f in fixtures) == [39, 71]
+        seasons = {int(p["league"]): p["season"] for p in requested}
+        assert seasons[39] == "2025", "European season started the previous year"
+        assert seasons[71] == "2026", "Brazilian season follows the calendar year"
+        assert engine._league_seasons[39] == 2026, "Season learned from the API"
+
+    @pytest.mark.asyncio
+    async def test_failures_are_reported(self, monkeypatch):
+        """Test failed and unverifiable per-league requests mark the fetch incomplete"""
+        def handler(request):
+            league_id = int(dict(request.url.params)["league"])
+            if league_id == 39:
+                return httpx.Response(500)
+            return httpx.Response(200, json={"response": [make_fixture(league_id, league_id)] if league_id == 71 else []})
+
+        engine = use_mock_api(monkeypatch, handler)
+        engine._quota_remaining = 7500
+        engine._observe_payload("per_date", 1, 1_000_000_000)
+        engine._league_seasons = {league_id: 2026 for league_id in PRIORITY_LEAGUE_IDS if league_id != 140}
+        fixtures, report = await engine.fetch_pickable_fixtures(["2026-10-19"])
+
+        assert [f["league"]["id"] for f in fixtures] == [71]
+        assert report["complete"] is False
+        assert [failure["league"] for failure in report["failed"]] == [39]
+        assert [params["league"] for params in report["unverified_seasons"]] == [140]
+
+    @pytest.mark.asyncio
+    async def test_error_replies_are_failures(self, monkeypatch):
+        """Test a 200 reply carrying API errors is a failed request, not an empty day"""
+        def handler(request):
+            return httpx.Response(200, json={
+                "get": "fixtures", "errors": {"requests": "You have reached the request limit for the day"},
+                "results": 0, "response": [],
+            })
+
+        engine = use_mock_api(monkeypatch, handler)
+        fixtures, report = await engine.fetch_pickable_fixtures(["2026-10-19"])
+
+        assert fixtures == []
+        assert report["complete"] is False
+        assert "request limit" in report["failed"][0]["error"]
+
+    @pytest.mark.asyncio
+    async def test_error_replies_are_not_kept_or_observed(self, monkeypatch):
+        """Test an error reply neither caches an empty day nor skews the payload estimate"""
+        replies = []
+
+        def handler(request):
+            replies.append(1)
+            return httpx.Response(200, json={"errors": {"token": "Error/Missing application key"}, "response": []})
+
+        engine = use_mock_api(monkeypatch, handler)
+        await engine.fetch_pickable_fixtures(["2026-10-19"])
+        _, report = await engine.fetch_pickable_fixtures(["2026-10-19"], max_age=3600)
+
+        assert len(replies) == 2
+        assert report["cached_dates"] == []
+        assert report["requests"] == 1
+        assert "per_date" not in engine._payload_bytes
+
+
+class TestFixtureListCache:
+    """Test the per-date listing is reused by callers that accept its age"""
+
+    @pytest.mark.asyncio
+    async def test_recent_complete_listing_is_reused(self, monkeypatch):
+        requested = []
+
+        def handler(request):
+            requested.append(dict(request.url.params)["date"])
+            return httpx.Response(200, json={"response": [make_fixture(len(requested), 39)]})
+
+        engine = use_mock_api(monkeypatch, handler)
+        await engine.fetch_pickable_fixtures(["2026-10-19"])
+
+        fixtures, report = await engine.fetch_pickable_fixtures(["2026-10-19"], max_age=3600)
+        assert [f["fixture"]["id"] for f in fixtures] == [1]
+        assert report["strategy"] == "cache"
+        assert report["requests"] == 0
+
+        fixtures, report = await engine.fetch_pickable_fixtures(["2026-10-19", "2026-10-20"], max_age=3600)
+        assert requested == ["2026-10-19", "2026-10-20"]
+        assert sorted(f["fixture"]["id"] for f in fixtures) == [1, 2]
+        assert report["cached_dates"] == ["2026-10-19"]
+
+        await engine.fetch_pickable_fixtures(["2026-10-19"])
+        assert requested[-1] == "2026-10-19", "Callers without max_age always fetch"
+
+    @pytest.mark.asyncio
+    async def test_incomplete_listing_is_not_reused(self, monkeypatch):
+        calls = []
+
+        def handler(request):
+            calls.append(1)
+            return httpx.Response(500)
+
+        engine = use_mock_api(monkeypatch, handler)
+        await engine.fetch_pickable_fixtures(["2026-10-19"])
+        await engine.fetch_pickable_fixtures(["2026-10-19"], max_age=3600)
+
+        assert len(calls) == 2
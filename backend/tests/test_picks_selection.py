@@ -0,0 +1,201 @@
+"""
+Unit tests for the top-K picks selection with backfill
+"""
+import pytest
+import sys
+import os
+import asyncio
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlmodel import SQLModel, create_engine
+from sqlalchemy.pool import StaticPool
+
+import picks_engine as picks_module
+from match_history import MatchHistory
+from picks_engine import PicksEngine
+
+
+def make_fixture(fixture_id, league_id, hour=18, status="NS"):
+    return {
+        "fixture": {"id": fixture_id, "date": f"2026-10-19T{hour:02d}:00:00+00:00", "status": {"short": status}},
+        "league": {"id": league_id},
+        "teams": {"home": {"id": fixture_id * 10, "name": "A"}, "away": {"id": fixture_id * 10 + 1, "name": "B"}},
+    }
+
+
+def make_result(fixture_id, home_id, away_id, home_goals=1, away_goals=0):
+    return {
+        "fixture": {"id": fixture_id, "date": "2026-10-12T18:00:00+00:00", "status": {"short": "FT"}},
+        "league": {"id": 39, "name": "Premier League", "type": "League", "season": 2026},
+        "teams": {"home": {"id": home_id}, "away": {"id": away_id}},
+        "goals": {"home": home_goals, "away": away_goals},
+    }
+
+
+@pytest.fixture(autouse=True)
+def history(monkeypatch):
+    """Local match history backed by an in-memory database"""
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine)
+    history = MatchHistory(engine)
+    monkeypatch.setattr(picks_module, "match_history", history)
+    return history
+
+
+class FakeAnalysisEngine(PicksEngine):
+    """PicksEngine whose analysis drops the given fixture ids"""
+    def __init__(self, dropped=(), delay=0.0):
+        super().__init__()
+        self.dropped = set(dropped)
+        self.delay = delay
+        self.analyzed = []
+
+    async def analyze_fixture(self, fixture):
+        fid = fixture["fixture"]["id"]
+        self.analyzed.append(fid)
+        await asyncio.sleep(self.delay)
+        if fid in self.dropped:
+            return None
+        return {"fixture_id": fid, "picks": [{"confidence": 60}]}
+
+
+class TestRanking:
+    """Test candidate ranking"""
+
+    def test_rank_by_tier_then_kickoff(self):
+        """Test tier 1 comes first and earlier kickoffs break ties"""
+        engine = PicksEngine()
+        fixtures = [make_fixture(1, 475), make_fixture(2, 39, hour=20), make_fixture(3, 39, hour=12), make_fixture(4, 13), make_fixture(5, 99999)]
+        ranked = engine._filter_and_rank_fixtures(fixtures, max_count=3)
+        assert [f["fixture"]["id"] for f in ranked] == [3, 2, 4]
+
+
+class TestTopKSelection:
+    """Test analysis with backfill and budgets"""
+
+    @pytest.mark.asyncio
+    async def test_backfills_dropped_fixtures(self):
+        """Test dropped fixtures are replaced by the next ranked candidates"""
+        engine = FakeAnalysisEngine(dropped={1, 2})
+        candidates = engine._rank_candidates([make_fixture(i, 39, hour=i) for i in range(1, 9)])
+
+        results, report = await engine._select_top_picks(candidates, k=4)
+        assert sorted(r["fixture_id"] for r in results) == [3, 4, 5, 6]
+        assert report["analyzed_failed"] == 2
+        assert report["backfilled"] == 2
+        assert report["stop_reason"] is None
+        assert 7 not in engine.analyzed and 8 not in engine.analyzed, "Should not analyze the whole day"
+
+    @pytest.mark.asyncio
+    async def test_analysis_budget(self, monkeypatch):
+        """Test selection stops when the analysis budget is spent"""
+        monkeypatch.setattr(picks_module, "ANALYSIS_BUDGET_FACTOR", 2)
+        engine = FakeAnalysisEngine(dropped=set(range(1, 20)))
+        candidates = engine._rank_candidates([make_fixture(i, 39, hour=i) for i in range(1, 20)])
+
+        results, report = await engine._select_top_picks(candidates, k=3)
+        assert results == []
+        assert report["analyzed_total"] == 6
+        assert report["stop_reason"] == "quota_budget"
+
+    @pytest.mark.asyncio
+    async def test_time_budget(self, monkeypatch):
+        """Test slow analyses are cancelled when the time budget runs out"""
+        monkeypatch.setattr(picks_module, "ANALYSIS_TIME_BUDGET", 0.05)
+        engine = FakeAnalysisEngine(delay=1.0)
+        candidates = engine._rank_candidates([make_fixture(i, 39, hour=i) for i in range(1, 5)])
+
+        results, report = await engine._select_top_picks(candidates, k=2)
+        assert results == []
+        assert report["stop_reason"] == "time_budget"
+        assert report["cancelled"] == 2
+
+
+class TestStreaming:
+    """Test results are handed out as analyses finish"""
+
+    @pytest.mark.asyncio
+    async def test_on_result_called_per_success(self):
+        """Test each of the K results is streamed once, before selection ends"""
+        engine = FakeAnalysisEngine(dropped={2})
+        candidates = engine._rank_candidates([make_fixture(i, 39, hour=i) for i in range(1, 9)])
+        streamed = []
+
+        async def on_result(result):
+            streamed.append(result["fixture_id"])
+
+        results, _ = await engine._select_top_picks(candidates, k=3, on_result=on_result)
+        assert sorted(streamed) == sorted(r["fixture_id"] for r in results)
+        assert 2 not in streamed
+
+    @pytest.mark.asyncio
+    async def test_reused_results_are_streamed(self):
+        """Test carried-over analyses are streamed too"""
+        engine = FakeAnalysisEngine()
+        fixtures = [make_fixture(i, 39, hour=i) for i in range(1, 4)]
+        await engine._select_top_picks(engine._rank_candidates(fixtures), k=3)
+        streamed = []
+
+        async def on_result(result):
+            streamed.append(result["fixture_id"])
+
+        _, report = await engine._select_top_picks(engine._rank_candidates(fixtures), k=3, on_result=on_result)
+        assert report["reused"] == 3
+        assert sorted(streamed) == [1, 2, 3]
+
+
+class TestIncrementalRefresh:
+    """Test unchanged fixtures are carried over between runs"""
+
+    @pytest.mark.asyncio
+    async def test_only_changed_fixtures_reanalyzed(self, history):
+        """Test a new result or a status change triggers re-analysis, nothing else does"""
+        engine = FakeAnalysisEngine(dropped={3})
+        fixtures = [make_fixture(i, 39, hour=i) for i in range(1, 5)]
+
+        results, report = await engine._select_top_picks(engine._rank_candidates(fixtures), k=3)
+        assert report["analyzed_total"] == 4
+        assert all("inputs_fingerprint" in r for r in results)
+
+        engine.analyzed.clear()
+        results, report = await engine._select_top_picks(engine._rank_candidates(fixtures), k=3)
+        assert engine.analyzed == []
+        assert report["reused"] == 4
+        assert sorted(r["fixture_id"] for r in results) == [1, 2, 4]
+
+        # Team of fixture 1 finished a new match, fixture 2 was postponed
+        history.ingest([make_result(100, 10, 99)])
+        fixtures[1] = make_fixture(2, 39, hour=2, status="PST")
+        results, report = await engine._select_top_picks(engine._rank_candidates(fixtures), k=3)
+        assert sorted(engine.analyzed) == [1, 2]
+        assert report["reused"] == 2
+
+    @pytest.mark.asyncio
+    async def test_unseen_result_is_bounded_by_max_age(self):
+        """Test a result missing from the history is picked up once the analysis expires"""
+        engine = FakeAnalysisEngine()
+        fixtures = [make_fixture(1, 39)]
+        await engine._select_top_picks(engine._rank_candidates(fixtures), k=1)
+
+        # A cup game no listing showed: nothing changes until ANALYSIS_MAX_AGE
+        engine.analyzed.clear()
+        engine._analyses[1]["analyzed_at"] -= picks_module.ANALYSIS_MAX_AGE - 60
+        await engine._select_top_picks(engine._rank_candidates(fixtures), k=1)
+        assert engine.analyzed == []
+
+        engine._analyses[1]["analyzed_at"] -= 120
+        _, report = await engine._select_top_picks(engine._rank_candidates(fixtures), k=1)
+        assert engine.analyzed == [1]
+        assert report["reused"] == 0
+
+    @pytest.mark.asyncio
+    async def test_rebuild_ignores_previous_runs(self):
+        """Test rebuild re-analyzes everything"""
+        engine = FakeAnalysisEngine()
+        fixtures = [make_fixture(i, 39, hour=i) for i in range(1, 3)]
+        await engine._select_top_picks(engine._rank_candidates(fixtures), k=2)
+        _, report = await engine._select_top_picks(engine._rank_candidates(fixtures), k=2, rebuild=True)
+        assert report["analyzed_total"] == 2
+        assert report["reused"] == 0
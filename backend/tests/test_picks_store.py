@@ -0,0 +1,110 @@
+"""
+Unit tests for the shared picks snapshots and generation lock
+"""
+import pytest
+import sys
+import os
+import asyncio
+from datetime import datetime, timedelta
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlmodel import SQLModel, Session, create_engine
+from sqlalchemy.pool import StaticPool
+
+import picks_engine as picks_module
+from models import GenerationLock
+from picks_engine import PicksEngine
+from picks_store import PicksStore
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine)
+    return engine
+
+
+class CountingEngine(PicksEngine):
+    """PicksEngine with a fake generation that counts its runs"""
+    def __init__(self, store, delay=0.0):
+        super().__init__()
+        self.store = store
+        self.delay = delay
+        self.generated = 0
+
+    async def _generate_picks(self, range_type, rebuild=False, on_result=None):
+        self.generated += 1
+        await asyncio.sleep(self.delay)
+        return {
+            "picks": [{"fixture_id": 1, "inputs_fingerprint": "abc", "picks": [{"confidence": 70}]}],
+            "meta": {"range": range_type, "generated_at": datetime.utcnow()},
+        }
+
+
+class TestPicksStore:
+    """Test snapshot versions and the lock"""
+
+    def test_versions_and_history(self, engine):
+        """Test each save becomes the next version of its range"""
+        store = PicksStore(engine)
+        store.save("today", {"picks": [], "meta": {}})
+        store.save("today", {"picks": [{"fixture_id": 1}], "meta": {"at": datetime.utcnow()}})
+        store.save("both", {"picks": [], "meta": {}})
+
+        latest = store.latest("today")
+        assert latest.version == 2
+        assert latest.picks_count == 1
+        assert isinstance(latest.payload["meta"]["at"], str)
+        assert len(store.history("today")) == 2
+        assert store.latest("tomorrow") is None
+
+    def test_lock_single_owner(self, engine):
+        """Test a held lock blocks other workers until released or expired"""
+        worker_a, worker_b = PicksStore(engine), PicksStore(engine)
+        assert worker_a.acquire_lock("picks_both", 60)
+        assert not worker_b.acquire_lock("picks_both", 60)
+        assert worker_b.is_locked("picks_both")
+
+        worker_a.release_lock("picks_both")
+        assert worker_b.acquire_lock("picks_both", 60)
+
+        with Session(engine) as session:
+            lock = session.get(GenerationLock, "picks_both")
+            lock.expires_at = datetime.utcnow() - timedelta(seconds=1)
+            session.add(lock)
+            session.commit()
+        assert worker_a.acquire_lock("picks_both", 60), "Expired lock can be taken over"
+
+
+class TestSharedGeneration:
+    """Test workers share snapshots instead of generating independently"""
+
+    @pytest.mark.asyncio
+    async def test_one_worker_generates(self, engine, monkeypatch):
+        """Test concurrent workers produce a single snapshot"""
+        monkeypatch.setattr(picks_module, "GENERATION_POLL_INTERVAL", 0.01)
+        worker_a = CountingEngine(PicksStore(engine), delay=0.1)
+        worker_b = CountingEngine(PicksStore(engine))
+
+        result_a, result_b = await asyncio.gather(
+            worker_a.get_daily_picks("both"),
+            worker_b.get_daily_picks("both"),
+        )
+        assert worker_a.generated + worker_b.generated == 1
+        assert result_a["meta"]["snapshot_version"] == result_b["meta"]["snapshot_version"] == 1
+
+    @pytest.mark.asyncio
+    async def test_restart_serves_snapshot(self, engine):
+        """Test a fresh worker serves the stored snapshot without generating"""
+        await CountingEngine(PicksStore(engine)).get_daily_picks("today")
+
+        restarted = CountingEngine(PicksStore(engine))
+        result = await restarted.get_daily_picks("today")
+        assert restarted.generated == 0
+        assert result["picks"][0]["fixture_id"] == 1
+
+        await restarted.get_daily_picks("today", force_refresh=True)
+        assert restarted.generated == 1
+        assert restarted._analyses[1]["fingerprint"] == "abc", "Analyses carried over from the snapshot"
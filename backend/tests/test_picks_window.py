@@ -0,0 +1,103 @@
+"""
+Unit tests for the rolling multi-day picks window
+"""
+import pytest
+import sys
+import os
+from datetime import datetime, timedelta
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlmodel import SQLModel, Session, create_engine, select
+from sqlalchemy.pool import StaticPool
+
+import picks_engine as picks_module
+from match_history import MatchHistory
+from models import PicksSnapshot
+from odds_store import OddsStore
+from picks_engine import PicksEngine
+from picks_store import PicksStore
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine)
+    monkeypatch.setattr(picks_module, "match_history", MatchHistory(engine))
+    return engine
+
+
+class WindowEngine(PicksEngine):
+    """PicksEngine with fake fetching (3 fixtures a day) and analysis"""
+    def __init__(self, store):
+        super().__init__()
+        self.store = store
+        self.odds = OddsStore(api=object(), picks=self, engine=store.engine)
+        self.fetched_dates = []
+        self.analyzed = []
+
+    async def fetch_pickable_fixtures(self, dates, max_age=None):
+        self.fetched_dates.extend(dates)
+        fixtures = []
+        for date_str in dates:
+            day = int(date_str.replace("-", ""))
+            for i in range(3):
+                fixtures.append({
+                    "fixture": {"id": day * 10 + i, "date": f"{date_str}T1{i}:00:00+00:00", "status": {"short": "NS"}},
+                    "league": {"id": 39},
+                    "teams": {"home": {"id": day * 10 + i}, "away": {"id": day * 10 + i + 5}},
+                })
+        return fixtures, {"strategy": "per_date", "requests": len(dates)}
+
+    async def analyze_fixture(self, fixture):
+        fid = fixture["fixture"]["id"]
+        self.analyzed.append(fid)
+        return {"fixture_id": fid, "picks": [{"confidence": 60}]}
+
+
+def age_snapshot(engine, range_type, seconds):
+    with Session(engine) as session:
+        snapshot = session.exec(select(PicksSnapshot).where(PicksSnapshot.range_type == range_type)).first()
+        snapshot.generated_at = datetime.utcnow() - timedelta(seconds=seconds)
+        session.add(snapshot)
+        session.commit()
+
+
+class TestPicksWindow:
+    """Test day slates are stored and only new or stale days are refreshed"""
+
+    @pytest.mark.asyncio
+    async def test_only_new_day_fetched(self, engine):
+        """Test a wider window (day entering at rollover) only fetches the new day"""
+        worker = WindowEngine(PicksStore(engine))
+        result = await worker.get_window_picks(days=3)
+        assert len(worker.fetched_dates) == 3
+        assert len(result["picks"]) == 9
+        assert [d["picks_count"] for d in result["days"]] == [3, 3, 3]
+
+        worker.fetched_dates.clear()
+        worker.analyzed.clear()
+        result = await worker.get_window_picks(days=4)
+        new_day = (datetime.utcnow() + timedelta(days=3)).strftime("%Y-%m-%d")
+        assert worker.fetched_dates == [new_day]
+        assert len(worker.analyzed) == 3
+        assert result["meta"]["refreshed_days"] == [new_day]
+        assert len(result["days"]) == 4
+
+    @pytest.mark.asyncio
+    async def test_stale_day_refreshed_incrementally(self, engine):
+        """Test a stale day is refetched but unchanged fixtures are not re-analyzed"""
+        worker = WindowEngine(PicksStore(engine))
+        await worker.get_window_picks(days=3)
+
+        today = datetime.utcnow().strftime("%Y-%m-%d")
+        far_day = (datetime.utcnow() + timedelta(days=2)).strftime("%Y-%m-%d")
+        age_snapshot(engine, f"day:{today}", 3600)
+        age_snapshot(engine, f"day:{far_day}", 3600)
+
+        restarted = WindowEngine(PicksStore(engine))
+        result = await restarted.get_window_picks(days=3)
+        assert restarted.fetched_dates == [today], "Far days refresh less often"
+        assert restarted.analyzed == [], "Unchanged fixtures carried over from the snapshot"
+        assert result["days"][0]["snapshot_version"] == 2
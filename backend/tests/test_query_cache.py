@@ -0,0 +1,145 @@
+"""
+Unit tests for the chat front-door query cache
+"""
+import pytest
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlmodel import SQLModel, create_engine
+from sqlalchemy.pool import StaticPool
+
+from chatbot import ChatBot
+from match_history import MatchHistory
+from query_cache import QueryCache, normalize_query
+
+
+def make_fixture(team_id, i):
+    home = i % 2 == 0
+    return {
+        "fixture": {"id": team_id * 100 + i, "date": f"2026-09-{i + 1:02d}T18:00:00+00:00", "status": {"short": "FT"}},
+        "league": {"id": 39, "name": "Premier League", "type": "League", "season": 2026},
+        "teams": {
+            "home": {"id": team_id if home else 999, "name": "Home"},
+            "away": {"id": 999 if home else team_id, "name": "Away"},
+        },
+        "goals": {"home": i % 3, "away": i % 2},
+        "score": {"halftime": {"home": 0, "away": 0}, "fulltime": {"home": i % 3, "away": i % 2}},
+    }
+
+
+class MockAPI:
+    TEAMS = {"arsenal": {"id": 1, "name": "Arsenal"}, "chelsea": {"id": 2, "name": "Chelsea"}}
+
+    def __init__(self):
+        self.resolved = []
+
+    async def resolve_team(self, name, context_fixtures=None):
+        self.resolved.append(name)
+        return self.TEAMS.get(name.lower().strip())
+
+    def cached_team_fixtures(self, team_id, last=10):
+        return None
+
+    async def get_team_fixtures(self, team_id, last=10):
+        return [make_fixture(team_id, i) for i in range(last)]
+
+    async def translate_team_name_with_llm(self, text):
+        return {"teams": [], "ambiguous": False}
+
+
+class MockStatsStore:
+    async def ingest(self, fixtures):
+        return {}
+
+
+class Stub:
+    def price_match(self, *args):
+        return None
+
+    def match_probabilities(self, *args):
+        return None
+
+    def get(self, *args):
+        return None
+
+    def find_match_odds(self, *args):
+        return None
+
+
+class MockUser:
+    id = 1
+    subscription = None
+
+
+@pytest.fixture
+def chatbot():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine)
+    bot = ChatBot()
+    bot.api = MockAPI()
+    bot.stats_store = MockStatsStore()
+    bot.history = MatchHistory(engine)
+    bot.model = bot.ratings = bot.baselines = bot.odds = Stub()
+    return bot
+
+
+class TestNormalizeQuery:
+    def test_case_accents_separators_spacing(self):
+        assert normalize_query("Arsenal x Chelsea") == normalize_query("  ARSENAL   vs  chelsea ")
+        assert normalize_query("Grêmio - Atlético") == normalize_query("gremio x atletico")
+
+    def test_market_and_odd_tokens(self):
+        assert normalize_query("Arsenal x Chelsea over 2,5 gols @ 1,90") == normalize_query("arsenal vs chelsea over 2.5 @1.90")
+        assert normalize_query("Arsenal x Chelsea ambos marcam") == normalize_query("Arsenal x Chelsea btts")
+        assert normalize_query("Arsenal x Chelsea mais de 2.5") == normalize_query("Arsenal x Chelsea over 2.5")
+
+    def test_different_queries_stay_apart(self):
+        assert normalize_query("Arsenal x Chelsea over 2.5") != normalize_query("Arsenal x Chelsea under 2.5")
+        assert normalize_query("Arsenal x Chelsea @1.90") != normalize_query("Arsenal x Chelsea @2.10")
+
+
+class TestFrontDoor:
+    @pytest.mark.asyncio
+    async def test_repeated_query_skips_parse_and_resolution(self, chatbot, monkeypatch):
+        first = await chatbot.process_message("Arsenal x Chelsea", MockUser())
+        resolved = len(chatbot.api.resolved)
+
+        def fail(*args):
+            raise AssertionError("parsed again")
+
+        monkeypatch.setattr(chatbot, "_intelligent_parse", fail)
+        monkeypatch.setattr(chatbot, "_extract_teams_from_text", fail)
+        second = await chatbot.process_message("arsenal  VS chelsea", MockUser())
+
+        assert len(chatbot.api.resolved) == resolved
+        assert chatbot.query_cache.hits == 1
+        assert second.rsplit("BetFaro |", 1)[0] == first.rsplit("BetFaro |", 1)[0]
+
+    @pytest.mark.asyncio
+    async def test_markets_and_odds_come_from_the_entry(self, chatbot):
+        await chatbot.process_message("Arsenal x Chelsea over 2.5 @1.90", MockUser())
+        events = []
+
+        async def progress(event, data):
+            events.append((event, data))
+
+        text = await chatbot.process_message("ARSENAL vs CHELSEA over 2,5 @ 1,90", MockUser(), progress)
+
+        assert chatbot.query_cache.hits == 1
+        assert dict(events)["parsed"]["markets"] == ["Over 2.5 Gols"]
+        assert dict(events)["teams"]["teams"] == ["Arsenal", "Chelsea"]
+        assert "Odd informada: 1.90" in text
+
+    @pytest.mark.asyncio
+    async def test_unresolved_queries_are_not_cached(self, chatbot):
+        await chatbot.process_message("Arsenal x Unknown FC", MockUser())
+        assert len(chatbot.query_cache) == 0
+
+    def test_expired_entries_are_dropped(self):
+        cache = QueryCache(ttl=0)
+        cache.set("arsenal x chelsea", {"teams": []})
+        assert cache.get("arsenal x chelsea") is None
+        assert len(cache) == 0
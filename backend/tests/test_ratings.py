@@ -0,0 +1,140 @@
+"""
+Unit tests for the incremental Elo ratings
+"""
+import pytest
+import sys
+import os
+from datetime import datetime, timedelta
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlmodel import SQLModel, Session, create_engine, select
+from sqlalchemy.pool import StaticPool
+
+from models import TeamRating
+from ratings import RatingEngine, INITIAL_RATING, MIN_RATED_MATCHES
+
+
+def make_match(fixture_id, home_id, away_id, home_goals, away_goals, days_ago=1):
+    return {
+        "fixture_id": fixture_id,
+        "league_id": 39,
+        "date": datetime.utcnow() - timedelta(days=days_ago),
+        "home_team_id": home_id,
+        "away_team_id": away_id,
+        "home_goals": home_goals,
+        "away_goals": away_goals,
+    }
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine)
+    return engine
+
+
+class TestRatingEngine:
+    """Test rating updates and derived probabilities"""
+
+    def test_winner_gains_loser_loses(self, engine):
+        """Test a home win moves rating points from the loser to the winner"""
+        ratings = RatingEngine(engine)
+        ratings.update([make_match(1, 10, 20, 3, 0)])
+
+        home, away = ratings.get_rating(10), ratings.get_rating(20)
+        assert home > INITIAL_RATING > away
+        assert abs((home - INITIAL_RATING) + (away - INITIAL_RATING)) < 1e-9, "Elo is zero-sum"
+
+    def test_only_involved_teams_change(self, engine):
+        """Test an update touches only the teams that played"""
+        ratings = RatingEngine(engine)
+        ratings.update([make_match(1, 10, 20, 1, 0, days_ago=3), make_match(2, 30, 40, 2, 2, days_ago=2)])
+        before = ratings.get_ratings([30, 40])
+
+        ratings.update([make_match(3, 20, 10, 2, 1)])
+        assert ratings.get_ratings([30, 40]) == before
+
+        with Session(engine) as session:
+            row = session.exec(select(TeamRating).where(TeamRating.team_id == 10)).first()
+            assert row.matches == 2
+            assert row.last_fixture_id == 3
+
+    def test_persisted_across_instances(self, engine):
+        """Test ratings are read back from the database by a fresh engine"""
+        RatingEngine(engine).update([make_match(1, 10, 20, 0, 2)])
+        fresh = RatingEngine(engine)
+        assert fresh.get_rating(20) > fresh.get_rating(10)
+        assert fresh.get_rating(999) is None
+
+    def test_match_probabilities(self, engine):
+        """Test 1X2 probabilities favour the stronger side and sum to 100"""
+        ratings = RatingEngine(engine)
+        ratings.update([make_match(i, 10, 20, 3, 0, days_ago=30 - i) for i in range(1, 11)])
+
+        probs = ratings.match_probabilities(10, 20)
+        assert probs["home_win"] > probs["away_win"]
+        assert abs(probs["home_win"] + probs["draw"] + probs["away_win"] - 100) < 0.5
+        assert ratings.match_probabilities(10, 999) is None
+
+    def test_new_teams_are_not_priced(self, engine):
+        """Test probabilities wait for MIN_RATED_MATCHES matches per team"""
+        ratings = RatingEngine(engine)
+        ratings.update([make_match(i, 10, 20, 1, 0, days_ago=30 - i) for i in range(1, MIN_RATED_MATCHES)])
+        assert ratings.match_probabilities(10, 20) is None
+
+        ratings.update([make_match(MIN_RATED_MATCHES, 10, 20, 1, 0)])
+        assert ratings.match_probabilities(10, 20) is not None
+
+    def test_concurrent_workers_do_not_lose_updates(self, engine):
+        """Test a worker writing between another's read and write is kept"""
+        other = RatingEngine(engine)
+
+        class Interleaved(RatingEngine):
+            def expected_home(self, home_rating, away_rating):
+                if not getattr(self, "interleaved", False):
+                    self.interleaved = True
+                    other.update([make_match(2, 10, 30, 2, 0, days_ago=2)])
+                return super().expected_home(home_rating, away_rating)
+
+        Interleaved(engine).update([make_match(1, 10, 20, 1, 0)])
+
+        with Session(engine) as session:
+            rows = {row.team_id: row for row in session.exec(select(TeamRating)).all()}
+        assert rows[10].matches == 2
+        assert abs(sum(row.rating - INITIAL_RATING for row in rows.values())) < 1e-9, "Elo is zero-sum"
+
+    def test_older_fixtures_are_skipped(self, engine):
+        """Test a late backfill of older results neither rates nor rewinds a team"""
+        ratings = RatingEngine(engine)
+        ratings.update([make_match(2, 10, 20, 1, 0, days_ago=2)])
+        before = ratings.get_ratings([10, 20, 30])
+
+        ratings.update([make_match(1, 10, 30, 0, 4, days_ago=5), make_match(3, 30, 40, 1, 1, days_ago=4)])
+        assert ratings.get_ratings([10, 20]) == {10: before[10], 20: before[20]}
+
+        with Session(engine) as session:
+            rows = {row.team_id: row for row in session.exec(select(TeamRating)).all()}
+        assert rows[10].matches == 1
+        assert rows[10].last_fixture_id == 2
+        assert rows[30].last_fixture_id == 3, "Other teams' fixtures are still applied"
+
+    def test_last_match_is_never_lowered(self, engine):
+        """Test a worker writing an older match after another's newer one keeps the newer"""
+        other = RatingEngine(engine)
+
+        class Interleaved(RatingEngine):
+            def expected_home(self, home_rating, away_rating):
+                if not getattr(self, "interleaved", False):
+                    self.interleaved = True
+                    other.update([make_match(2, 10, 30, 2, 0, days_ago=1)])
+                return super().expected_home(home_rating, away_rating)
+
+        Interleaved(engine).update([make_match(1, 10, 20, 1, 0, days_ago=3)])
+
+        with Session(engine) as session:
+            row = session.exec(select(TeamRating).where(TeamRating.team_id == 10)).first()
+        assert row.matches == 2
+        assert row.last_fixture_id == 2
+        assert row.last_match_date > datetime.utcnow() - timedelta(days=2)
@@ -0,0 +1,230 @@
+"""
+Unit tests for the bulk odds value scanner
+"""
+import pytest
+import sys
+import os
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlmodel import SQLModel, create_engine
+from sqlalchemy.pool import StaticPool
+
+from odds_store import OddsStore, parse_odds
+from picks_store import PicksStore
+from scanner import OddsScanner, value_table
+
+
+def make_odds(fixture_id, league_id=39, home=2.0, draw=3.5, away=4.0, over=1.8, under=2.05):
+    return {
+        "league": {"id": league_id},
+        "fixture": {"id": fixture_id},
+        "bookmakers": [{
+            "id": 8,
+            "name": "Bet365",
+            "bets": [
+                {"id": 1, "name": "Match Winner", "values": [
+                    {"value": "Home", "odd": str(home)},
+                    {"value": "Draw", "odd": str(draw)},
+                    {"value": "Away", "odd": str(away)},
+                ]},
+                {"id": 5, "name": "Goals Over/Under", "values": [
+                    {"value": "Over 2.5", "odd": str(over)},
+                    {"value": "Under 2.5", "odd": str(under)},
+                    {"value": "Over 10.5", "odd": "50.0"},
+                ]},
+                {"id": 99, "name": "Corners 1x2", "values": [{"value": "Home", "odd": "1.5"}]},
+            ],
+        }],
+    }
+
+
+def make_fixture(fixture_id, league_id=39):
+    return {
+        "fixture": {"id": fixture_id, "date": "2026-10-19T18:00:00+00:00", "timestamp": 1792432800},
+        "league": {"id": league_id, "name": "Premier League"},
+        "teams": {"home": {"id": fixture_id * 10, "name": f"Home {fixture_id}"},
+                  "away": {"id": fixture_id * 10 + 1, "name": f"Away {fixture_id}"}},
+    }
+
+
+class MockAPI:
+    """Serves odds entries split into pages of `page_size`"""
+    def __init__(self, entries, page_size=2):
+        self.pages = [entries[i:i + page_size] for i in range(0, len(entries), page_size)] or [[]]
+        self.requests = []
+
+    async def get_odds_page(self, date_str, page=1, bookmaker=None):
+        self.requests.append(page)
+        return {"paging": {"current": page, "total": len(self.pages)}, "response": self.pages[page - 1]}
+
+
+class MockPicks:
+    def __init__(self, fixtures):
+        self.fixtures = fixtures
+        self.calls = 0
+
+    async def fetch_pickable_fixtures(self, dates, max_age=None):
+        self.calls += 1
+        return self.fixtures, {}
+
+
+class MockModel:
+    """Prices fixtures in `probabilities` (fixture id = home id // 10)"""
+    def __init__(self, probabilities):
+        self.probabilities = probabilities
+        self.batches = []
+
+    def price_fixtures(self, matchups):
+        self.batches.append(list(matchups))
+        return [self.probabilities.get(home_id // 10) for _, home_id, _ in matchups]
+
+
+class MockRatings:
+    def __init__(self, probabilities=None):
+        self.probabilities = probabilities
+
+    def match_probabilities(self, home_id, away_id):
+        return self.probabilities
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine)
+    return engine
+
+
+class TestParseOdds:
+    def test_maps_known_markets_only(self):
+        rows = parse_odds([make_odds(1)])
+        assert {row["market"] for row in rows} == {"home_win", "draw", "away_win", "over_2_5", "under_2_5"}
+
+    def test_skips_entries_without_bookmakers(self):
+        entry = make_odds(1)
+        entry["bookmakers"] = []
+        assert parse_odds([entry]) == []
+
+
+class TestValueTable:
+    def test_fair_probabilities_sum_to_one_per_outcome_set(self):
+        rows = parse_odds([make_odds(1), make_odds(2, home=1.5, draw=4.0, away=6.0)])
+        table = value_table(rows, np.full(len(rows), 0.5))
+
+        for fixture_id in [1, 2]:
+            for markets in [{"home_win", "draw", "away_win"}, {"over_2_5", "under_2_5"}]:
+                idx = [i for i, row in enumerate(rows) if row["fixture_id"] == fixture_id and row["market"] in markets]
+                assert table["fair"][idx].sum() == pytest.approx(1.0)
+
+    def test_goal_lines_are_separate_outcome_sets(self):
+        rows = [
+            {"fixture_id": 1, "market": "over_1_5", "odd": 1.25},
+            {"fixture_id": 1, "market": "under_1_5", "odd": 3.75},
+            {"fixture_id": 1, "market": "over_2_5", "odd": 1.9},
+            {"fixture_id": 1, "market": "under_2_5", "odd": 1.9},
+        ]
+        table = value_table(rows, np.full(len(rows), 0.5))
+        assert table["fair"][:2].sum() == pytest.approx(1.0)
+        assert table["fair"][2] == pytest.approx(0.5)
+
+    def test_double_chance_margin(self):
+        rows = [
+            {"fixture_id": 1, "market": "dc_1x", "odd": 1.25},
+            {"fixture_id": 1, "market": "dc_x2", "odd": 2.0},
+            {"fixture_id": 1, "market": "dc_12", "odd": 1.25},
+        ]
+        table = value_table(rows, np.full(len(rows), 0.5))
+        # Two outcomes win: fair probabilities add up to 2
+        assert table["fair"].sum() == pytest.approx(2.0)
+
+    def test_edge(self):
+        rows = [{"fixture_id": 1, "market": "home_win", "odd": 2.0}]
+        table = value_table(rows, np.array([0.6]))
+        assert table["implied"][0] == pytest.approx(0.5)
+        assert table["edge"][0] == pytest.approx(0.2)
+
+
+class TestOddsScanner:
+    @pytest.fixture(autouse=True)
+    def setup(self, engine):
+        self.engine = engine
+
+    def make_scanner(self, fixture_ids=(1, 2, 3), probabilities=None, ratings=None):
+        api = MockAPI([make_odds(fid) for fid in fixture_ids])
+        picks = MockPicks([make_fixture(fid) for fid in fixture_ids])
+        store = OddsStore(api=api, picks=picks, engine=self.engine, locks=PicksStore(self.engine))
+        model = MockModel(probabilities or {})
+        return OddsScanner(store=store, model=model, ratings=MockRatings(ratings)), api, picks, model
+
+    @pytest.mark.asyncio
+    async def test_reads_stored_odds_without_refetching(self):
+        scanner, api, _, _ = self.make_scanner(fixture_ids=(1, 2, 3, 4, 5))
+
+        first = await scanner.scan("2026-10-19", min_edge=-100)
+        assert sorted(api.requests) == [1, 2, 3]
+        assert first["meta"]["odds_requests"] == 3
+        assert first["meta"]["fixtures_with_odds"] == 5
+
+        second = await scanner.scan("2026-10-19", min_edge=-100)
+        assert second["meta"]["odds_requests"] == 0
+        assert len(api.requests) == 3
+
+    @pytest.mark.asyncio
+    async def test_ranks_by_edge_and_prices_in_one_batch(self):
+        scanner, _, _, model = self.make_scanner(probabilities={
+            1: {"home_win": 50.0, "draw": 30.0, "away_win": 20.0, "over_2_5": 50.0, "under_2_5": 50.0},
+            2: {"home_win": 55.0, "draw": 25.0, "away_win": 20.0, "over_2_5": 65.0, "under_2_5": 35.0},
+        })
+
+        result = await scanner.scan("2026-10-19", min_edge=0)
+
+        assert len(model.batches) == 1
+        edges = [value["edge"] for value in result["values"]]
+        assert edges == sorted(edges, reverse=True)
+        # Over 2.5 @1.80 at 65% is the best value
+        assert result["values"][0]["fixture_id"] == 2
+        assert result["values"][0]["market"] == "over_2_5"
+        assert result["values"][0]["edge"] == pytest.approx(17.0)
+        assert all(value["edge"] >= 0 for value in result["values"])
+        # Fixture 3 has no model and no ratings
+        assert 3 not in {value["fixture_id"] for value in result["values"]}
+
+    @pytest.mark.asyncio
+    async def test_filters(self):
+        scanner, _, _, _ = self.make_scanner(probabilities={
+            1: {"home_win": 60.0, "draw": 25.0, "away_win": 15.0, "over_2_5": 60.0, "under_2_5": 40.0},
+        })
+
+        result = await scanner.scan("2026-10-19", market="over", min_edge=-100)
+        assert {value["market"] for value in result["values"]} == {"over_2_5"}
+
+        result = await scanner.scan("2026-10-19", min_edge=-100, max_odd=2.0)
+        assert all(value["odd"] <= 2.0 for value in result["values"])
+
+        result = await scanner.scan("2026-10-19", min_edge=-100, min_probability=50)
+        assert all(value["model_probability"] >= 50 for value in result["values"])
+
+        result = await scanner.scan("2026-10-19", min_edge=-100, league_id=140)
+        assert result["values"] == []
+
+    @pytest.mark.asyncio
+    async def test_elo_fallback_for_result_markets(self):
+        scanner, _, _, _ = self.make_scanner(fixture_ids=(1,), ratings={"home_win": 55.0, "draw": 25.0, "away_win": 20.0})
+
+        result = await scanner.scan("2026-10-19", min_edge=-100)
+
+        assert {value["market"] for value in result["values"]} == {"home_win", "draw", "away_win"}
+        assert all(value["source"] == "elo" for value in result["values"])
+
+    @pytest.mark.asyncio
+    async def test_odds_without_pickable_fixture_are_ignored(self):
+        scanner, _, picks, _ = self.make_scanner(fixture_ids=(1,))
+        await scanner.scan("2026-10-19")
+        picks.fixtures = []
+
+        result = await scanner.scan("2026-10-19")
+        assert result["values"] == []
+        assert result["meta"]["fixtures_with_odds"] == 0
@@ -0,0 +1,124 @@
+"""
+Unit tests for pick settlement and hit-rate tracking
+"""
+import pytest
+import sys
+import os
+from datetime import datetime, timedelta
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlmodel import SQLModel, Session, create_engine, select
+from sqlalchemy.pool import StaticPool
+
+import settlement as settlement_module
+from match_history import MatchHistory
+from models import SettledPick
+from picks_store import PicksStore
+from settlement import PickSettlement, grade_market
+
+
+class MockAPI:
+    """Returns stored fixtures for /fixtures?ids= and counts requests"""
+    def __init__(self, fixtures):
+        self.fixtures = fixtures
+        self.requests = []
+
+    async def get_fixtures_by_ids(self, fixture_ids):
+        self.requests.append(list(fixture_ids))
+        return [self.fixtures[fid] for fid in fixture_ids if fid in self.fixtures]
+
+
+def make_result(fixture_id, status, home_goals=None, away_goals=None):
+    return {
+        "fixture": {"id": fixture_id, "date": "2026-10-18T18:00:00+00:00", "status": {"short": status}},
+        "league": {"id": 39, "name": "Premier League", "type": "League", "season": 2026},
+        "teams": {"home": {"id": 1}, "away": {"id": 2}},
+        "goals": {"home": home_goals, "away": away_goals},
+        "score": {"fulltime": {"home": home_goals, "away": away_goals}},
+    }
+
+
+def make_published(fixture_id, picks, hours_ago=6, league="Premier League"):
+    return {
+        "fixture_id": fixture_id,
+        "home_team": "Arsenal",
+        "away_team": "Chelsea",
+        "league": league,
+        "date_iso": (datetime.utcnow() - timedelta(hours=hours_ago)).isoformat() + "+00:00",
+        "picks": [{"market": m, "confidence": 70, "confidence_level": level} for m, level in picks],
+    }
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine)
+    monkeypatch.setattr(settlement_module, "match_history", MatchHistory(engine))
+    return engine
+
+
+class TestGradeMarket:
+    """Test market grading"""
+
+    def test_markets(self):
+        """Test each published market against a 2-1 home win"""
+        assert grade_market("Over 2.5", 2, 1) is True
+        assert grade_market("Under 2.5", 2, 1) is False
+        assert grade_market("Over 1.5", 2, 1) is True
+        assert grade_market("BTTS Sim", 2, 1) is True
+        assert grade_market("BTTS Não", 2, 1) is False
+        assert grade_market("Dupla Chance X2", 2, 1) is False
+        assert grade_market("Vitória Arsenal", 2, 1, "Arsenal", "Chelsea") is True
+        assert grade_market("Vitória Chelsea", 2, 1, "Arsenal", "Chelsea") is False
+        assert grade_market("Escanteios +9.5", 2, 1) is None
+
+
+class TestSettlement:
+    """Test the settlement pipeline"""
+
+    @pytest.mark.asyncio
+    async def test_settle_batches_and_hit_rates(self, engine):
+        """Test batched fetching, grading, voiding and incremental hit rates"""
+        store = PicksStore(engine)
+        published = [make_published(fid, [("Over 2.5", "ALTA"), ("BTTS Sim", "MÉDIA")]) for fid in range(1, 26)]
+        published.append(make_published(100, [("Over 2.5", "ALTA")], hours_ago=1))  # Not over yet
+        store.save("both", {"picks": published[:13], "meta": {}})
+        store.save("both", {"picks": published[13:], "meta": {}})
+
+        results = {fid: make_result(fid, "FT", 3, 0) for fid in range(1, 25)}
+        results[25] = make_result(25, "CANC")
+        api = MockAPI(results)
+        settlement = PickSettlement(api, engine)
+
+        report = await settlement.settle()
+        assert [len(batch) for batch in api.requests] == [20, 5]
+        assert report["settled_fixtures"] == 25
+        assert report["settled_picks"] == 48
+        assert report["won"] == 24
+        assert report["void_picks"] == 2
+
+        rates = {(dim, r["key"]): r for dim, rows in settlement.hit_rates().items() for r in rows}
+        assert rates[("market", "Over 2.5")]["hit_rate"] == 100.0
+        assert rates[("market", "BTTS Sim")]["hit_rate"] == 0.0
+        assert rates[("overall", "all")]["picks"] == 48
+        assert rates[("confidence_level", "ALTA")]["hits"] == 24
+
+        # Second run: nothing left to fetch, counts unchanged
+        api.requests.clear()
+        report = await settlement.settle()
+        assert api.requests == []
+        assert settlement.hit_rates()["overall"][0]["picks"] == 48
+
+    @pytest.mark.asyncio
+    async def test_unfinished_retried(self, engine):
+        """Test a live fixture is left for a later run"""
+        store = PicksStore(engine)
+        store.save("today", {"picks": [make_published(7, [("Over 2.5", "ALTA")])], "meta": {}})
+        settlement = PickSettlement(MockAPI({7: make_result(7, "2H", 1, 0)}), engine)
+
+        report = await settlement.settle()
+        assert report["settled_fixtures"] == 0
+        with Session(engine) as session:
+            assert session.exec(select(SettledPick)).all() == []
@@ -0,0 +1,54 @@
+"""
+Unit tests for the in-process TTL/LRU cache base
+"""
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ttl_cache import TTLCache
+
+
+class TestTTLCache:
+    def test_hits_and_misses(self):
+        cache = TTLCache(ttl=60, size=10)
+        cache.set("a", 1)
+
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    def test_expired_entries_are_dropped(self):
+        cache = TTLCache(ttl=0, size=10)
+        cache.set("a", 1)
+
+        assert cache.get("a") is None
+        assert len(cache) == 0
+
+    def test_least_recently_used_evicted(self):
+        cache = TTLCache(ttl=60, size=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+
+    def test_drop_hook_sees_every_removal(self):
+        dropped = []
+
+        class Indexed(TTLCache):
+            def _drop(self, key):
+                super()._drop(key)
+                dropped.append(key)
+
+        cache = Indexed(ttl=60, size=1)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.pop("b")
+
+        assert dropped == ["a", "b"]
+        assert len(cache) == 0
@@ -0,0 +1,223 @@
+"""
+Unit tests for the pre-warmed analyses of the day's priority fixtures
+"""
+import pytest
+import sys
+import os
+from datetime import datetime, timedelta
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlmodel import SQLModel, create_engine
+from sqlalchemy.pool import StaticPool
+
+import warmup
+from chatbot import ChatBot
+from match_history import MatchHistory
+from warmup import AnalysisWarmup, HISTORY_MAX_TTL
+
+
+def make_fixture(team_id, i):
+    home = i % 2 == 0
+    return {
+        "fixture": {"id": team_id * 100 + i, "date": f"2026-09-{i + 1:02d}T18:00:00+00:00", "status": {"short": "FT"}},
+        "league": {"id": 39, "name": "Premier League", "type": "League", "season": 2026},
+        "teams": {
+            "home": {"id": team_id if home else 999, "name": "Home"},
+            "away": {"id": 999 if home else team_id, "name": "Away"},
+        },
+        "goals": {"home": i % 3, "away": i % 2},
+        "score": {"halftime": {"home": 0, "away": 0}, "fulltime": {"home": i % 3, "away": i % 2}},
+    }
+
+
+def make_upcoming(fixture_id, league_id, hours, home, away):
+    kickoff = datetime.utcnow() + timedelta(hours=hours)
+    return {
+        "fixture": {"id": fixture_id, "date": kickoff.isoformat() + "+00:00", "status": {"short": "NS"}},
+        "league": {"id": league_id},
+        "teams": {"home": home, "away": away},
+    }
+
+
+ARSENAL, CHELSEA = {"id": 1, "name": "Arsenal"}, {"id": 2, "name": "Chelsea"}
+BENFICA, PORTO = {"id": 3, "name": "Benfica"}, {"id": 4, "name": "FC Porto"}
+
+
+class MockAPI:
+    CACHE_TTL = 3600
+    TEAMS = {"arsenal": ARSENAL, "chelsea": CHELSEA, "benfica": BENFICA, "fc porto": PORTO}
+
+    def __init__(self):
+        self.resolved = []
+        self.fetched = []
+        self.ttls = {}
+
+    def has_team_fixtures(self, team_id, last=10):
+        return team_id in self.ttls
+
+    async def resolve_team(self, name, context_fixtures=None):
+        self.resolved.append(name)
+        return self.TEAMS.get(name.lower().strip())
+
+    def cached_team_fixtures(self, team_id, last=10):
+        return [make_fixture(team_id, i) for i in range(last)] if team_id in self.ttls else None
+
+    async def get_team_fixtures(self, team_id, last=10, cache_ttl=None):
+        if team_id not in self.ttls:
+            self.fetched.append(team_id)
+        self.ttls[team_id] = cache_ttl or self.ttls.get(team_id)
+        return [make_fixture(team_id, i) for i in range(last)]
+
+    async def translate_team_name_with_llm(self, text):
+        return {"teams": [], "ambiguous": False}
+
+
+class MockFixtures:
+    def __init__(self, fixtures, kickoffs=None):
+        self.fixtures = fixtures
+        self.kickoffs = kickoffs
+
+    async def get_fixtures(self, date_str):
+        return {f["fixture"]["id"]: f for f in self.fixtures}
+
+    def team_kickoffs(self, dates):
+        """Every team's next game of the full-day listing (the upcoming slate by default)"""
+        if self.kickoffs is not None:
+            return self.kickoffs
+        kickoffs = {}
+        for f in self.fixtures:
+            kickoff = datetime.fromisoformat(f["fixture"]["date"]).replace(tzinfo=None)
+            if kickoff <= datetime.utcnow():
+                continue
+            for side in ["home", "away"]:
+                team_id = f["teams"][side]["id"]
+                kickoffs[team_id] = min(kickoff, kickoffs.get(team_id, kickoff))
+        return kickoffs
+
+
+class MockStatsStore:
+    async def ingest(self, fixtures):
+        return {}
+
+
+class MockModel:
+    def __init__(self):
+        self.calls = 0
+
+    def price_match(self, *args):
+        self.calls += 1
+        return None
+
+
+class Stub:
+    def match_probabilities(self, *args):
+        return None
+
+    def get(self, *args):
+        return None
+
+    def find_match_odds(self, *args):
+        return None
+
+
+class MockUser:
+    id = 1
+    subscription = None
+
+
+@pytest.fixture
+def chatbot():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine)
+    bot = ChatBot()
+    bot.api = MockAPI()
+    bot.stats_store = MockStatsStore()
+    bot.history = MatchHistory(engine)
+    bot.model = MockModel()
+    bot.ratings = bot.baselines = bot.odds = Stub()
+    return bot
+
+
+@pytest.fixture
+def slate():
+    return [
+        make_upcoming(20, 94, 0.5, BENFICA, PORTO),  # Tier 2
+        make_upcoming(10, 39, 6, ARSENAL, CHELSEA),  # Tier 1, later
+        make_upcoming(30, 39, -2, CHELSEA, BENFICA),  # Already kicked off
+    ]
+
+
+class TestWarmup:
+    @pytest.mark.asyncio
+    async def test_warm_fixtures_skip_the_chat_work(self, chatbot, slate):
+        report = await AnalysisWarmup(chatbot, MockFixtures(slate)).warm(["2026-10-19"])
+
+        assert report["fixtures"] == 2
+        assert report["warmed"] == 2
+        assert report["team_requests"] == 4
+        assert chatbot.api.resolved == []
+
+        text = await chatbot.process_message("arsenal vs chelsea", MockUser())
+
+        assert "Arsenal vs Chelsea" in text
+        assert chatbot.api.resolved == []
+        assert chatbot.query_cache.hits == 1
+        assert chatbot.model.calls == 2
+
+    @pytest.mark.asyncio
+    async def test_history_kept_until_kickoff(self, chatbot, slate):
+        await AnalysisWarmup(chatbot, MockFixtures(slate)).warm(["2026-10-19"])
+
+        ttls = chatbot.api.ttls
+        assert 5 * 3600 < ttls[1] <= 6 * 3600
+        # Chelsea plays at 6h (the fixture that already kicked off is ignored)
+        assert ttls[2] == pytest.approx(ttls[1], abs=5)
+        assert ttls[3] == chatbot.api.CACHE_TTL  # Kickoff sooner than the default TTL
+
+        far = [make_upcoming(40, 39, 100, ARSENAL, CHELSEA)]
+        chatbot.api = MockAPI()
+        await AnalysisWarmup(chatbot, MockFixtures(far)).warm(["2026-10-19"])
+        assert chatbot.api.ttls[1] == pytest.approx(HISTORY_MAX_TTL.total_seconds(), abs=5)
+
+    @pytest.mark.asyncio
+    async def test_history_expires_at_a_game_outside_the_slate(self, chatbot, slate):
+        """Test a cup game before the slate kickoff caps the TTL, and an unknown listing keeps the default"""
+        cup = {1: datetime.utcnow() + timedelta(hours=3), 2: datetime.utcnow() + timedelta(hours=6)}
+        await AnalysisWarmup(chatbot, MockFixtures(slate, kickoffs=cup)).warm(["2026-10-19"])
+        assert 2 * 3600 < chatbot.api.ttls[1] <= 3 * 3600
+        assert 5 * 3600 < chatbot.api.ttls[2] <= 6 * 3600
+
+        far = [make_upcoming(40, 39, 100, ARSENAL, CHELSEA)]
+        chatbot.api = MockAPI()
+        await AnalysisWarmup(chatbot, MockFixtures(far)).warm(["2026-10-19"])
+        assert chatbot.api.ttls[1] == pytest.approx(HISTORY_MAX_TTL.total_seconds(), abs=5)
+
+        unknown = MockFixtures(slate)
+        unknown.team_kickoffs = lambda dates: None
+        chatbot.api = MockAPI()
+        await AnalysisWarmup(chatbot, unknown).warm(["2026-10-19"])
+        assert set(chatbot.api.ttls.values()) == {chatbot.api.CACHE_TTL}
+
+    @pytest.mark.asyncio
+    async def test_request_budget_goes_to_the_top_tier(self, chatbot, slate, monkeypatch):
+        monkeypatch.setattr(warmup, "WARMUP_MAX_TEAM_REQUESTS", 2)
+
+        report = await AnalysisWarmup(chatbot, MockFixtures(slate)).warm(["2026-10-19"])
+
+        assert report["warmed"] == 1
+        assert report["skipped"] == 1
+        assert sorted(chatbot.api.fetched) == [1, 2]
+
+    @pytest.mark.asyncio
+    async def test_warm_teams_do_not_count(self, chatbot, slate, monkeypatch):
+        monkeypatch.setattr(warmup, "WARMUP_MAX_TEAM_REQUESTS", 2)
+        job = AnalysisWarmup(chatbot, MockFixtures(slate))
+        await job.warm(["2026-10-19"])
+
+        report = await job.warm(["2026-10-19"])
+
+        assert report["team_requests"] == 2
+        assert report["warmed"] == 2
+        assert sorted(chatbot.api.fetched) == [1, 2, 3, 4]
@@ -0,0 +1,51 @@
+"""
+TTL Cache - in-process LRU map whose entries expire
+Base of the per-worker caches (analyses, parsed queries, conversations).
+An entry is served until its TTL elapses on the monotonic clock, a read
+moves it to the newest end, and past the size limit the least recently
+used entries are evicted.
+"""
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional, Tuple
+
+
+class TTLCache:
+    def __init__(self, ttl: float, size: int):
+        self.ttl = ttl
+        self.size = size
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Value for a key (None when missing or expired)"""
+        entry = self._entries.get(key)
+        if entry and time.monotonic() - entry[0] < self.ttl:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+        if entry:
+            self._drop(key)
+        self.misses += 1
+        return None
+
+    def set(self, key: Hashable, value: Any):
+        """Store a value as the most recently used entry"""
+        self._entries[key] = (time.monotonic(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.size:
+            self._drop(next(iter(self._entries)))
+
+    def pop(self, key: Hashable):
+        self._drop(key)
+
+    def _drop(self, key: Hashable):
+        """Remove one entry (subclasses keeping an index hook in here)"""
+        self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,145 @@
+"""
+Analysis Warmup - precomputed analyses for the day's priority fixtures
+Most chat questions are about today's and tomorrow's games in the priority
+leagues. A background job takes that slate (the odds store's hourly
+fixture listing), fetches each team's history once and keeps it cached
+until the team's next game in any competition (the full-day listing has
+cup and non-priority games too; without it the normal TTL is kept),
+precomputes the structured analysis of every
+fixture and maps "Home x Away" straight to the resolved teams - so a chat
+query about a scheduled game starts warm. Team history requests per run
+are capped, highest-tier and earliest fixtures first.
+"""
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from odds_store import odds_store, _kickoff
+from query_cache import normalize_query
+
+logger = logging.getLogger(__name__)
+
+WARMUP_INTERVAL = 900               # Seconds between runs (analysis cache TTL)
+WARMUP_MAX_FIXTURES = 80            # Fixtures analysed per run
+WARMUP_MAX_TEAM_REQUESTS = 60       # Team history requests per run (quota budget)
+WARMUP_CONCURRENCY = 4
+HISTORY_MAX_TTL = timedelta(hours=36)  # Longest a team history is kept before kickoff
+HISTORY_GAMES = 30                  # Same request as the chat analysis (10 games x 3)
+
+
+class AnalysisWarmup:
+    def __init__(self, chatbot, fixtures=None):
+        self.chatbot = chatbot
+        self.fixtures = fixtures or odds_store
+        self.last_report: Optional[Dict] = None
+
+    def _priority(self, fixture: Dict) -> int:
+        from picks_engine import picks_engine
+        return picks_engine._get_league_priority(fixture.get("league", {}).get("id"))
+
+    async def warm(self, dates: List[str] = None) -> Dict:
+        """Warm team histories and analyses of the dates' priority fixtures"""
+        now = datetime.utcnow()
+        dates = dates or [now.strftime("%Y-%m-%d"), (now + timedelta(days=1)).strftime("%Y-%m-%d")]
+
+        slate = []
+        for date_str in dates:
+            slate.extend((await self.fixtures.get_fixtures(date_str)).values())
+        slate = [f for f in slate if (_kickoff(f) or now) > now]
+        slate.sort(key=lambda f: (self._priority(f), _kickoff(f), f.get("fixture", {}).get("id") or 0))
+
+        # A team's history is valid until its next kickoff in the slate...
+        next_kickoff: Dict[int, datetime] = {}
+        for fixture in slate:
+            for side in ["home", "away"]:
+                team_id = fixture.get("teams", {}).get(side, {}).get("id")
+                if team_id and (team_id not in next_kickoff or _kickoff(fixture) < next_kickoff[team_id]):
+                    next_kickoff[team_id] = _kickoff(fixture)
+
+        # ...or an earlier game outside it (cups, other leagues). Unknown
+        # when the dates have no full-day listing: keep the normal TTL then
+        team_kickoffs = self.fixtures.team_kickoffs(dates)
+
+        api = self.chatbot.api
+        selected, cold, skipped = [], {}, 0
+        for fixture in slate:
+            if len(selected) >= WARMUP_MAX_FIXTURES:
+                skipped += 1
+                continue
+            teams = fixture.get("teams", {})
+            home, away = teams.get("home", {}), teams.get("away", {})
+            if not home.get("id") or not away.get("id"):
+                continue
+            needed = [t["id"] for t in (home, away) if t["id"] not in cold and not api.has_team_fixtures(t["id"], HISTORY_GAMES)]
+            if len(cold) + len(needed) > WARMUP_MAX_TEAM_REQUESTS:
+                skipped += 1
+                continue
+            for team_id in needed:
+                cold[team_id] = True
+            selected.append(fixture)
+
+        # Every selected team's history is (re)cached until its next game
+        semaphore = asyncio.Semaphore(WARMUP_CONCURRENCY)
+
+        async def keep_history(team_id: int):
+            if team_kickoffs is None:
+                ttl = api.CACHE_TTL
+            else:
+                next_game = min(next_kickoff[team_id], team_kickoffs.get(team_id, next_kickoff[team_id]))
+                ttl = max(int(min(next_game - now, HISTORY_MAX_TTL).total_seconds()), api.CACHE_TTL)
+            async with semaphore:
+                await api.get_team_fixtures(team_id, HISTORY_GAMES, cache_ttl=ttl)
+
+        team_ids = list(dict.fromkeys(
+            f.get("teams", {}).get(side, {}).get("id") for f in selected for side in ["home", "away"]
+        ))
+        await asyncio.gather(*(keep_history(team_id) for team_id in team_ids))
+
+        matchups = []
+        for fixture in selected:
+            teams = fixture.get("teams", {})
+            matchups.append((
+                {"id": teams["home"]["id"], "name": teams["home"].get("name", "")},
+                {"id": teams["away"]["id"], "name": teams["away"].get("name", "")},
+            ))
+        analyses = await self.chatbot.match_analyses(matchups) if matchups else []
+
+        warmed = 0
+        for (home, away), analysis in zip(matchups, analyses):
+            if analysis.get("error"):
+                continue
+            warmed += 1
+            # "Home x Away" as typed with the API names goes straight to the analysis
+            query = f"{home['name']} x {away['name']}"
+            self.chatbot.query_cache.set(normalize_query(query), {
+                "teams_text": query.lower(),
+                "markets": [],
+                "odds": [],
+                "teams": [analysis["home"], analysis["away"]],
+            })
+
+        report = {
+            "dates": dates,
+            "fixtures": len(slate),
+            "warmed": warmed,
+            "failed": len(analyses) - warmed,
+            "skipped": skipped,
+            "team_requests": len(cold),
+            "finished_at": datetime.utcnow(),
+        }
+        self.last_report = report
+        logger.info(
+            f"[WARMUP] {warmed}/{len(slate)} fixtures warm "
+            f"({len(cold)} team histories fetched, {skipped} skipped by budget)"
+        )
+        return report
+
+    async def run_periodically(self, interval: int = WARMUP_INTERVAL):
+        """Keep the day's analyses warm"""
+        while True:
+            try:
+                await self.warm()
+            except Exception as e:
+                logger.error(f"[WARMUP] Run failed: {str(e)}")
+            await asyncio.sleep(interval)
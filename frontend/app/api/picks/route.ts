@@ -34,15 +34,20 @@ export async function GET(request: NextRequest) {
     const searchParams = request.nextUrl.searchParams
     const range = searchParams.get('range') || 'both'
     const refresh = searchParams.get('refresh') || 'false'
+    const days = searchParams.get('days')
+    const stream = searchParams.get('stream') === 'true'
+    // Retries replay the first result; keys are scoped to the user
+    const idempotencyKey = request.headers.get('Idempotency-Key')
 
     // Forward request to internal backend endpoint
     const backendResponse = await fetch(
-      `${BACKEND_URL}/api/internal/picks?range=${range}&refresh=${refresh}`,
+      `${BACKEND_URL}/api/internal/picks?range=${range}&refresh=${refresh}${days ? `&days=${days}` : ''}${stream ? '&stream=true' : ''}`,
       {
         method: 'GET',
         headers: {
           'Content-Type': 'application/json',
           'X-Internal-Key': INTERNAL_API_KEY,
+          ...(idempotencyKey ? { 'Idempotency-Key': `${user.id}:${idempotencyKey}` } : {}),
         },
       }
     )
@@ -55,6 +60,16 @@ export async function GET(request: NextRequest) {
       )
     }
 
+    // NDJSON: pass lines through as they arrive so picks render progressively
+    if (stream) {
+      return new Response(backendResponse.body, {
+        headers: {
+          'Content-Type': 'application/x-ndjson',
+          'Cache-Control': 'no-cache',
+        },
+      })
+    }
+
     const data = await backendResponse.json()
     return NextResponse.json(data)
 
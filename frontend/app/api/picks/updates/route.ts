@@ -0,0 +1,66 @@
+import { NextResponse } from 'next/server'
+import { createClient } from '@/lib/supabase/server'
+
+const BACKEND_URL = process.env.BACKEND_URL || 'http://localhost:8000'
+const INTERNAL_API_KEY = process.env.INTERNAL_API_KEY || 'betfaro_internal_2024'
+
+export const dynamic = 'force-dynamic'
+
+export async function GET() {
+  try {
+    const supabase = await createClient()
+    const { data: { user } } = await supabase.auth.getUser()
+
+    if (!user) {
+      return NextResponse.json(
+        { detail: 'Not authenticated' },
+        { status: 401 }
+      )
+    }
+
+    // Check subscription
+    const { data: subscription } = await supabase
+      .from('subscriptions')
+      .select('plan, status')
+      .eq('user_id', user.id)
+      .maybeSingle()
+
+    if (!subscription || subscription.plan?.toLowerCase() !== 'elite') {
+      return NextResponse.json(
+        { detail: 'Picks Diários é exclusivo do plano Elite. Faça upgrade para acessar.' },
+        { status: 403 }
+      )
+    }
+
+    // Subscribe to the backend feed of new picks snapshots
+    const backendResponse = await fetch(`${BACKEND_URL}/api/internal/picks/updates`, {
+      method: 'GET',
+      headers: {
+        'X-Internal-Key': INTERNAL_API_KEY,
+      },
+    })
+
+    if (!backendResponse.ok || !backendResponse.body) {
+      return NextResponse.json(
+        { detail: 'Erro ao conectar às atualizações de picks' },
+        { status: backendResponse.status || 502 }
+      )
+    }
+
+    // Server-sent events: pass the stream through untouched
+    return new Response(backendResponse.body, {
+      headers: {
+        'Content-Type': 'text/event-stream',
+        'Cache-Control': 'no-cache',
+        'Connection': 'keep-alive',
+      },
+    })
+
+  } catch (error) {
+    console.error('Error in picks updates API:', error)
+    return NextResponse.json(
+      { detail: 'Erro ao conectar às atualizações de picks' },
+      { status: 500 }
+    )
+  }
+}
@@ -1,6 +1,6 @@
 'use client'
 
-import { useState, useEffect } from 'react'
+import { useState, useEffect, useRef } from 'react'
 import Link from 'next/link'
 import { useRouter } from 'next/navigation'
 import { 
@@ -53,9 +53,23 @@ interface PicksResponse {
     priority_fixtures: number
     analyzed_success: number
     analyzed_failed: number
+    snapshot_version?: number
   }
 }
 
+interface SnapshotUpdate {
+  range: string
+  version: number
+  previous_version: number | null
+  ranking: number[]
+  diff: { added: number[], removed: number[], changed: number[] }
+  results: PickResult[]
+  meta: PicksResponse['meta']
+}
+
+// Spread the fallback reloads of every open page over this many ms
+const RELOAD_JITTER_MS = 10000
+
 interface UserData {
   id: number
   email: string
@@ -77,6 +91,8 @@ export default function PicksPage() {
   const [picks, setPicks] = useState<PickResult[]>([])
   const [meta, setMeta] = useState<PicksResponse['meta'] | null>(null)
   const [activeTab, setActiveTab] = useState<'both' | 'today' | 'tomorrow'>('both')
+  // Snapshot version of the picks on screen (diffs only apply on top of it)
+  const snapshotVersion = useRef<number | undefined>(undefined)
 
   useEffect(() => {
     checkAuth()
@@ -88,6 +104,34 @@ export default function PicksPage() {
     }
   }, [isElite, activeTab])
 
+  // New snapshots are pushed by the backend with their diff: applied locally
+  // when we hold the previous version, otherwise reloaded after a random delay
+  useEffect(() => {
+    if (!isElite) return
+
+    let reloadTimer: ReturnType<typeof setTimeout> | undefined
+    const source = new EventSource('/api/picks/updates')
+    source.addEventListener('snapshot', (event) => {
+      const update: SnapshotUpdate = JSON.parse((event as MessageEvent).data)
+      if (update.range !== activeTab) return
+
+      if (snapshotVersion.current === update.version) return
+      if (snapshotVersion.current === undefined || snapshotVersion.current !== update.previous_version) {
+        clearTimeout(reloadTimer)
+        reloadTimer = setTimeout(() => reloadPicks(activeTab), Math.random() * RELOAD_JITTER_MS)
+        return
+      }
+      snapshotVersion.current = update.version
+      setPicks((previous) => applySnapshotUpdate(previous, update))
+      setMeta({ ...update.meta, snapshot_version: update.version })
+    })
+
+    return () => {
+      clearTimeout(reloadTimer)
+      source.close()
+    }
+  }, [isElite, activeTab])
+
   const checkAuth = async () => {
     const supabase = createClient()
     
@@ -148,6 +192,7 @@ export default function PicksPage() {
         const data: PicksResponse = await response.json()
         setPicks(data.picks)
         setMeta(data.meta)
+        snapshotVersion.current = data.meta.snapshot_version
       } else {
         const errorData = await response.json()
         setError(errorData.detail || 'Erro ao carregar picks')
@@ -160,6 +205,29 @@ export default function PicksPage() {
     }
   }
 
+  const applySnapshotUpdate = (previous: PickResult[], update: SnapshotUpdate): PickResult[] => {
+    const byId = new Map(previous.map((result) => [result.fixture_id, result]))
+    update.diff.removed.forEach((fixtureId) => byId.delete(fixtureId))
+    update.results.forEach((result) => byId.set(result.fixture_id, result))
+    return update.ranking
+      .map((fixtureId) => byId.get(fixtureId))
+      .filter((result): result is PickResult => result !== undefined)
+  }
+
+  const reloadPicks = async (range: string) => {
+    try {
+      const response = await fetch(`/api/picks?range=${range}&refresh=false`)
+      if (response.ok) {
+        const data: PicksResponse = await response.json()
+        setPicks(data.picks)
+        setMeta(data.meta)
+        snapshotVersion.current = data.meta.snapshot_version
+      }
+    } catch (err) {
+      console.error('Picks reload failed:', err)
+    }
+  }
+
   const handleRefresh = () => {
     fetchPicks(activeTab, true)
   }